@@ -0,0 +1,77 @@
+"""Tail latency of a mixed-length playlist: one connection per video vs. FragmentPlanner (offline simulation).
+
+Builds a playlist of short clips with a few multi-hour VODs and simulates
+--workers parallel downloads in steps of one second. Each connection is
+capped at --conn-mbps (YouTube throttles per connection) and all of them
+share a --link-mbps link. Videos take their fragment count from
+lib.FragmentPlanner when they start, exactly as download_playlist does.
+Prints median, p95 and last completion time for each budget.
+
+    python benchmarks/bench_fragment_plan.py --clips 60 --vods 1 --workers 16 --budget 32
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lib import FragmentPlanner
+
+BYTES_PER_SECOND_OF_VIDEO = 0.4  # MB per second of 1080p video
+
+
+def mixed_playlist(clips: int, vods: int, seed: int) -> list:
+    rng = random.Random(seed)
+    videos = [{'title': f'clip {i}', 'duration': rng.randint(60, 600)} for i in range(clips)]
+    for i in range(vods):
+        # VODs land anywhere in the playlist, often early
+        videos.insert(rng.randint(0, len(videos) // 3), {'title': f'vod {i}', 'duration': 6 * 3600})
+    return videos
+
+
+def simulate(videos: list, workers: int, budget: int, conn_mbps: float, link_mbps: float) -> list:
+    """Returns sorted completion times in seconds."""
+    planner = FragmentPlanner(videos, workers, budget)
+    queue = list(videos)
+    running = []  # [video, remaining MB, connections]
+    completions = []
+    now = 0
+    while queue or running:
+        while queue and len(running) < workers:
+            video = queue.pop(0)
+            running.append([video, video['duration'] * BYTES_PER_SECOND_OF_VIDEO, planner.acquire(video)])
+        demand = sum(item[2] * conn_mbps for item in running)
+        scale = min(1.0, link_mbps / demand) if demand else 1.0
+        now += 1
+        for item in list(running):
+            item[1] -= item[2] * conn_mbps * scale
+            if item[1] <= 0:
+                running.remove(item)
+                planner.release(item[0])
+                completions.append(now)
+    return sorted(completions)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clips", type=int, default=60)
+    parser.add_argument("--vods", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--budget", type=int, default=32, help="FragmentPlanner connection budget")
+    parser.add_argument("--conn-mbps", type=float, default=2.0, help="Throughput of a single connection in MB/s")
+    parser.add_argument("--link-mbps", type=float, default=60.0, help="Total link throughput in MB/s")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    playlist = mixed_playlist(args.clips, args.vods, args.seed)
+    print(f"{'budget':<12}{'median':>10}{'p95':>10}{'last':>10}")
+    for label, budget in (("per-video", 0), (f"planner {args.budget}", args.budget)):
+        completions = simulate(playlist, args.workers, budget, args.conn_mbps, args.link_mbps)
+        median = completions[len(completions) // 2]
+        p95 = completions[min(len(completions) - 1, int(len(completions) * 0.95))]
+        print(f"{label:<12}{median:>9}s{p95:>9}s{completions[-1]:>9}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Time-to-first-N-complete for each download schedule policy (offline simulation).
+
+Builds a synthetic playlist of mostly short clips with a few multi-hour
+streams, orders it with lib.schedule_videos and simulates --workers parallel
+downloads where each item takes duration / --speedup seconds (downloads run
+much faster than real time). Prints simulated seconds until the first 1, 10,
+half and all items are done.
+
+    python benchmarks/bench_schedule.py --videos 500 --workers 8
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lib import SCHEDULE_POLICIES, schedule_videos
+
+
+def synthetic_playlist(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    videos = []
+    for index in range(1, count + 1):
+        # ~3% long streams, the rest clips of a few minutes
+        duration = rng.randint(2 * 3600, 10 * 3600) if rng.random() < 0.03 else rng.randint(30, 900)
+        upload_date = f"2024{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+        videos.append({'url': str(index), 'title': str(index), 'playlist_index': index, 'duration': duration,
+                       'upload_date': upload_date, 'priority': rng.randint(0, 3)})
+    return videos
+
+
+def simulate(videos: list, workers: int, speedup: float) -> list:
+    """Returns sorted completion times when `workers` slots take items in queue order."""
+    free_at = [0.0] * workers
+    completions = []
+    for video in videos:
+        start = heapq.heappop(free_at)
+        finish = start + video['duration'] / speedup
+        completions.append(finish)
+        heapq.heappush(free_at, finish)
+    return sorted(completions)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--speedup", type=float, default=20.0, help="How much faster than real time an item downloads")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    playlist = synthetic_playlist(args.videos, args.seed)
+    milestones = [1, 10, args.videos // 2, args.videos]
+    print(f"{'policy':<10}" + "".join(f"{'first ' + str(n):>14}" for n in milestones))
+    for policy in SCHEDULE_POLICIES:
+        completions = simulate(schedule_videos(playlist, policy), args.workers, args.speedup)
+        print(f"{policy:<10}" + "".join(f"{completions[n - 1]:>13.0f}s" for n in milestones))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Metadata + cover thumbnail: two ffmpeg remuxes vs. the single-pass FFmpegMetadataThumbnailPP.
+
+Generates a synthetic MP4 of roughly --size-mb megabytes plus a webp cover,
+then for each approach copies it fresh and measures wall time and the bytes
+each ffmpeg pass wrote (the size of every rewritten output file). Needs ffmpeg
+on PATH.
+
+    python benchmarks/bench_thumbnail_embed.py --size-mb 2048 --workdir /mnt/scratch
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import yt_dlp
+from yt_dlp.postprocessor import FFmpegMetadataPP
+from lib import FFmpegMetadataThumbnailPP, embed_thumbnail_to_video
+
+BITRATE_MBIT = 40
+
+
+def make_sample(workdir: str, size_mb: int) -> tuple:
+    video = os.path.join(workdir, "sample.mp4")
+    thumbnail = os.path.join(workdir, "sample.webp")
+    duration = max(1, size_mb * 8 // BITRATE_MBIT)
+    subprocess.run([
+        "ffmpeg", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", "testsrc2=size=1280x720:rate=30",
+        "-f", "lavfi", "-i", "sine=frequency=440",
+        "-t", str(duration), "-c:v", "libx264", "-preset", "ultrafast",
+        "-b:v", f"{BITRATE_MBIT}M", "-minrate", f"{BITRATE_MBIT}M", "-maxrate", f"{BITRATE_MBIT}M", "-bufsize", "8M",
+        "-c:a", "aac", video], check=True)
+    subprocess.run(["ffmpeg", "-loglevel", "error", "-y", "-f", "lavfi", "-i", "testsrc2=size=1280x720", "-frames:v", "1", thumbnail], check=True)
+    return video, thumbnail
+
+
+def fresh_copy(workdir: str, video: str, thumbnail: str, label: str) -> tuple:
+    target = os.path.join(workdir, f"{label}.mp4")
+    shutil.copyfile(video, target)
+    shutil.copyfile(thumbnail, os.path.join(workdir, f"{label}.webp"))
+    return target, os.path.join(workdir, f"{label}.webp")
+
+
+def info_for(path: str) -> dict:
+    return {'filepath': path, 'ext': 'mp4', 'id': 'benchmark', 'title': 'benchmark', 'upload_date': '20240101', '__files_to_move': {}}
+
+
+def two_pass(ydl: yt_dlp.YoutubeDL, path: str, thumbnail: str) -> int:
+    written = 0
+    ydl.run_pp(FFmpegMetadataPP(ydl, add_metadata=True), info_for(path))
+    written += os.path.getsize(path)
+    if not embed_thumbnail_to_video(path, thumbnail):
+        raise RuntimeError("embed_thumbnail_to_video failed")
+    written += os.path.getsize(path)
+    return written
+
+
+def single_pass(ydl: yt_dlp.YoutubeDL, path: str, thumbnail: str) -> int:
+    info = ydl.run_pp(FFmpegMetadataThumbnailPP(ydl, add_metadata=True), info_for(path))
+    if not info.get('__thumbnail_embedded'):
+        raise RuntimeError("thumbnail was not embedded")
+    return os.path.getsize(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=1024, help="Approximate size of the sample video")
+    parser.add_argument("--workdir", default=None, help="Directory on the disk to measure (default: system temp)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        print("Generating sample video...")
+        video, thumbnail = make_sample(workdir, args.size_mb)
+        print(f"sample   {os.path.getsize(video) / 2**20:10.1f} MiB")
+        ydl = yt_dlp.YoutubeDL({'quiet': True})
+        for label, func in (("two-pass", two_pass), ("single", single_pass)):
+            path, thumb = fresh_copy(workdir, video, thumbnail, label)
+            start = time.perf_counter()
+            written = func(ydl, path, thumb)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<8} {elapsed:8.2f}s   written {written / 2**20:10.1f} MiB")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
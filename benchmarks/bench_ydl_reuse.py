@@ -0,0 +1,76 @@
+"""Per-video YoutubeDL setup overhead: a fresh instance per video vs. YoutubeDLPool.
+
+Runs offline. Each "video" builds the same options download_video uses and
+resolves an output filename, so the numbers only cover setup cost
+(extractor/postprocessor registration, cookies.txt parsing), not network time.
+
+Runs on a single thread: every fresh instance rewrites cookies.txt on close,
+so concurrent fresh instances race on that file (one more reason to pool).
+
+    python benchmarks/bench_ydl_reuse.py --videos 200 --cookies 300
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import yt_dlp
+from lib import YoutubeDLPool, _build_video_opts
+
+FAKE_INFO = {'id': 'dQw4w9WgXcQ', 'title': 'benchmark', 'ext': 'mp4', 'extractor': 'youtube', 'extractor_key': 'Youtube'}
+
+
+def write_cookie_file(path: str, count: int) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# Netscape HTTP Cookie File\n")
+        for i in range(count):
+            f.write(f".youtube.com\tTRUE\t/\tTRUE\t2000000000\tcookie{i}\t{'x' * 64}\n")
+
+
+def fresh_setup(output_path: str, video_number: int) -> str:
+    ydl_opts = _build_video_opts(output_path, video_number, True, "Best Video", False)
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        ydl.cookiejar  # download_video always touches the jar on its first request
+        return ydl.prepare_filename(FAKE_INFO)
+
+
+def pooled_setup(ydl_pool: YoutubeDLPool, output_path: str, video_number: int) -> str:
+    ydl_opts = _build_video_opts(output_path, video_number, True, "Best Video", False)
+    ydl = ydl_pool.acquire(ydl_opts)
+    ydl.cookiejar
+    return ydl.prepare_filename(FAKE_INFO)
+
+
+def run(label: str, func, videos: int) -> float:
+    start = time.perf_counter()
+    for video_number in range(1, videos + 1):
+        func(video_number)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} total {elapsed:8.3f}s   per video {elapsed / videos * 1000:8.2f} ms")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=200)
+    parser.add_argument("--cookies", type=int, default=300, help="Number of cookies in the synthetic cookies.txt")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)  # download_video resolves cookies.txt relative to the working directory
+        write_cookie_file("cookies.txt", args.cookies)
+        output_path = os.path.join(workdir, "out")
+
+        fresh = run("fresh", lambda n: fresh_setup(output_path, n), args.videos)
+        ydl_pool = YoutubeDLPool()
+        pooled = run("pooled", lambda n: pooled_setup(ydl_pool, output_path, n), args.videos)
+        ydl_pool.close()
+
+    print(f"speedup  {fresh / pooled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
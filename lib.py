@@ -1,14 +1,36 @@
 import os
 import re
 import urllib.parse
+import urllib.request
+import urllib.error
+import http.cookiejar
+import html
+import heapq
+import http.server
+from datetime import datetime
 import sys
 import subprocess
 import yt_dlp
+from yt_dlp.postprocessor import FFmpegMetadataPP, get_postprocessor
+from yt_dlp.postprocessor.ffmpeg import FFmpegPostProcessorError
+from yt_dlp.utils import make_archive_id, prepend_extension, replace_extension
 import concurrent.futures
+import multiprocessing
+import multiprocessing.util
+import threading
+import queue
 import glob
+import itertools
 import time
+import random
+import json
+import sqlite3
 import zipfile
-from typing import List, Dict, Any, Optional, Callable
+import tarfile
+import shutil
+from contextlib import closing, contextmanager, nullcontext
+from collections import deque
+from typing import List, Dict, Any, Optional, Callable, Tuple
 
 # --- Version Check ---
 if sys.version_info < (3, 10):
@@ -22,20 +44,201 @@ SUB_EXTENSIONS: List[str] = ['.vtt', '.srt']
 # Only delete actual temporary files, NOT thumbnails (webp/jpg are valid downloads)
 TEMP_FILE_PATTERNS: List[str] = ["*.temp.mp4", "*.tmp.mp4", "*.part", "*.metadata.json", "*.[0-9][0-9][0-9]"]
 THUMBNAIL_PATTERNS: List[str] = ["*.webp", "*.jpg"]  # Keep these as they are thumbnails
+THUMBNAIL_EXTENSIONS: List[str] = ['.webp', '.jpg', '.png']
+# Files yt-dlp writes next to a video (<name>.<lang>.vtt, <name>.info.json...); archived together with it
+SIDECAR_EXTENSIONS: List[str] = ['.vtt', '.srt', '.info.json', '.description']
 FILES_PER_ZIP: int = 10
+EXECUTION_BACKENDS: List[str] = ['thread', 'process', 'pipeline']
+# playlist: playlist order, shortest: shortest duration first, newest: newest upload first, priority: user priority tags first
+SCHEDULE_POLICIES: List[str] = ['playlist', 'shortest', 'newest', 'priority']
+PIPELINE_QUEUE_FACTOR: int = 2  # bounded queue size per stage = workers * factor
+# Archive formats: "zip" stores media and deflates text sidecars, "zip-store" never compresses, "tar" is an uncompressed tarball
+ARCHIVE_FORMATS: List[str] = ['zip', 'zip-store', 'tar']
+# Already-compressed media gains ~0% from deflate, so only text sidecars are compressed
+DEFLATED_EXTENSIONS: List[str] = ['.vtt', '.srt', '.json', '.txt', '.description', '.ytdl']
+ARCHIVE_BUFFER_SIZE: int = 8 * 1024 * 1024
+ARCHIVE_TEMP_SUFFIX: str = ".archiving.tmp"  # must not match TEMP_FILE_PATTERNS
+# Playlist archive parts are cut at this size; 0 falls back to FILES_PER_ZIP videos (with their sidecars) per part
+ARCHIVE_TARGET_BYTES: int = 4 * 1024 ** 3
+# Auto-tuned concurrency: one decision per interval, additive increase, multiplicative decrease
+AUTO_TUNE_INTERVAL: float = 15.0
+AUTO_TUNE_MAX_WORKERS: int = 16
+AUTO_TUNE_MAX_ERROR_RATE: float = 0.2
+AUTO_TUNE_MIN_GAIN: float = 0.05  # an added worker must raise throughput by this much to be kept
+THROTTLE_MARKERS: List[str] = ['HTTP Error 429', 'Too Many Requests', 'rate-limit', 'rate limit', 'not a bot']
+# Failure classes for retries; the first matching pattern wins, anything unmatched counts as a network error
+ERROR_PATTERNS: List[Tuple[str, str]] = [
+    ('throttled', '|'.join(re.escape(marker) for marker in THROTTLE_MARKERS)),
+    ('auth', r'Sign in|login required|members[- ]only|Join this channel|Private video|HTTP Error 401'),
+    ('permanent', r'Video unavailable|video is (?:unavailable|not available)|has been (?:removed|terminated)|not available in your country|copyright|'
+                  r'Unsupported URL|is not a valid URL|Requested format is not available|HTTP Error 404|live event will begin'),
+]
+RETRY_LIMITS: Dict[str, int] = {'network': 3, 'throttled': 4, 'auth': 0, 'permanent': 0}  # retries after the first attempt
+RETRY_BASE_DELAY: Dict[str, float] = {'network': 15.0, 'throttled': 120.0}  # seconds, doubled per attempt
+RETRY_MAX_DELAY: float = 15 * 60
+POT_PROVIDER_URL: str = "http://127.0.0.1:4416"
+POT_PROBE_INTERVAL: float = 60.0  # seconds between health probes, while up or down
+POT_PROBE_TIMEOUT: float = 2.0
+DOWNLOAD_ARCHIVE_FILE: str = "downloaded.txt"
+JOB_JOURNAL_SUFFIX: str = ".job.jsonl"  # <playlist title>.job.jsonl in the output directory
+# States of a job journal item, in the order an item moves through them
+JOB_ITEM_STATES: List[str] = ['queued', 'downloading', 'failed', 'postprocessed', 'archived']
+PLAYLIST_CACHE_FILE: str = "playlist_cache.db"
+PLAYLIST_CACHE_TTL: int = 6 * 60 * 60  # seconds; 0 disables the cache
+# Flat-entry fields kept in the cache (enough for listing, scheduling and downloading)
+CACHED_ENTRY_FIELDS: List[str] = ['_type', 'ie_key', 'id', 'url', 'title', 'duration', 'upload_date', 'timestamp', 'live_status']
+BANDWIDTH_BURST_SECONDS: float = 1.0  # token bucket capacity, in seconds of the allowed rate
+BANDWIDTH_WINDOW_SECONDS: float = 10.0  # window for the achieved-rate report
+PROGRESS_RATE_WINDOW: float = 20.0  # seconds of samples behind the job's moving-average throughput
+# Structured export: progress records per file at most this often; histogram buckets for the metrics endpoint
+EVENT_PROGRESS_INTERVAL: float = 10.0
+METRICS_SECONDS_BUCKETS: List[float] = [1, 5, 15, 60, 300, 900, 3600]
+METRICS_THROUGHPUT_BUCKETS: List[float] = [0.1, 0.5, 1, 2, 5, 10, 25, 50, 100]  # MiB/s per downloaded file
+# Connections shared by all running downloads of a job (videos x fragments); 0 disables fragment parallelism
+FRAGMENT_CONNECTION_BUDGET: int = 16
+MAX_CONCURRENT_FRAGMENTS: int = 8
+FRAGMENT_MIN_DURATION: int = 10 * 60  # shorter videos have too few fragments to gain from parallel fetching
+FRAGMENT_DEFAULT_DURATION: int = 5 * 60  # size estimate for entries without a duration (below FRAGMENT_MIN_DURATION)
+# Live detection: idle channels are polled less often, up to LIVE_MAX_INTERVAL, except around their usual stream times
+LIVE_MAX_INTERVAL: float = 15 * 60
+LIVE_IDLE_POLLS_PER_STEP: int = 5  # idle polls before the interval doubles
+LIVE_FULL_SWEEP_EVERY: int = 10  # every Nth poll checks all candidate pages, not just the most likely one
+LIVE_USUAL_WINDOW: float = 30 * 60  # seconds around a past stream start (same weekday and time) polled at the base interval
+LIVE_HISTORY_FILE: str = "live_history.json"
+LIVE_HISTORY_LIMIT: int = 50  # stream starts remembered per channel
+LIVE_STREAMS_PROBE_ITEMS: int = 5  # live streams sit at the top of the streams tab
+LIVE_PAGE_TIMEOUT: float = 15.0
+LIVE_STATE_FILE: str = "live_state.json"  # recorded and in-progress live IDs of an output directory
+LIVE_MAX_RECORDINGS: int = 4  # lives recorded at the same time per monitor
+LIVE_MAX_ATTEMPTS: int = 3  # failed recordings of one live before it is given up (auth and permanent errors give up at once)
+LIVE_PROBE_WORKERS: int = 8  # probes in flight at once across all monitored channels
+LIVE_PROBE_JITTER: float = 0.1  # each channel's next probe moves by up to this fraction of its interval
+LIVE_MONITOR_REPORT_INTERVAL: float = 10 * 60
 
-# --- Helper Functions ---
+# --- Playlist Metadata Cache ---
+
+class PlaylistCache:
+    """以 SQLite 保存播放清單的扁平解析結果，依播放清單 ID 與影片 ID 索引。"""
+    def __init__(self, db_path: str = PLAYLIST_CACHE_FILE):
+        self.db_path = db_path
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS playlists ("
+                " playlist_id TEXT PRIMARY KEY, title TEXT, webpage_url TEXT, fetched_at REAL NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " playlist_id TEXT NOT NULL, position INTEGER NOT NULL, video_id TEXT, title TEXT, url TEXT, data TEXT,"
+                " PRIMARY KEY (playlist_id, position))")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_video ON entries (playlist_id, video_id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                " playlist_id TEXT PRIMARY KEY, head_id TEXT, playlist_count INTEGER, synced_at REAL NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS failed_videos ("
+                " video_id TEXT PRIMARY KEY, error_class TEXT, message TEXT, failed_at REAL NOT NULL)")
 
-def get_playlist_info(playlist_url: str, use_cookies: bool, use_pot: bool) -> Optional[Dict[str, Any]]:
-    """獲取播放清單的資訊，但不下載影片。"""
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call keeps the cache safe to use from any thread
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, playlist_id: str, ttl: int = PLAYLIST_CACHE_TTL) -> Optional[Dict[str, Any]]:
+        """Returns the cached playlist info, or None if missing or older than ttl seconds."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT title, webpage_url, fetched_at FROM playlists WHERE playlist_id = ?", (playlist_id,)).fetchone()
+            if not row or time.time() - row[2] > ttl:
+                return None
+            rows = conn.execute("SELECT position, data FROM entries WHERE playlist_id = ? ORDER BY position", (playlist_id,)).fetchall()
+        # Unavailable entries are stored as gaps so playlist indices match a fresh extraction
+        entries: List[Optional[Dict[str, Any]]] = [None] * (rows[-1][0] + 1 if rows else 0)
+        for position, data in rows:
+            entries[position] = json.loads(data)
+        return {
+            'id': playlist_id,
+            'title': row[0],
+            'webpage_url': row[1],
+            'entries': entries,
+            'fetched_at': row[2],
+        }
+
+    def put(self, playlist_id: str, info: Dict[str, Any]) -> None:
+        """Replaces the cached copy of a playlist with a freshly extracted one."""
+        entries = [
+            (i, {key: entry[key] for key in CACHED_ENTRY_FIELDS if entry.get(key) is not None})
+            for i, entry in enumerate(info.get('entries') or []) if entry
+        ]
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM entries WHERE playlist_id = ?", (playlist_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO playlists (playlist_id, title, webpage_url, fetched_at) VALUES (?, ?, ?, ?)",
+                (playlist_id, info.get('title'), info.get('webpage_url'), time.time()))
+            conn.executemany(
+                "INSERT INTO entries (playlist_id, position, video_id, title, url, data) VALUES (?, ?, ?, ?, ?, ?)",
+                [(playlist_id, i, entry.get('id'), entry.get('title'), entry.get('url'), json.dumps(entry, ensure_ascii=False))
+                 for i, entry in entries])
 
+    def get_sync_state(self, playlist_id: str) -> Optional[Tuple[Optional[str], Optional[int]]]:
+        """The (newest video ID, playlist_count) recorded by the last sync, or None if never synced."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT head_id, playlist_count FROM sync_state WHERE playlist_id = ?", (playlist_id,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put_sync_state(self, playlist_id: str, head_id: Optional[str], playlist_count: Optional[int]) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (playlist_id, head_id, playlist_count, synced_at) VALUES (?, ?, ?, ?)",
+                (playlist_id, head_id, playlist_count, time.time()))
+
+    def mark_failed(self, failures: List[Tuple[str, str, str]]) -> None:
+        """Remembers videos that failed for good, as (video ID, error class, message)."""
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO failed_videos (video_id, error_class, message, failed_at) VALUES (?, ?, ?, ?)",
+                [(video_id, error_class, message, time.time()) for video_id, error_class, message in failures])
+
+    def failed_ids(self) -> set:
+        with closing(self._connect()) as conn:
+            return {row[0] for row in conn.execute("SELECT video_id FROM failed_videos")}
+
+    def invalidate(self, playlist_id: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM entries WHERE playlist_id = ?", (playlist_id,))
+            conn.execute("DELETE FROM playlists WHERE playlist_id = ?", (playlist_id,))
+            conn.execute("DELETE FROM sync_state WHERE playlist_id = ?", (playlist_id,))
+
+# --- Helper Functions ---
+
+def _normalize_playlist_url(playlist_url: str) -> str:
     # 【修復核心】：判斷如果是包含 list 參數的網址，強制將其轉換為「純播放清單」網址
     # 這樣可以避免 YouTube 觀看頁面 (watch) 最高只會顯示 100 部影片的限制
     if "youtube.com" in playlist_url or "youtu.be" in playlist_url:
         parsed_url = urllib.parse.urlparse(playlist_url)
         query_params = urllib.parse.parse_qs(parsed_url.query)
         if 'list' in query_params:
-            playlist_url = f"https://www.youtube.com/playlist?list={query_params['list'][0]}"
+            return f"https://www.youtube.com/playlist?list={query_params['list'][0]}"
+    return playlist_url.strip().rstrip("/")
+
+def _playlist_cache_key(playlist_url: str) -> str:
+    """The playlist ID for `list=` URLs, otherwise the normalized URL (channel tabs etc.)."""
+    query_params = urllib.parse.parse_qs(urllib.parse.urlparse(playlist_url).query)
+    if 'list' in query_params:
+        return query_params['list'][0]
+    return _normalize_playlist_url(playlist_url)
+
+def get_playlist_info(playlist_url: str, use_cookies: bool, use_pot: bool, refresh: bool = False, cache_ttl: int = PLAYLIST_CACHE_TTL) -> Optional[Dict[str, Any]]:
+    """獲取播放清單的資訊，但不下載影片。快取未過期時直接使用本機快取，refresh=True 則強制重新解析。"""
+
+    playlist_url = _normalize_playlist_url(playlist_url)
+    cache_key = _playlist_cache_key(playlist_url)
+    cache = PlaylistCache() if cache_ttl > 0 else None
+    if cache and not refresh:
+        try:
+            cached_info = cache.get(cache_key, cache_ttl)
+        except sqlite3.Error as e:
+            print(f"讀取播放清單快取失敗: {e}")
+            cached_info = None
+        if cached_info:
+            print(f"使用快取的播放清單資訊: {playlist_url} ({len(cached_info['entries'])} 個項目)")
+            return cached_info
 
     ydl_opts = {
         'extract_flat': 'in_playlist',  # 將 True 改為 'in_playlist'，這對解析長清單更有效
@@ -46,19 +249,126 @@ def get_playlist_info(playlist_url: str, use_cookies: bool, use_pot: bool) -> Op
         # 移除原先硬性限制的 'playlist_items' 與 'extractor_args'，讓 yt-dlp 自動處理分頁與抓取全部
     }
 
-    if not use_pot:
+    if not _pot_enabled(use_pot):
         ydl_opts['nop_plugins'] = True
 
     try:
         print(f"正在解析播放清單網址: {playlist_url}") # 幫助確認轉換後的網址
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            return ydl.extract_info(playlist_url, download=False)
+            METADATA_REQUESTS.count('playlist')
+            info = ydl.extract_info(playlist_url, download=False)
     except Exception as e:
         print(f"解析播放清單失敗: {e}")
         if use_pot:
             print(f"[提示] 如果 PotProvider 伺服器未運行，請禁用「使用 PotProvider」選項")
         return None
-    
+
+    if cache and info and info.get('entries') is not None:
+        try:
+            cache.put(cache_key, info)
+        except sqlite3.Error as e:
+            print(f"寫入播放清單快取失敗: {e}")
+    return info
+
+def _pending_entries(entries: List[Optional[Dict[str, Any]]], output_path: str, cache: PlaylistCache) -> List[Optional[Dict[str, Any]]]:
+    """Replaces entries already in the output directory's archive, or known to fail for good, with gaps, keeping playlist indices."""
+    archive = get_download_archive(output_path)
+    try:
+        failed_ids = cache.failed_ids()
+    except sqlite3.Error as e:
+        print(f"讀取播放清單快取失敗: {e}")
+        failed_ids = set()
+    return [entry if entry and not archive.contains_video(entry) and entry.get('id') not in failed_ids else None for entry in entries]
+
+def sync_playlist_info(playlist_url: str, use_cookies: bool, use_pot: bool, output_path: str) -> Optional[Dict[str, Any]]:
+    """增量同步播放清單：只翻頁到上次同步時最新的影片 (同步起點) 為止。
+
+    回傳的 entries 包含新項目，以及快取中尚未記錄在 output_path 下載紀錄裡的項目
+    (先前暫時失敗或未被選取的影片)；已下載或確定無法下載 (私人、已刪除等，見 PlaylistCache.mark_failed)
+    的位置以 None 佔位，保持播放清單索引。
+    沒有同步紀錄時會先做一次完整解析。
+    """
+    playlist_url = _normalize_playlist_url(playlist_url)
+    cache_key = _playlist_cache_key(playlist_url)
+    cache = PlaylistCache()
+    known_info = cache.get(cache_key, ttl=sys.maxsize)
+    sync_state = cache.get_sync_state(cache_key)
+    if not known_info or not sync_state or not sync_state[0]:
+        return _full_sync(playlist_url, cache, cache_key, use_cookies, use_pot, output_path)
+
+    head_id, last_count = sync_state
+    ydl_opts = {
+        'extract_flat': 'in_playlist',
+        'quiet': True,
+        'ignoreconfig': True,
+        'ignoreerrors': True,
+    }
+    if not _pot_enabled(use_pot):
+        ydl_opts['nop_plugins'] = True
+
+    new_entries: List[Dict[str, Any]] = []
+    reached_head = False
+    try:
+        print(f"正在同步播放清單: {playlist_url}")
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            # process=False keeps 'entries' as a lazy generator, so continuation pages are only
+            # requested until the previous sync head shows up
+            METADATA_REQUESTS.count('playlist')
+            info = ydl.extract_info(playlist_url, download=False, process=False)
+            if not info:
+                return None
+            for entry in info.get('entries') or []:
+                if not entry:
+                    continue
+                if entry.get('id') == head_id:
+                    reached_head = True
+                    break
+                new_entries.append(entry)
+    except Exception as e:
+        print(f"同步播放清單失敗: {e}")
+        if use_pot:
+            print("[提示] 如果 PotProvider 伺服器未運行，請禁用「使用 PotProvider」選項")
+        return None
+
+    # Hidden, private and duplicate entries are counted by playlist_count on both syncs, so only
+    # growth beyond the videos found above the head means something was inserted elsewhere
+    playlist_count = info.get('playlist_count')
+    if not reached_head:
+        print("找不到上次同步的起點影片，改為完整解析")
+        return _full_sync(playlist_url, cache, cache_key, use_cookies, use_pot, output_path)
+    if playlist_count and last_count and playlist_count > last_count + len(new_entries):
+        print(f"播放清單項目數 ({last_count} -> {playlist_count}) 增加的不只開頭的新項目，改為完整解析")
+        return _full_sync(playlist_url, cache, cache_key, use_cookies, use_pot, output_path)
+
+    merged_info = {
+        'title': info.get('title') or known_info.get('title'),
+        'webpage_url': info.get('webpage_url') or known_info.get('webpage_url'),
+        'entries': new_entries + known_info['entries'],
+    }
+    try:
+        cache.put(cache_key, merged_info)
+        cache.put_sync_state(cache_key, new_entries[0].get('id') if new_entries else head_id, playlist_count or last_count)
+    except sqlite3.Error as e:
+        print(f"寫入播放清單快取失敗: {e}")
+    print(f"同步完成，找到 {len(new_entries)} 個新項目")
+    # New entries sit at the head, so list positions of the merged list are playlist indices
+    return {'id': cache_key, 'title': merged_info['title'], 'webpage_url': merged_info['webpage_url'],
+            'entries': _pending_entries(merged_info['entries'], output_path, cache)}
+
+def _full_sync(playlist_url: str, cache: PlaylistCache, cache_key: str, use_cookies: bool, use_pot: bool, output_path: str) -> Optional[Dict[str, Any]]:
+    """Walks the whole playlist and records a fresh sync head."""
+    full_info = get_playlist_info(playlist_url, use_cookies, use_pot, refresh=True)
+    if not full_info:
+        return None
+    entries = full_info.get('entries') or []
+    head_id = next((entry.get('id') for entry in entries if entry and entry.get('id')), None)
+    try:
+        cache.put_sync_state(cache_key, head_id, full_info.get('playlist_count') or len(entries))
+    except sqlite3.Error as e:
+        print(f"寫入播放清單快取失敗: {e}")
+    full_info['entries'] = _pending_entries(entries, output_path, cache)
+    return full_info
+
 def channel_info(channel_url: str):
     ydl_opts = {
         'quiet': True,
@@ -66,6 +376,7 @@ def channel_info(channel_url: str):
     }
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            METADATA_REQUESTS.count('channel')
             info = ydl.extract_info(channel_url, download=False)
             return info
     except yt_dlp.utils.DownloadError as e:
@@ -98,12 +409,752 @@ class ProgressLogger:
     def error(self, msg, **kwargs):
         if self.progress_hook: self.progress_hook({'status': 'error', 'message': msg})
 
+# --- Postprocessors ---
+
+def find_thumbnail(video_path: str) -> Optional[str]:
+    """Returns the thumbnail yt-dlp wrote next to video_path (webp, jpg or png), if any."""
+    base, _ = os.path.splitext(video_path)
+    for thumb_ext in THUMBNAIL_EXTENSIONS:
+        if os.path.exists(base + thumb_ext):
+            return base + thumb_ext
+    return None
+
+def find_sidecars(video_path: str) -> List[str]:
+    """Returns the subtitles, info JSON and description yt-dlp wrote next to video_path."""
+    base, _ = os.path.splitext(video_path)
+    return sorted(path for path in glob.glob(glob.escape(base) + '.*') if path.lower().endswith(tuple(SIDECAR_EXTENSIONS)))
+
+class FFmpegMetadataThumbnailPP(FFmpegMetadataPP):
+    """FFmpegMetadataPP 的延伸：在寫入 metadata 的同一次 ffmpeg 處理中一併嵌入縮圖，
+    讓每個影片檔只被重寫一次 (原本 metadata 與縮圖各需要完整重寫一次)。"""
+
+    @FFmpegMetadataPP._restrict_to(images=False)
+    def run(self, info):
+        thumbnail = find_thumbnail(info['filepath'])
+        if not thumbnail or info.get('ext') != 'mp4':
+            return super().run(info)
+
+        self._fixup_chapters(info)
+        filename, metadata_filename = info['filepath'], None
+        files_to_delete, options = [], []
+        if self._add_chapters and info.get('chapters'):
+            metadata_filename = replace_extension(filename, 'meta')
+            options.extend(self._get_chapter_opts(info['chapters'], metadata_filename))
+            files_to_delete.append(metadata_filename)
+        if self._add_metadata:
+            options.extend(self._get_metadata_opts(info))
+
+        input_files = [filename] + ([metadata_filename] if metadata_filename else []) + [thumbnail]
+        # The cover goes in as the second video stream, after the original video and audio
+        options.append(('-map', str(len(input_files) - 1), '-c:v:1', 'mjpeg', '-disposition:v:1', 'attached_pic'))
+
+        temp_filename = prepend_extension(filename, 'temp')
+        self.to_screen(f'Adding metadata and thumbnail to "{filename}"')
+        try:
+            self.run_ffmpeg_multiple_files(input_files, temp_filename, itertools.chain(self._options(info['ext']), *options))
+        except FFmpegPostProcessorError as e:
+            self.report_warning(f'Unable to embed thumbnail ({e}); adding metadata only')
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            return super().run(info)
+        self._delete_downloaded_files(*files_to_delete)
+        os.replace(temp_filename, filename)
+        info['__thumbnail_embedded'] = thumbnail
+        return [], info
+
+# Repo postprocessors used in place of the yt-dlp ones with the same key
+POSTPROCESSOR_OVERRIDES: Dict[str, Any] = {'FFmpegMetadata': FFmpegMetadataThumbnailPP}
+
+# --- YoutubeDL Reuse ---
+
+# Options that change for every video; everything else identifies a reusable instance
+PER_VIDEO_YDL_OPTIONS: List[str] = ['outtmpl', 'progress_hooks', 'logger', 'concurrent_fragment_downloads']
+
+class _PooledYoutubeDL:
+    """A long-lived YoutubeDL whose output template and hooks are swapped per video."""
+    def __init__(self, ydl_opts: Dict[str, Any], cookie_jar: Any = None):
+        self.logger = ProgressLogger()
+        self.progress_hook: Optional[Callable] = None
+        opts = dict(ydl_opts, logger=self.logger, progress_hooks=[self._hook])
+        self.ydl = yt_dlp.YoutubeDL(opts)
+        if cookie_jar is not None:
+            # YoutubeDL.cookiejar is a cached_property; seeding it skips re-parsing cookies.txt
+            self.ydl.__dict__['cookiejar'] = cookie_jar
+
+    def _hook(self, d):
+        if self.progress_hook: self.progress_hook(d)
+
+    def prepare(self, outtmpl: str, progress_hook: Optional[Callable], concurrent_fragments: int = 1) -> yt_dlp.YoutubeDL:
+        self.ydl.params['outtmpl']['default'] = outtmpl
+        # Downloaders read this from params when each download starts
+        self.ydl.params['concurrent_fragment_downloads'] = concurrent_fragments
+        self.progress_hook = progress_hook
+        self.logger.progress_hook = progress_hook
+        return self.ydl
+
+class YoutubeDLPool:
+    """每個工作執行緒各自保留 YoutubeDL 實例重複使用，所有實例共用同一份已解析的 cookie jar。"""
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cookie_jars: Dict[str, Any] = {}
+        self._instances: List[_PooledYoutubeDL] = []
+
+    def _cookie_jar(self, cookiefile: Optional[str]) -> Any:
+        if not cookiefile:
+            return None
+        with self._lock:
+            if cookiefile not in self._cookie_jars:
+                self._cookie_jars[cookiefile] = yt_dlp.cookies.load_cookies(cookiefile, None, None)
+            return self._cookie_jars[cookiefile]
+
+    def acquire(self, ydl_opts: Dict[str, Any]) -> yt_dlp.YoutubeDL:
+        """Returns this thread's YoutubeDL for ydl_opts, prepared for a single video."""
+        shared_opts = {key: value for key, value in ydl_opts.items() if key not in PER_VIDEO_YDL_OPTIONS}
+        key = json.dumps(shared_opts, sort_keys=True, default=repr)
+        instances = getattr(self._local, 'instances', None)
+        if instances is None:
+            instances = self._local.instances = {}
+        pooled = instances.get(key)
+        if pooled is None:
+            pooled = _PooledYoutubeDL(shared_opts, self._cookie_jar(shared_opts.get('cookiefile')))
+            instances[key] = pooled
+            with self._lock:
+                self._instances.append(pooled)
+        hooks = ydl_opts.get('progress_hooks') or []
+        progress_hook = hooks[0] if hooks else None
+        return pooled.prepare(ydl_opts['outtmpl'], progress_hook, ydl_opts.get('concurrent_fragment_downloads', 1))
+
+    def close(self) -> None:
+        """Closes every instance created by any thread (saves cookies, closes connections)."""
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for pooled in instances:
+            try:
+                pooled.ydl.close()
+            except Exception as e:
+                print(f"Error closing YoutubeDL instance: {e}")
+
+def _extract_and_download(video_url: str, ydl_opts: Dict[str, Any], ydl_pool: Optional[YoutubeDLPool] = None) -> Tuple[Dict[str, Any], str]:
+    """Downloads video_url and returns the info dict and yt-dlp's prepared filename."""
+    def download(ydl) -> Tuple[Dict[str, Any], str]:
+        info = ydl.extract_info(video_url, download=True)
+        if info is None:
+            # yt-dlp returns nothing for a video its download archive already lists
+            raise AlreadyArchived(video_url)
+        return info, ydl.prepare_filename(info)
+
+    METADATA_REQUESTS.count('video')
+    with HOST_LIMITER.slot(video_url):
+        if ydl_pool:
+            return download(ydl_pool.acquire(ydl_opts))
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            return download(ydl)
+
+def _run_postprocessors(pp_defs: List[Dict[str, Any]], info: Dict[str, Any], ydl_opts: Dict[str, Any], ydl_pool: Optional[YoutubeDLPool] = None) -> Dict[str, Any]:
+    """Runs yt-dlp postprocessor definitions on an already downloaded file."""
+    def run(ydl):
+        pp_info = info
+        for pp_def in pp_defs:
+            pp_args = {key: value for key, value in pp_def.items() if key != 'key'}
+            pp_class = POSTPROCESSOR_OVERRIDES.get(pp_def['key']) or get_postprocessor(pp_def['key'])
+            pp = pp_class(ydl, **pp_args)
+            pp_info = ydl.run_pp(pp, pp_info)
+        return pp_info
+    if ydl_pool:
+        return run(ydl_pool.acquire(ydl_opts))
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return run(ydl)
+
+# --- Metadata Requests ---
+
+class MetadataRequestCounter:
+    """計算對網站發出的中繼資料請求 (extract_info) 次數，依種類 (playlist / video / channel / live) 分開統計。"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+
+    def count(self, kind: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[kind] = self._counts.get(kind, 0) + amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def since(self, snapshot: Dict[str, int]) -> Dict[str, int]:
+        """Requests made after snapshot was taken, by kind."""
+        current = self.snapshot()
+        return {kind: current[kind] - snapshot.get(kind, 0) for kind in current if current[kind] != snapshot.get(kind, 0)}
+
+    @staticmethod
+    def format(counts: Dict[str, int]) -> str:
+        detail = ', '.join(f'{kind} {amount}' for kind, amount in sorted(counts.items()))
+        return f'Metadata requests: {sum(counts.values())}' + (f' ({detail})' if detail else '')
+
+METADATA_REQUESTS = MetadataRequestCounter()
+
+# --- PotProvider Health ---
+
+class PotProviderHealth:
+    """PotProvider 伺服器的健康檢查與斷路器：服務中斷期間所有工作直接使用無插件模式，恢復後自動切回。"""
+    def __init__(self, url: str = POT_PROVIDER_URL, interval: float = POT_PROBE_INTERVAL):
+        self.url = url
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._up: Optional[bool] = None  # None until the first probe
+        self._checked_at = 0.0
+
+    def _reachable(self) -> bool:
+        try:
+            with urllib.request.urlopen(f"{self.url}/ping", timeout=POT_PROBE_TIMEOUT):
+                return True
+        except urllib.error.HTTPError:
+            return True  # the server answered, just not on this path
+        except (urllib.error.URLError, OSError):
+            return False
+
+    def _set(self, up: bool, progress_hook: Optional[Callable], reason: str = "") -> None:
+        # Caller holds self._lock; only state changes are reported, once for all workers
+        changed = up != self._up
+        self._up, self._checked_at = up, time.monotonic()
+        if not changed or not progress_hook: return
+        if up:
+            progress_hook({'status': 'info', 'message': f'PotProvider 伺服器可用 ({self.url})'})
+        else:
+            progress_hook({'status': 'warning', 'message': f'PotProvider 伺服器未運行或無法連線{reason}。將使用普通模式繼續下載，每 {self.interval:.0f} 秒重新檢查。'})
+            progress_hook({'status': 'warning', 'message': '如需使用 PotProvider，請啟動本地伺服器：python -m http.server 4416'})
+
+    def probe(self, progress_hook: Optional[Callable] = None) -> bool:
+        """Checks the provider now."""
+        up = self._reachable()
+        with self._lock:
+            self._set(up, progress_hook)
+        return up
+
+    def available(self, progress_hook: Optional[Callable] = None) -> bool:
+        """The last known state, re-probed when it is older than the interval. Only one caller probes at a time;
+        the others get the last known state, assumed up until the first probe has finished."""
+        if not self._lock.acquire(blocking=False):
+            return self._up is not False
+        try:
+            if self._up is not None and time.monotonic() - self._checked_at < self.interval:
+                return self._up
+            self._set(self._reachable(), progress_hook)
+            return self._up
+        finally:
+            self._lock.release()
+
+    def report_failure(self, progress_hook: Optional[Callable] = None) -> None:
+        """Opens the circuit after a worker hit a provider error; the next probe decides when it closes."""
+        with self._lock:
+            self._set(False, progress_hook, "（下載時連線失敗）")
+
+# Shared by every download in this process
+POT_PROVIDER = PotProviderHealth()
+
+def _pot_enabled(use_pot: bool, progress_hook: Optional[Callable] = None) -> bool:
+    """use_pot, unless the provider circuit is open."""
+    return use_pot and POT_PROVIDER.available(progress_hook)
+
+# --- Bandwidth Control ---
+
+class BandwidthLimiter:
+    """全域 token bucket：所有下載工作共用同一個頻寬上限，可在執行中調整。"""
+    def __init__(self, rate: float = 0):
+        self._lock = threading.Lock()
+        self._rate = 0.0
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._last_seen: Dict[str, int] = {}
+        self._window: deque = deque()
+        self.total_bytes = 0
+        self.throttled_seconds = 0.0
+        self.set_rate(rate)
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def set_rate(self, rate: float) -> None:
+        """Bytes per second; 0 means unlimited."""
+        with self._lock:
+            self._rate = max(0.0, float(rate or 0))
+            # Start with a full bucket of BANDWIDTH_BURST_SECONDS worth of bytes
+            self._tokens = self._rate * BANDWIDTH_BURST_SECONDS
+            self._updated = time.monotonic()
+
+    def consume(self, nbytes: int) -> None:
+        """Takes nbytes out of the bucket, sleeping the calling worker while the bucket is in debt."""
+        if nbytes <= 0: return
+        with self._lock:
+            now = time.monotonic()
+            self.total_bytes += nbytes
+            self._window.append((now, nbytes))
+            while self._window and self._window[0][0] < now - BANDWIDTH_WINDOW_SECONDS:
+                self._window.popleft()
+            if self._rate <= 0:
+                return
+            self._tokens = min(self._rate * BANDWIDTH_BURST_SECONDS, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            self._tokens -= nbytes
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+            self.throttled_seconds += wait
+        if wait > 0:
+            time.sleep(wait)
+
+    def throttle(self, d: Dict[str, Any]) -> None:
+        """yt-dlp progress hook: charges the bytes received since the previous event of the same download."""
+        key = d.get('tmpfilename') or d.get('filename')
+        if not key: return
+        if d.get('status') != 'downloading':
+            with self._lock:
+                self._last_seen.pop(key, None)
+            return
+        downloaded = d.get('downloaded_bytes') or 0
+        with self._lock:
+            delta = downloaded - self._last_seen.get(key, 0)
+            self._last_seen[key] = downloaded
+        self.consume(delta)
+
+    def achieved_rate(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            recent = sum(nbytes for stamp, nbytes in self._window if stamp >= now - BANDWIDTH_WINDOW_SECONDS)
+        return recent / BANDWIDTH_WINDOW_SECONDS
+
+    def report(self) -> str:
+        allowed = f'{self._rate / 2**20:.2f} MiB/s' if self._rate > 0 else 'unlimited'
+        return f'{self.achieved_rate() / 2**20:.2f} MiB/s of {allowed} (throttled {self.throttled_seconds:.0f}s, {self.total_bytes / 2**20:.0f} MiB total)'
+
+class HostConcurrencyLimiter:
+    """限制同一主機同時進行的下載數，上限可在執行中調整 (0 表示不限)。"""
+    def __init__(self, limit: int = 0):
+        self._cond = threading.Condition()
+        self._limit = max(0, limit)
+        self._active: Dict[str, int] = {}
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def set_limit(self, limit: int) -> None:
+        with self._cond:
+            self._limit = max(0, int(limit or 0))
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, url: str):
+        host = urllib.parse.urlparse(url).hostname or ''
+        # youtu.be, m.youtube.com and www.youtube.com are one service
+        host = re.sub(r'^(www|m|music)\.', '', host).replace('youtu.be', 'youtube.com')
+        with self._cond:
+            while self._limit > 0 and self._active.get(host, 0) >= self._limit:
+                self._cond.wait()
+            self._active[host] = self._active.get(host, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active[host] -= 1
+                self._cond.notify_all()
+
+    def active(self) -> Dict[str, int]:
+        with self._cond:
+            return {host: count for host, count in self._active.items() if count}
+
+# Shared by every download in this process; the GUI and CLI adjust them while jobs run
+BANDWIDTH_LIMITER = BandwidthLimiter()
+HOST_LIMITER = HostConcurrencyLimiter()
+
+def set_bandwidth_limits(rate_bytes: Optional[float] = None, per_host: Optional[int] = None) -> None:
+    if rate_bytes is not None: BANDWIDTH_LIMITER.set_rate(rate_bytes)
+    if per_host is not None: HOST_LIMITER.set_limit(per_host)
+
+def bandwidth_report() -> str:
+    per_host = HOST_LIMITER.limit or 'unlimited'
+    return f'Bandwidth {BANDWIDTH_LIMITER.report()}, per-host limit {per_host}, active {HOST_LIMITER.active() or 0}'
+
+# --- Job Progress ---
+
+class ProgressTracker:
+    """整個工作的下載進度：各項目與總位元組、移動平均吞吐量、預估剩餘時間，以及執行中/排隊/完成/失敗的數量。
+
+    yt-dlp 的 progress hook 在任何工作執行緒呼叫 observe()，介面與 CLI 以 snapshot() 讀取。
+    """
+    def __init__(self, window: float = PROGRESS_RATE_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Starts a new job."""
+        with self._lock:
+            self._states: Dict[str, str] = {}  # item key -> queued | active | done | failed
+            self._files: Dict[str, Dict[str, Tuple[int, int]]] = {}  # item key -> file -> (downloaded, total)
+            self._samples: deque = deque()  # (time, downloaded bytes of the job)
+            self._downloaded = 0
+            self._started_at = time.monotonic()
+            self.version = 0
+
+    @staticmethod
+    def key_of(video: Dict[str, Any]) -> str:
+        return video.get('id') or video['url']
+
+    def queue(self, videos: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            for video in videos:
+                self._states[self.key_of(video)] = 'queued'
+            self.version += 1
+
+    def set_state(self, video: Dict[str, Any], state: str) -> None:
+        with self._lock:
+            self._states[self.key_of(video)] = state
+            self.version += 1
+
+    def finish_active(self, state: str) -> None:
+        """Marks every active item done or failed (for callers that never learn the item's ID)."""
+        with self._lock:
+            for key, current in self._states.items():
+                if current == 'active':
+                    self._states[key] = state
+            self.version += 1
+
+    def observe(self, d: Dict[str, Any]) -> None:
+        """Feeds one yt-dlp progress dict ('downloading' / 'finished' of a file)."""
+        if d.get('status') not in ('downloading', 'finished'):
+            return
+        info = d.get('info_dict') or {}
+        key = info.get('id') or info.get('webpage_url')
+        filename = d.get('tmpfilename') or d.get('filename')
+        if not key or not filename:
+            return
+        downloaded = d.get('downloaded_bytes') or 0
+        total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+        if d['status'] == 'finished':
+            downloaded = total = max(downloaded, total)
+        now = time.monotonic()
+        with self._lock:
+            files = self._files.setdefault(key, {})
+            previous, _ = files.get(filename, (0, 0))
+            files[filename] = (downloaded, max(total, downloaded))
+            # A restarted file (retry without .part) resets its count; the job total only moves forward
+            self._downloaded += max(0, downloaded - previous)
+            if self._states.get(key) in (None, 'queued'):
+                self._states[key] = 'active'
+            if not self._samples or now - self._samples[-1][0] >= 0.5:
+                self._samples.append((now, self._downloaded))
+                while len(self._samples) > 2 and now - self._samples[0][0] > self.window:
+                    self._samples.popleft()
+            self.version += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counts, bytes, moving-average throughput (bytes/s) and ETA (seconds, None while unknown)."""
+        now = time.monotonic()
+        with self._lock:
+            counts = {state: 0 for state in ('queued', 'active', 'done', 'failed')}
+            for state in self._states.values():
+                counts[state] += 1
+            items = len(self._states)
+            sized = [sum(total for _, total in files.values()) for files in self._files.values() if files]
+            known_total = sum(sized)
+            fetched = sum(downloaded for files in self._files.values() for downloaded, _ in files.values())
+            samples = [sample for sample in self._samples if now - sample[0] <= self.window] or list(self._samples)[-1:]
+            downloaded = self._downloaded
+        # The newest sample may be old when every transfer is stalled; measure up to now so the rate falls to 0
+        rate = (downloaded - samples[0][1]) / (now - samples[0][0]) if samples and now - samples[0][0] >= 1 else 0.0
+        # Items that have not reported sizes yet are assumed to be as large as the average item seen so far
+        average = known_total / len(sized) if sized else 0
+        total_bytes = known_total + average * counts['queued']
+        remaining = max(0.0, total_bytes - fetched)
+        return dict(counts, items=items, downloaded_bytes=downloaded, total_bytes=int(total_bytes), rate=rate,
+                    eta=remaining / rate if rate > 0 and (counts['active'] or counts['queued']) else None,
+                    elapsed=now - self._started_at)
+
+    def format(self) -> str:
+        snap = self.snapshot()
+        eta = time.strftime('%H:%M:%S', time.gmtime(snap['eta'])) if snap['eta'] is not None else '--:--:--'
+        return (f"{snap['done']}/{snap['items']} done, {snap['active']} active, {snap['queued']} queued, {snap['failed']} failed | "
+                f"{snap['downloaded_bytes'] / 2**30:.2f}/{snap['total_bytes'] / 2**30:.2f} GiB | {snap['rate'] / 2**20:.2f} MiB/s | ETA {eta}")
+
+JOB_PROGRESS = ProgressTracker()
+
+# --- Metrics Export ---
+
+# Progress statuses grouped into the pipeline stage they belong to
+EVENT_STAGES: Dict[str, str] = {'downloading': 'network', 'finished': 'network', 'postprocessing': 'postprocess', 'finished_video': 'done',
+                                'error': 'error', 'item_failed': 'error', 'warning': 'job', 'info': 'job', 'all_finished': 'job'}
+
+def _event_video_id(d: Dict[str, Any]) -> Optional[str]:
+    info = d.get('info_dict') or {}
+    return d.get('video_id') or info.get('id')
+
+class EventSink:
+    """把進度事件寫成 JSON lines (時間、影片 ID、階段、位元組、耗時、錯誤類型)，供無人值守的伺服器解析。"""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+        self._last_progress: Dict[str, float] = {}  # file -> when its last 'downloading' record was written
+
+    def write(self, d: Dict[str, Any]) -> None:
+        status = d.get('status')
+        now = time.time()
+        if status == 'downloading':
+            # yt-dlp reports many times a second per file; keep one record per file per interval
+            name = d.get('tmpfilename') or d.get('filename') or ''
+            with self._lock:
+                if now - self._last_progress.get(name, 0) < EVENT_PROGRESS_INTERVAL:
+                    return
+                self._last_progress[name] = now
+        record: Dict[str, Any] = {'ts': datetime.fromtimestamp(now).astimezone().isoformat(timespec='milliseconds'), 'time': round(now, 3),
+                                  'status': status, 'stage': EVENT_STAGES.get(status, 'job')}
+        video_id = _event_video_id(d)
+        if video_id: record['video_id'] = video_id
+        if d.get('video_url'): record['video_url'] = d['video_url']
+        if d.get('message') is not None: record['message'] = str(d['message'])
+        if status in ('downloading', 'finished'):
+            record['file'] = os.path.basename(d.get('filename') or d.get('tmpfilename') or '')
+            for key in ('downloaded_bytes', 'total_bytes', 'total_bytes_estimate', 'speed', 'eta', 'elapsed'):
+                if d.get(key) is not None: record[key] = d[key]
+        if d.get('postprocess_seconds') is not None: record['postprocess_seconds'] = round(d['postprocess_seconds'], 3)
+        if status == 'error': record['error_class'] = classify_error(str(d.get('message') or ''))
+        if status == 'item_failed': record['error_class'] = d.get('error_class')
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            if status == 'finished':
+                self._last_progress.pop(d.get('tmpfilename') or d.get('filename') or '', None)
+            if self._file is None:
+                return  # closed at job end; a late event from a background thread is dropped
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+class Histogram:
+    def __init__(self, buckets: List[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def render(self, name: str) -> List[str]:
+        lines = [f'{name}_bucket{{le="{bound:g}"}} {count}' for bound, count in zip(self.buckets, self.counts)]
+        return lines + [f'{name}_bucket{{le="+Inf"}} {self.count}', f'{name}_sum {self.sum:g}', f'{name}_count {self.count}']
+
+class MetricsRegistry:
+    """由進度事件累積的計數器與直方圖，加上讀取當下的佇列、吞吐量與停滯時間，以 Prometheus 文字格式輸出。"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.events: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}  # error class -> failed attempts
+        self.videos_finished = 0
+        self.bytes_downloaded = 0
+        self.download_seconds = Histogram(METRICS_SECONDS_BUCKETS)
+        self.postprocess_seconds = Histogram(METRICS_SECONDS_BUCKETS)
+        self.file_throughput = Histogram(METRICS_THROUGHPUT_BUCKETS)
+        self.last_progress_at = time.time()
+
+    def observe(self, d: Dict[str, Any]) -> None:
+        status = d.get('status') or 'unknown'
+        with self._lock:
+            self.events[status] = self.events.get(status, 0) + 1
+            if status in ('downloading', 'finished', 'finished_video'):
+                self.last_progress_at = time.time()
+            if status == 'finished':
+                size = d.get('total_bytes') or d.get('downloaded_bytes') or 0
+                self.bytes_downloaded += size
+                elapsed = d.get('elapsed')
+                if elapsed:
+                    self.download_seconds.observe(elapsed)
+                    self.file_throughput.observe(size / 2**20 / elapsed)
+            elif status == 'finished_video':
+                self.videos_finished += 1
+                if d.get('postprocess_seconds') is not None:
+                    self.postprocess_seconds.observe(d['postprocess_seconds'])
+            elif status == 'item_failed':
+                # One per failed attempt; a failure also logs several 'error' messages, counted only in events_total
+                error_class = d.get('error_class') or 'network'
+                self.errors[error_class] = self.errors.get(error_class, 0) + 1
+
+    def observing(self, progress_hook: Optional[Callable], sink: Optional[EventSink] = None) -> Callable:
+        """Wraps a job's progress_hook so every event is counted (and written to sink)."""
+        def hook(d: Dict[str, Any]) -> None:
+            self.observe(d)
+            if sink: sink.write(d)
+            if progress_hook: progress_hook(d)
+        return hook
+
+    def render(self) -> str:
+        progress = JOB_PROGRESS.snapshot()
+        requests = METADATA_REQUESTS.snapshot()
+        with self._lock:
+            lines = ['# TYPE ytpd_events_total counter']
+            lines += [f'ytpd_events_total{{status="{status}"}} {count}' for status, count in sorted(self.events.items())]
+            lines += ['# TYPE ytpd_errors_total counter']
+            lines += [f'ytpd_errors_total{{class="{error_class}"}} {count}' for error_class, count in sorted(self.errors.items())]
+            lines += ['# TYPE ytpd_videos_finished_total counter', f'ytpd_videos_finished_total {self.videos_finished}',
+                      '# TYPE ytpd_downloaded_bytes_total counter', f'ytpd_downloaded_bytes_total {self.bytes_downloaded}',
+                      '# TYPE ytpd_seconds_since_progress gauge', f'ytpd_seconds_since_progress {time.time() - self.last_progress_at:.1f}']
+            lines += ['# TYPE ytpd_file_download_seconds histogram'] + self.download_seconds.render('ytpd_file_download_seconds')
+            lines += ['# TYPE ytpd_postprocess_seconds histogram'] + self.postprocess_seconds.render('ytpd_postprocess_seconds')
+            lines += ['# TYPE ytpd_file_throughput_mib histogram'] + self.file_throughput.render('ytpd_file_throughput_mib')
+        lines += ['# TYPE ytpd_job_items gauge']
+        lines += [f'ytpd_job_items{{state="{state}"}} {progress[state]}' for state in ('queued', 'active', 'done', 'failed')]
+        lines += ['# TYPE ytpd_job_throughput_bytes gauge', f'ytpd_job_throughput_bytes {progress["rate"]:.0f}',
+                  '# TYPE ytpd_job_eta_seconds gauge', f'ytpd_job_eta_seconds {progress["eta"] if progress["eta"] is not None else -1:.0f}',
+                  '# TYPE ytpd_bandwidth_bytes gauge', f'ytpd_bandwidth_bytes {BANDWIDTH_LIMITER.achieved_rate():.0f}',
+                  '# TYPE ytpd_metadata_requests_total counter']
+        lines += [f'ytpd_metadata_requests_total{{kind="{kind}"}} {count}' for kind, count in sorted(requests.items())]
+        return '\n'.join(lines) + '\n'
+
+METRICS = MetricsRegistry()
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> http.server.ThreadingHTTPServer:
+    """Serves METRICS at http://host:port/metrics from a daemon thread."""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = METRICS.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+# --- Download Archive ---
+
+class DownloadArchive:
+    """downloaded.txt 只讀取一次到記憶體集合，之後由單一加鎖的寫入器附加，所有工作共用。
+
+    yt-dlp accepts any set-like object as download_archive: it checks membership and calls add()
+    itself, so handing it this object replaces its per-instance reload and locked re-open per video.
+    yt-dlp adds a video as soon as it is downloaded, before our deferred postprocessors run, so add()
+    only reserves the ID in memory and postprocess_video writes the line with commit() once it succeeded.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ids: set = set()
+        self._pending: set = set()  # added by yt-dlp, not yet written
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._ids.update(line.strip() for line in f if line.strip())
+        except FileNotFoundError:
+            pass
+        self._file = None
+
+    def __contains__(self, archive_id: str) -> bool:
+        return archive_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __repr__(self) -> str:
+        # Part of the YoutubeDLPool key, so it must be stable for the same file
+        return f'DownloadArchive({self.path!r})'
+
+    def add(self, archive_id: str) -> None:
+        with self._lock:
+            if archive_id not in self._ids:
+                self._ids.add(archive_id)
+                self._pending.add(archive_id)
+
+    def commit(self, archive_id: str) -> None:
+        """Writes a downloaded and postprocessed video to downloaded.txt."""
+        with self._lock:
+            if archive_id in self._ids and archive_id not in self._pending:
+                return
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            # One write per line in append mode, so other processes appending to the same file do not interleave
+            self._file.write(archive_id + '\n')
+            self._file.flush()
+            self._ids.add(archive_id)
+            self._pending.discard(archive_id)
+
+    def release(self, archive_id: str) -> None:
+        """Drops an ID yt-dlp added but that was never committed (its postprocessing failed)."""
+        with self._lock:
+            if archive_id in self._pending:
+                self._pending.discard(archive_id)
+                self._ids.discard(archive_id)
+
+    def discard(self, video: Dict[str, Any]) -> None:
+        """Forgets a queue item in memory only, so yt-dlp processes it again (used when resuming a job)."""
+        archive_id = _archive_id_for(video)
+        with self._lock:
+            self._ids.discard(archive_id)
+            self._pending.discard(archive_id)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def contains_video(self, video: Dict[str, Any]) -> bool:
+        """True if a queue item is already archived; items whose archive ID is unknown before extraction count as new."""
+        archive_id = _archive_id_for(video)
+        return archive_id is not None and archive_id in self
+
+def _archive_id_for(video: Dict[str, Any]) -> Optional[str]:
+    ie_key = video.get('ie_key')
+    if not ie_key and re.search(r'(^|[/.])(youtube\.com|youtu\.be)/', video.get('url') or ''):
+        ie_key = 'Youtube'
+    if not ie_key or not video.get('id'):
+        return None
+    return make_archive_id(ie_key, video['id'])
+
+_download_archives: Dict[str, DownloadArchive] = {}
+_download_archives_lock = threading.Lock()
+
+def get_download_archive(output_path: str) -> DownloadArchive:
+    """The shared archive of an output directory, loaded on first use."""
+    path = os.path.abspath(os.path.join(output_path, DOWNLOAD_ARCHIVE_FILE))
+    with _download_archives_lock:
+        if path not in _download_archives:
+            _download_archives[path] = DownloadArchive(path)
+        return _download_archives[path]
+
+def filter_archived(videos: List[Dict[str, Any]], output_path: str) -> Tuple[List[Dict[str, Any]], int]:
+    """Drops queue items already recorded in the output directory's archive; returns (remaining, skipped count)."""
+    archive = get_download_archive(output_path)
+    remaining = [video for video in videos if not archive.contains_video(video)]
+    return remaining, len(videos) - len(remaining)
+
+class AlreadyArchived(Exception):
+    """Raised by download_video when yt-dlp skipped the video because the download archive lists it."""
+
 # --- Core Download Functions ---
 
-def download_video(video_url: str, output_path: str, video_number: int, use_cookies: bool, download_format: str, use_pot: bool, progress_hook: Optional[Callable] = None, write_info_json: bool = True, live_from_start: bool = False) -> Optional[str]:
+def _build_video_opts(output_path: str, video_number: int, use_cookies: bool, download_format: str, use_pot: bool, progress_hook: Optional[Callable] = None, write_info_json: bool = True, live_from_start: bool = False, concurrent_fragments: int = 1) -> Dict[str, Any]:
     format_opts = get_format_options(download_format)
     
     def hook(d):
+        # Sleeping inside the progress hook pauses this worker's transfer, which is how the shared bucket throttles it
+        BANDWIDTH_LIMITER.throttle(d)
+        JOB_PROGRESS.observe(d)
         if progress_hook: progress_hook(d)
 
     # Build postprocessors list
@@ -125,20 +1176,70 @@ def download_video(video_url: str, output_path: str, video_number: int, use_cook
         'postprocessors': postprocessors,
         'progress_hooks': [hook],
         'logger': ProgressLogger(progress_hook),
-        'download_archive': os.path.join(output_path, 'downloaded.txt'),
+        'download_archive': get_download_archive(output_path),
         'skip_unavailable_fragments': True,  # Skip unavailable fragments robustly
+        'continuedl': True,  # Retries continue from the .part file of the failed attempt
     }
     if live_from_start:
         ydl_opts['live_from_start'] = True
+    if concurrent_fragments > 1:
+        ydl_opts['concurrent_fragment_downloads'] = concurrent_fragments
+        # YouTube serves plain HTTPS formats; "dashy" splits them into range fragments that can be fetched in parallel
+        ydl_opts['extractor_args'] = {'youtube': {'formats': ['dashy']}}
     if not use_pot:
         ydl_opts['nop_plugins'] = True
     ydl_opts.update(format_opts)
+    return ydl_opts
+
+def fetch_video(video_url: str, output_path: str, video_number: int, use_cookies: bool, download_format: str, use_pot: bool, progress_hook: Optional[Callable] = None, write_info_json: bool = True, live_from_start: bool = False, ydl_pool: Optional[YoutubeDLPool] = None, concurrent_fragments: int = 1) -> Optional[Dict[str, Any]]:
+    """網路階段：下載影片、字幕、縮圖與資訊檔 (含 yt-dlp 的合併)，後處理器延後到 postprocess_video 執行。"""
+    use_pot = _pot_enabled(use_pot, progress_hook)
+    ydl_opts = _build_video_opts(output_path, video_number, use_cookies, download_format, use_pot, progress_hook, write_info_json, live_from_start, concurrent_fragments)
+    # Postprocessors run in postprocess_video so ffmpeg work can be scheduled apart from network work
+    postprocessors = ydl_opts['postprocessors']
+    ydl_opts['postprocessors'] = []
 
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(video_url, download=True)
-            filename = ydl.prepare_filename(info)
-        
+        info, filename = _extract_and_download(video_url, ydl_opts, ydl_pool)
+    except AlreadyArchived:
+        raise
+    except Exception as e:
+        error_msg = str(e)
+        # More informative error messages
+        if use_pot and ("127.0.0.1:4416" in error_msg or "potprovider" in error_msg.lower() or "TransportError" in error_msg):
+            # Other workers skip the provider from now on; this one tries again without it
+            POT_PROVIDER.report_failure(progress_hook)
+            ydl_opts['nop_plugins'] = True
+            try:
+                info, filename = _extract_and_download(video_url, ydl_opts, ydl_pool)
+            except AlreadyArchived:
+                raise
+            except Exception as retry_e:
+                if progress_hook: progress_hook({'status': 'error', 'message': f'重試失敗: {str(retry_e)}'})
+                return None
+            return {'info': info, 'filename': filename, 'ydl_opts': ydl_opts, 'postprocessors': postprocessors, 'download_format': download_format}
+        if progress_hook: progress_hook({'status': 'error', 'message': error_msg})
+        return None
+    return {'info': info, 'filename': filename, 'ydl_opts': ydl_opts, 'postprocessors': postprocessors, 'download_format': download_format}
+
+def postprocess_video(fetched: Dict[str, Any], progress_hook: Optional[Callable] = None, ydl_pool: Optional[YoutubeDLPool] = None) -> Optional[str]:
+    """後處理階段：執行延後的 yt-dlp 後處理器 (影片的縮圖會在寫入 metadata 時一併嵌入)，回傳最終檔案路徑。"""
+    download_format = fetched['download_format']
+    filename = fetched['filename']
+    info = fetched['info']
+    started = time.monotonic()
+    # yt-dlp reserved the video in the download archive; only a finished file writes it to downloaded.txt
+    archive = fetched['ydl_opts'].get('download_archive')
+    archive_id = make_archive_id(info['extractor_key'], info['id']) if archive is not None and info.get('extractor_key') and info.get('id') else None
+    try:
+        requested = (info.get('requested_downloads') or [{}])[0]
+        pp_info: Dict[str, Any] = {}
+        # Nothing was written when yt-dlp skipped the video (e.g. already in the archive)
+        if fetched['postprocessors'] and requested.get('filepath'):
+            if progress_hook: progress_hook({'status': 'postprocessing', 'message': 'Adding metadata and thumbnail...'})
+            pp_info = _run_postprocessors(fetched['postprocessors'], {**info, **requested}, fetched['ydl_opts'], ydl_pool)
+            filename = pp_info['filepath']
+
         final_ext = ".mp3" if "Audio" in download_format else ".mp4"
         if not filename.endswith(final_ext):
              base, _ = os.path.splitext(filename)
@@ -146,149 +1247,1044 @@ def download_video(video_url: str, output_path: str, video_number: int, use_cook
 
         if not os.path.exists(filename):
             if progress_hook: progress_hook({'status': 'error', 'message': f"File {filename} not found after download."})
+            if archive_id: archive.release(archive_id)
             return None
 
         video_path = filename
-        if "Audio" not in download_format:
-            # Try to embed thumbnail into video
-            base, _ = os.path.splitext(video_path)
-            # Look for thumbnail files (webp or jpg)
-            thumbnail_file = None
-            for thumb_ext in ['.webp', '.jpg', '.png']:
-                potential_thumb = base + thumb_ext
-                if os.path.exists(potential_thumb):
-                    thumbnail_file = potential_thumb
-                    break
-            
-            if thumbnail_file:
-                if progress_hook: progress_hook({'status': 'postprocessing', 'message': 'Embedding thumbnail into video...'})
-                if embed_thumbnail_to_video(video_path, thumbnail_file):
-                    if progress_hook: progress_hook({'status': 'postprocessing', 'message': 'Thumbnail embedded successfully'})
-                else:
-                    if progress_hook: progress_hook({'status': 'info', 'message': f'Thumbnail file preserved: {os.path.basename(thumbnail_file)}'})
+        if archive_id: archive.commit(archive_id)
+        if "Audio" not in download_format and pp_info:
+            thumbnail_file = find_thumbnail(video_path)
+            if pp_info.get('__thumbnail_embedded'):
+                if progress_hook: progress_hook({'status': 'postprocessing', 'message': 'Thumbnail embedded successfully'})
+            elif thumbnail_file:
+                if progress_hook: progress_hook({'status': 'info', 'message': f'Thumbnail file preserved: {os.path.basename(thumbnail_file)}'})
         
-        if progress_hook: progress_hook({'status': 'finished_video', 'message': f"Finished: {os.path.basename(video_path)}"})
+        if progress_hook: progress_hook({'status': 'finished_video', 'message': f"Finished: {os.path.basename(video_path)}", 'video_id': info.get('id'),
+                                         'postprocess_seconds': time.monotonic() - started})
         return video_path
 
     except Exception as e:
-        error_msg = str(e)
-        # More informative error messages
-        if "127.0.0.1:4416" in error_msg or "PotProvider" in error_msg.lower() or "TransportError" in error_msg:
-            if progress_hook: 
-                progress_hook({'status': 'warning', 'message': 'PotProvider 伺服器未運行或無法連線。將使用普通模式繼續下載。'})
-                progress_hook({'status': 'warning', 'message': '如需使用 PotProvider，請啟動本地伺服器：python -m http.server 4416'})
-            # Try again without PotProvider
-            if use_pot:
-                ydl_opts['nop_plugins'] = True
-                try:
-                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                        info = ydl.extract_info(video_url, download=True)
-                        filename = ydl.prepare_filename(info)
-                    final_ext = ".mp3" if "Audio" in download_format else ".mp4"
-                    if not filename.endswith(final_ext):
-                         base, _ = os.path.splitext(filename)
-                         filename = base + final_ext
-                    if os.path.exists(filename):
-                        if progress_hook: progress_hook({'status': 'finished_video', 'message': f"Finished (without PotProvider): {os.path.basename(filename)}"})
-                        return filename
-                except Exception as retry_e:
-                    if progress_hook: progress_hook({'status': 'error', 'message': f'重試失敗: {str(retry_e)}'})
-                    return None
-        if progress_hook: progress_hook({'status': 'error', 'message': error_msg})
+        if progress_hook: progress_hook({'status': 'error', 'message': str(e)})
+        if archive_id: archive.release(archive_id)
         return None
 
-def download_playlist(videos_to_download: List[Dict[str, Any]], output_path: str, use_cookies: bool, max_workers: int, zip_files: bool, download_format: str, use_pot: bool, progress_hook: Optional[Callable] = None, playlist_title_override: Optional[str] = None, write_info_json: bool = True) -> None:
+def download_video(video_url: str, output_path: str, video_number: int, use_cookies: bool, download_format: str, use_pot: bool, progress_hook: Optional[Callable] = None, write_info_json: bool = True, live_from_start: bool = False, ydl_pool: Optional[YoutubeDLPool] = None, concurrent_fragments: int = 1) -> Optional[str]:
+    fetched = fetch_video(video_url, output_path, video_number, use_cookies, download_format, use_pot, progress_hook, write_info_json, live_from_start, ydl_pool, concurrent_fragments)
+    if not fetched:
+        return None
+    return postprocess_video(fetched, progress_hook, ydl_pool)
+
+# --- Scheduling ---
+
+def playlist_title_of(info: Dict[str, Any], default: str = 'playlist') -> str:
+    """File name prefix for a playlist's archives and job journal, taken from the analysis result."""
+    return sanitize_filename(info.get('title') or default)
+
+def video_from_entry(entry: Dict[str, Any], playlist_index: int, default_title: str = 'Unknown') -> Dict[str, Any]:
+    """Builds a download queue item from a flat playlist entry, keeping the fields the scheduler uses."""
+    return {
+        'url': entry['url'],
+        'title': entry.get('title', default_title),
+        'playlist_index': playlist_index,
+        'id': entry.get('id'),
+        'ie_key': entry.get('ie_key'),
+        'duration': entry.get('duration'),
+        'upload_date': entry.get('upload_date'),
+        'timestamp': entry.get('timestamp'),
+    }
+
+def parse_index_list(text: str) -> List[int]:
+    """Parses playlist indices like "1,3-5" into [1, 3, 4, 5]."""
+    indices: List[int] = []
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        start, _, end = part.partition('-')
+        indices.extend(range(int(start), int(end or start) + 1))
+    return indices
+
+def parse_priority_tags(text: str) -> Dict[int, int]:
+    """Parses "3-5:10,7:1" into {playlist_index: priority}; higher priorities download first."""
+    priorities: Dict[int, int] = {}
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        indices, _, priority = part.rpartition(':')
+        for index in parse_index_list(indices):
+            priorities[index] = int(priority)
+    return priorities
+
+def schedule_videos(videos: List[Dict[str, Any]], policy: str = "playlist", pinned: Optional[List[int]] = None,
+                    priorities: Optional[Dict[int, int]] = None) -> List[Dict[str, Any]]:
+    """依排程策略排序下載佇列。pinned 中的播放清單索引依給定順序排在最前面，其餘項目依 policy 排序。
+
+    Items without the field a policy needs (e.g. no duration for "shortest") go after the ones that have it.
+    Ties keep playlist order.
+    """
+    def sort_key(video: Dict[str, Any]):
+        if policy == "shortest":
+            duration = video.get('duration')
+            return (duration is None, duration or 0)
+        if policy == "newest":
+            # upload_date is YYYYMMDD; flat entries often only carry a timestamp
+            date = video.get('upload_date') or (time.strftime('%Y%m%d', time.gmtime(video['timestamp'])) if video.get('timestamp') else None)
+            return (date is None, -int(date or 0))
+        if policy == "priority":
+            return (-(priorities or {}).get(video['playlist_index'], video.get('priority', 0)),)
+        return ()
+
+    pin_order = {index: position for position, index in enumerate(pinned or [])}
+    pinned_videos = sorted((v for v in videos if v['playlist_index'] in pin_order), key=lambda v: pin_order[v['playlist_index']])
+    others = sorted((v for v in videos if v['playlist_index'] not in pin_order), key=lambda v: (*sort_key(v), v['playlist_index']))
+    return pinned_videos + others
+
+class CompletionTracker:
+    """記錄每個項目完成的時間點，用來比較不同排程策略的 time-to-first-N。"""
+    def __init__(self, total: int):
+        self.total = total
+        self._started_at = time.monotonic()
+        self._times: List[float] = []
+        self._lock = threading.Lock()
+
+    def mark(self) -> None:
+        with self._lock:
+            self._times.append(time.monotonic() - self._started_at)
+
+    def time_to(self, count: int) -> Optional[float]:
+        """Seconds until `count` items had completed, or None if fewer did."""
+        with self._lock:
+            return self._times[count - 1] if 0 < count <= len(self._times) else None
+
+    def report(self) -> str:
+        milestones = sorted({1, 10, (self.total + 1) // 2, self.total} - {0})
+        parts = []
+        for count in milestones:
+            elapsed = self.time_to(count)
+            if elapsed is not None:
+                parts.append(f'first {count}: {elapsed:.1f}s')
+        return ', '.join(parts) or 'no items completed'
+
+class FragmentPlanner:
+    """在全域連線預算內，依剩餘佇列與預估大小決定每部影片的分段並行下載數 (concurrent_fragment_downloads)。"""
+    def __init__(self, videos: List[Dict[str, Any]], max_workers: int, connection_budget: int = FRAGMENT_CONNECTION_BUDGET,
+                 workers: Optional[Callable[[], int]] = None):
+        """workers: how many videos may run right now, read on every acquire (an auto-tuned limit); max_workers by default."""
+        self.max_workers = max(1, max_workers)
+        self.workers = workers or (lambda: self.max_workers)
+        # Every running video holds at least one connection
+        self.budget = max(self.max_workers, connection_budget) if connection_budget > 0 else 0
+        self._lock = threading.Lock()
+        # Not started yet, in dispatch order; keyed by id() since entries are plain dicts
+        self._queued: Dict[int, float] = {id(video): self.estimate(video) for video in videos}
+        self._active: Dict[int, Tuple[float, int]] = {}
+
+    @staticmethod
+    def estimate(video: Dict[str, Any]) -> float:
+        """Relative size of a video; duration is the best proxy available before extraction."""
+        return float(video.get('duration') or FRAGMENT_DEFAULT_DURATION)
+
+    def acquire(self, video: Dict[str, Any]) -> int:
+        """Marks video as started and returns how many fragments it may fetch in parallel."""
+        with self._lock:
+            size = self._queued.pop(id(video), None) or self.estimate(video)
+            connections = 1
+            if self.budget and size >= FRAGMENT_MIN_DURATION:
+                # Work that runs alongside this video: what is running now plus what idle workers start next
+                idle = max(0, min(self.workers(), self.max_workers) - len(self._active) - 1)
+                upcoming = list(itertools.islice(self._queued.values(), idle))
+                concurrent_work = size + sum(active_size for active_size, _ in self._active.values()) + sum(upcoming)
+                reserved = sum(held for _, held in self._active.values()) + len(upcoming)
+                share = round(self.budget * size / concurrent_work)
+                connections = max(1, min(share, self.budget - reserved, MAX_CONCURRENT_FRAGMENTS))
+            self._active[id(video)] = (size, connections)
+            return connections
+
+    def queue(self, videos: List[Dict[str, Any]]) -> None:
+        """Adds videos that joined the job after it started, behind those already queued."""
+        with self._lock:
+            for video in videos:
+                self._queued[id(video)] = self.estimate(video)
+
+    def release(self, video: Dict[str, Any]) -> None:
+        with self._lock:
+            self._active.pop(id(video), None)
+
+    @contextmanager
+    def lease(self, video: Dict[str, Any]):
+        connections = self.acquire(video)
+        try:
+            yield connections
+        finally:
+            self.release(video)
+
+class WorkerGate:
+    """限制同時下載的影片數；ConcurrencyController 在執行中調整這個上限。"""
+    def __init__(self, limit: int, max_workers: Optional[int] = None):
+        self.max_workers = max(1, max_workers or limit)
+        self.limit = min(max(1, limit), self.max_workers)
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+
+    @contextmanager
+    def slot(self):
+        """Holds one of the currently allowed worker slots while a video downloads."""
+        with self._cond:
+            self._waiting += 1
+            while self._active >= self.limit:
+                self._cond.wait()
+            self._waiting -= 1
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def close(self) -> None:
+        pass
+
+class ConcurrencyController(WorkerGate):
+    """AIMD 自動調整同時下載數：吞吐量持續增加時加一個工作，遇到 429 或錯誤率過高時減半，每次決策都會記錄。"""
+    def __init__(self, initial: int, max_workers: int = AUTO_TUNE_MAX_WORKERS, progress_hook: Optional[Callable] = None, interval: float = AUTO_TUNE_INTERVAL):
+        super().__init__(initial, max_workers)
+        self.progress_hook = progress_hook
+        self.interval = interval
+        self.decisions: List[Tuple[float, int, int, str]] = []  # (time, old, new, reason)
+        self._errors = 0
+        self._throttled = 0
+        self._completed = 0
+        self._last_bytes = BANDWIDTH_LIMITER.total_bytes
+        self._last_time = time.monotonic()
+        self._last_throughput = 0.0
+        self._last_step = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="auto-tune", daemon=True)
+        self._thread.start()
+
+    def observing(self, progress_hook: Optional[Callable]) -> Callable:
+        """Wraps a job's progress_hook so the controller sees every failed item, throttling message and finished video."""
+        def hook(d: Dict[str, Any]) -> None:
+            self.observe(d)
+            if progress_hook: progress_hook(d)
+        return hook
+
+    def observe(self, d: Dict[str, Any]) -> None:
+        status = d.get('status')
+        if status not in ('error', 'warning', 'item_failed', 'finished_video'):
+            return
+        message = str(d.get('message') or '')
+        with self._cond:
+            # A failed video logs several errors (yt-dlp's logger and our own report); 'item_failed' comes once per attempt
+            if status == 'item_failed':
+                self._errors += 1
+            elif status == 'finished_video':
+                self._completed += 1
+            elif any(marker.lower() in message.lower() for marker in THROTTLE_MARKERS):
+                self._throttled += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.decide()
+
+    def decide(self) -> int:
+        """Takes one AIMD step from the counters gathered since the previous step."""
+        with self._cond:
+            now = time.monotonic()
+            total_bytes = BANDWIDTH_LIMITER.total_bytes
+            throughput = (total_bytes - self._last_bytes) / max(now - self._last_time, 1e-6)
+            errors, throttled, completed = self._errors, self._throttled, self._completed
+            self._errors = self._throttled = self._completed = 0
+            self._last_bytes, self._last_time = total_bytes, now
+            old = self.limit
+            attempts = errors + completed
+            if throttled:
+                new, reason = max(1, old // 2), f'{throttled} throttling responses'
+            elif attempts and errors / attempts > AUTO_TUNE_MAX_ERROR_RATE:
+                new, reason = max(1, old // 2), f'error rate {errors / attempts:.0%}'
+            elif self._last_step > 0 and throughput < self._last_throughput * (1 + AUTO_TUNE_MIN_GAIN):
+                new, reason = max(1, old - 1), 'last added worker did not raise throughput'
+            elif self._waiting and old < self.max_workers and self._last_step >= 0:
+                new, reason = old + 1, 'throughput headroom'
+            else:
+                # Hold for one interval after a step back so the next probe measures a settled rate
+                new, reason = old, 'holding' if self._waiting else 'no queued work'
+            self.limit = new
+            self._last_step = new - old
+            self._last_throughput = throughput
+            self.decisions.append((now, old, new, reason))
+            self._cond.notify_all()
+        if self.progress_hook:
+            self.progress_hook({'status': 'info', 'message': f'Auto-tune: {old} -> {new} workers ({reason}; {throughput / 2**20:.2f} MiB/s, '
+                                                             f'{completed} done, {errors} errors, {throttled} throttled)'})
+        return new
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+def classify_error(message: str) -> str:
+    for error_class, pattern in ERROR_PATTERNS:
+        if re.search(pattern, message, re.IGNORECASE):
+            return error_class
+    return 'network'
+
+class RetryScheduler:
+    """依錯誤類型決定失敗項目是否重試，以指數退避加隨機抖動排定下一次嘗試，並整理最後的失敗報告。"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_error: Dict[str, str] = {}  # item url -> latest error message
+        self.attempts: Dict[str, int] = {}
+        self.failures: Dict[str, Tuple[Dict[str, Any], str, str]] = {}  # item url -> (video, error class, message)
+
+    def observing(self, progress_hook: Optional[Callable]) -> Callable:
+        """Wraps a job's progress_hook to remember the latest error of each item (events tagged with video_url)."""
+        def hook(d: Dict[str, Any]) -> None:
+            if d.get('status') == 'error' and d.get('video_url'):
+                with self._lock:
+                    self._last_error[d['video_url']] = str(d.get('message') or '')
+            if progress_hook: progress_hook(d)
+        return hook
+
+    @staticmethod
+    def item_hook(video: Dict[str, Any], progress_hook: Optional[Callable]) -> Callable:
+        """A per-item hook that tags the item's events with its URL and ID, for observing() and the event log.
+        yt-dlp's per-file progress already names the video in info_dict and passes through as is."""
+        tags = {'video_url': video['url']}
+        if video.get('id'): tags['video_id'] = video['id']
+
+        def hook(d: Dict[str, Any]) -> None:
+            if progress_hook: progress_hook(d if d.get('status') in ('downloading', 'finished') else {**d, **tags})
+        return hook
+
+    def attempt_failed(self, video: Dict[str, Any], progress_hook: Optional[Callable]) -> None:
+        """Reports a finished attempt that produced no file as one 'item_failed' event, however many errors it logged."""
+        with self._lock:
+            message = self._last_error.get(video['url']) or 'no error reported'
+            attempt = self.attempts.get(video['url'], 0) + 1
+        error_class = classify_error(message)
+        if progress_hook: progress_hook({'status': 'item_failed', 'message': f'Attempt {attempt} failed [{error_class}]: {video["title"]}',
+                                         'video_url': video['url'], 'video_id': video.get('id'), 'error_class': error_class})
+
+    def record_failure(self, video: Dict[str, Any]) -> Optional[float]:
+        """Classifies a failed attempt; returns the monotonic time of the next attempt, or None to give up."""
+        with self._lock:
+            message = self._last_error.pop(video['url'], None) or 'no error reported'
+            error_class = classify_error(message)
+            attempts = self.attempts[video['url']] = self.attempts.get(video['url'], 0) + 1
+            self.failures[video['url']] = (video, error_class, message)
+        if attempts > RETRY_LIMITS[error_class]:
+            return None
+        delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY[error_class] * 2 ** (attempts - 1))
+        # Jitter spreads retries of items that failed together
+        return time.monotonic() + random.uniform(delay / 2, delay)
+
+    def record_success(self, video: Dict[str, Any]) -> None:
+        with self._lock:
+            self.failures.pop(video['url'], None)
+            self._last_error.pop(video['url'], None)
+
+    def report(self) -> List[str]:
+        """One line per item that finally failed."""
+        with self._lock:
+            failures = list(self.failures.values())
+        lines = [f'Failed after {self.attempts[video["url"]]} attempts [{error_class}]: {video["title"]} ({video["url"]}): {message}'
+                 for video, error_class, message in failures]
+        if lines:
+            lines.insert(0, f'{len(lines)} videos failed:')
+        return lines
+
+# --- Process Pool Backend ---
+
+_process_ydl_pool: Optional[YoutubeDLPool] = None
+
+def _portable_progress(d: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduces a yt-dlp progress dict to picklable fields so it can cross a process boundary."""
+    portable = {key: value for key, value in d.items() if isinstance(value, (str, int, float, bool, type(None)))}
+    info_dict = d.get('info_dict')
+    if isinstance(info_dict, dict):
+        portable['info_dict'] = {key: info_dict.get(key) for key in ('id', 'title', 'webpage_url')}
+    return portable
+
+def _init_process_worker(rate_bytes: float = 0, per_host: int = 0, output_path: str = "", forget: Optional[List[Dict[str, Any]]] = None) -> None:
+    global _process_ydl_pool
+    _process_ydl_pool = YoutubeDLPool()
+    # Limiters are per process: each worker gets its share of the rate, fixed for the whole job
+    set_bandwidth_limits(rate_bytes, per_host)
+    # Items a resumed job downloads again are dropped from this process's copy of the archive too
+    for video in forget or []:
+        get_download_archive(output_path).discard(video)
+    # Worker processes leave through multiprocessing's exit handler, which runs Finalize callbacks
+    multiprocessing.util.Finalize(_process_ydl_pool, _process_ydl_pool.close, exitpriority=10)
+
+def _process_download_worker(event_queue: Any, video_url: str, output_path: str, video_number: int, use_cookies: bool, download_format: str, use_pot: bool, write_info_json: bool) -> Optional[str]:
+    """download_video for a process-pool worker; progress events are sent back through event_queue."""
+    # Events other than yt-dlp's per-file progress carry the item's URL, so the parent can tell which video failed
+    progress_hook = lambda d: event_queue.put(_portable_progress(d) if d.get('status') in ('downloading', 'finished') else dict(_portable_progress(d), video_url=video_url))
+    requests_before = METADATA_REQUESTS.snapshot()
+    try:
+        return download_video(video_url, output_path, video_number, use_cookies, download_format, use_pot, progress_hook, write_info_json, ydl_pool=_process_ydl_pool)
+    finally:
+        # The parent's counter does not see requests made in this process
+        event_queue.put({'status': 'metadata_requests', 'counts': METADATA_REQUESTS.since(requests_before)})
+
+def _relay_process_events(event_queue: Any, progress_hook: Optional[Callable]) -> None:
+    """Forwards worker events to progress_hook in the parent until a None sentinel arrives."""
+    while True:
+        event = event_queue.get()
+        if event is None:
+            return
+        if event.get('status') == 'metadata_requests':
+            for kind, amount in event['counts'].items():
+                METADATA_REQUESTS.count(kind, amount)
+            continue
+        # The worker's own tracker lives in its process; the parent's is fed from the relayed events
+        JOB_PROGRESS.observe(event)
+        if progress_hook: progress_hook(event)
+
+# --- Job Journal ---
+
+class JobJournal:
+    """播放清單下載工作的日誌：以 append-only JSON lines 記錄每個項目的狀態與每個壓縮分卷的內容，中斷後可接續。"""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self.videos: List[Dict[str, Any]] = []
+        self.states: Dict[str, str] = {}  # queue item url -> state
+        self.paths: Dict[str, str] = {}  # queue item url -> final file
+        self.parts: Dict[int, Dict[str, Any]] = {}  # part number -> {'files': [...], 'archived': bool}
+        self.finished = False
+
+    def load(self) -> bool:
+        """Replays an existing journal; returns False if there is none."""
+        try:
+            f = open(self.path, 'rb+')
+        except FileNotFoundError:
+            return False
+        with f:
+            good_bytes = 0
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    # Torn last line from a crash; everything before it was fsynced.
+                    # Drop it so events appended by the resumed job stay readable.
+                    f.truncate(good_bytes)
+                    break
+                good_bytes += len(line)
+                self._apply(event)
+        return bool(self.videos)
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        kind = event.get('event')
+        if kind == 'job':
+            self.videos = event['videos']
+            self.states = {video['url']: 'queued' for video in self.videos}
+            self.paths, self.parts, self.finished = {}, {}, False
+        elif kind == 'item':
+            self.states[event['url']] = event['state']
+            if event.get('path'): self.paths[event['url']] = event['path']
+        elif kind == 'part':
+            part = self.parts.setdefault(event['part'], {'files': [], 'archived': False})
+            if 'files' in event: part['files'] = event['files']
+            if event.get('state') == 'archived':
+                part['archived'] = True
+                for url, path in self.paths.items():
+                    if path in part['files']: self.states[url] = 'archived'
+        elif kind == 'finished':
+            self.finished = True
+
+    def _write(self, event: Dict[str, Any], mode: str = 'a') -> None:
+        with self._lock:
+            if self._file is None or mode == 'w':
+                if self._file: self._file.close()
+                self._file = open(self.path, mode, encoding='utf-8')
+            self._file.write(json.dumps(event, ensure_ascii=False) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._apply(event)
+
+    def start(self, videos: List[Dict[str, Any]]) -> None:
+        """Starts a new job, replacing any previous journal of the same playlist."""
+        self._write({'event': 'job', 'videos': videos, 'started_at': time.time()}, mode='w')
+
+    def item(self, video: Dict[str, Any], state: str, path: Optional[str] = None) -> None:
+        event = {'event': 'item', 'url': video['url'], 'state': state}
+        if path: event['path'] = path
+        self._write(event)
+
+    def part(self, part: int, state: str, files: Optional[List[str]] = None) -> None:
+        event = {'event': 'part', 'part': part, 'state': state}
+        if files is not None: event['files'] = files
+        self._write(event)
+
+    def finish(self) -> None:
+        self._write({'event': 'finished', 'finished_at': time.time()})
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def remaining_videos(self) -> List[Dict[str, Any]]:
+        """Items that never reached postprocessed, in their original queue order."""
+        return [video for video in self.videos if self.states.get(video['url']) in ('queued', 'downloading', 'failed')]
+
+    def unfinished_parts(self) -> List[Tuple[int, List[str]]]:
+        return [(number, part['files']) for number, part in sorted(self.parts.items()) if not part['archived']]
+
+    def unbatched_files(self) -> List[str]:
+        """Finished files that were not yet assigned to any archive part."""
+        in_parts = {path for part in self.parts.values() for path in part['files']}
+        paths = [self.paths.get(video['url']) for video in self.videos if self.states.get(video['url']) == 'postprocessed']
+        return [path for path in paths if path and path not in in_parts]
+
+    def next_part(self) -> int:
+        return max(self.parts, default=0) + 1
+
+# --- Staged Pipeline ---
+
+_STAGE_DONE = object()
+
+class PipelineStage:
+    """一組固定數量的工作執行緒，從有界佇列取出項目處理；佇列滿時上游會被阻塞 (背壓)。"""
+    def __init__(self, name: str, workers: int, handler: Callable[[Any], None], progress_hook: Optional[Callable] = None, item_hook: Optional[Callable[[Any], Callable]] = None):
+        """item_hook: returns the progress hook of a queued item, so a handler's exception is reported as that item's error."""
+        self.name = name
+        self.workers = max(1, workers)
+        self.handler = handler
+        self.progress_hook = progress_hook
+        self.item_hook = item_hook
+        self.queue: queue.Queue = queue.Queue(maxsize=self.workers * PIPELINE_QUEUE_FACTOR)
+        self.busy_seconds = 0.0
+        self.processed = 0
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._finished_at: Optional[float] = None
+        self._threads = [threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True) for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def put(self, item: Any) -> None:
+        self.queue.put(item)
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is _STAGE_DONE:
+                return
+            start = time.monotonic()
+            try:
+                self.handler(item)
+            except Exception as e:
+                hook = self.item_hook(item) if self.item_hook else self.progress_hook
+                if hook: hook({'status': 'error', 'message': f'{self.name} stage error: {e}'})
+            finally:
+                with self._lock:
+                    self.busy_seconds += time.monotonic() - start
+                    self.processed += 1
+
+    def close(self) -> None:
+        """Waits for everything already queued, then stops the workers."""
+        for _ in self._threads:
+            self.queue.put(_STAGE_DONE)
+        for thread in self._threads:
+            thread.join()
+        self._finished_at = time.monotonic()
+
+    def utilization(self) -> float:
+        elapsed = (self._finished_at or time.monotonic()) - self._started_at
+        return self.busy_seconds / (self.workers * elapsed) if elapsed > 0 else 0.0
+
+    def report(self) -> str:
+        return f'{self.name}: {self.workers} workers, {self.utilization():.0%} busy, {self.processed} items, queue {self.queue.qsize()}'
+
+class ArchiveBatcher:
+    """收集完成的檔案，依目標大小 (或檔案數) 切成壓縮分卷，並交由背景壓縮工作執行緒處理。"""
+    def __init__(self, playlist_title: str, output_path: str, zip_files: bool, archive_format: str, target_bytes: int,
+                 stage: PipelineStage, progress_hook: Optional[Callable] = None, journal: Optional[JobJournal] = None):
+        """stage: the archive workers (create_stage), shared by every batcher of a job and closed by its owner."""
+        self.playlist_title = playlist_title
+        self.output_path = output_path
+        self.zip_files = zip_files
+        self.archive_format = archive_format
+        self.target_bytes = target_bytes
+        self.progress_hook = progress_hook
+        self.journal = journal
+        # Never reuse a part number: continue after the journal's parts and any archive already on disk
+        self.next_part = max(journal.next_part() if journal else 1, self._next_free_part())
+        self._files: List[str] = []
+        self._bytes = 0
+        self._videos = 0
+        self._lock = threading.Lock()
+        self.stage = stage
+
+    @staticmethod
+    def create_stage(workers: int, progress_hook: Optional[Callable] = None) -> PipelineStage:
+        return PipelineStage("archive", workers, lambda batch: batch[0]._archive(batch[1:]), progress_hook)
+
+    def _next_free_part(self) -> int:
+        pattern = os.path.join(glob.escape(self.output_path), glob.escape(self.playlist_title) + "_part_*")
+        numbers = [int(m.group(1)) for path in glob.glob(pattern) if (m := re.search(r'_part_(\d+)\.(zip|tar)$', path))]
+        return max(numbers, default=0) + 1
+
+    def _archive_path(self, part: int) -> str:
+        ext = ".tar" if self.archive_format == "tar" else ".zip"
+        return os.path.join(self.output_path, f"{self.playlist_title}_part_{part}{ext}")
+
+    def _cut(self) -> Optional[Tuple[List[str], int]]:
+        # Caller holds self._lock
+        if not self._files: return None
+        batch = (self, self._files, self.next_part)
+        if self.journal: self.journal.part(self.next_part, 'started', self._files)
+        self._files, self._bytes, self._videos = [], 0, 0
+        self.next_part += 1
+        return batch
+
+    def add(self, video_path: str) -> None:
+        """Adds a finished video and its sidecars; they always go into the same part."""
+        if not self.zip_files: return
+        files = [video_path] + find_sidecars(video_path)
+        size = 0
+        for file in files:
+            try:
+                size += os.path.getsize(file)
+            except OSError:
+                pass
+        batches = []
+        with self._lock:
+            if self.target_bytes > 0:
+                # Cut before a video that would overshoot the target, so parts stay close to it
+                if self._files and self._bytes + size > self.target_bytes:
+                    batches.append(self._cut())
+                self._files.extend(files)
+                self._bytes += size
+                if self._bytes >= self.target_bytes:
+                    batches.append(self._cut())
+            else:
+                self._files.extend(files)
+                self._videos += 1
+                if self._videos >= FILES_PER_ZIP:
+                    batches.append(self._cut())
+        for batch in batches:
+            self.stage.put(batch)
+
+    def _archive(self, batch: Tuple[List[str], int]) -> None:
+        files, part = batch
+        if self.progress_hook: self.progress_hook({'status': 'postprocessing', 'message': f'Zipping part {part}...'})
+        zip_name = f"{self.playlist_title}_part_{part}.zip"
+        zip_and_cleanup_files(files, zip_name, self.output_path, self.archive_format)
+        if self.journal: self.journal.part(part, 'archived')
+
+    def resume_part(self, part: int, files: List[str]) -> None:
+        """Finishes a part an interrupted job had started, under its original number."""
+        if os.path.exists(self._archive_path(part)):
+            # Archives are renamed into place only when complete, so only the source cleanup may be missing
+            for file in files:
+                if os.path.exists(file): os.remove(file)
+            if self.journal: self.journal.part(part, 'archived')
+            return
+        self.stage.put((self, files, part))
+
+    def flush(self) -> None:
+        """Queues the remaining files as the last part; closing the stage waits for every pending archive."""
+        with self._lock:
+            batch = self._cut()
+        if batch:
+            self.stage.put(batch)
+
+def download_playlist(videos_to_download: List[Dict[str, Any]], output_path: str, use_cookies: bool, max_workers: int, zip_files: bool, download_format: str, use_pot: bool, progress_hook: Optional[Callable] = None, playlist_title_override: Optional[str] = None, write_info_json: bool = True, backend: str = "thread",
+                      postprocess_workers: int = 0, archive_workers: int = 1, archive_format: str = "zip", archive_target_bytes: int = ARCHIVE_TARGET_BYTES,
+                      schedule: str = "playlist", pinned: Optional[List[int]] = None, priorities: Optional[Dict[int, int]] = None,
+                      connection_budget: int = FRAGMENT_CONNECTION_BUDGET, resume: bool = False, auto_tune: bool = False, auto_tune_max: int = AUTO_TUNE_MAX_WORKERS,
+                      stop_event: Optional[threading.Event] = None, groups: Optional[List[concurrent.futures.Future]] = None) -> None:
+    """groups: several playlists downloaded as one job, in place of videos_to_download and playlist_title_override (used by
+    download_channel for its tabs). Each future resolves to (title, videos), or None, when the playlist is listed, and its
+    videos join the job then. The playlists share one worker pool, connection budget and archive pool, and each keeps its
+    own journal and archive parts.
+    stop_event: once set, videos waiting out a retry backoff are given up instead of waited for."""
     if not os.path.exists(output_path):
         os.makedirs(output_path)
 
-    files_to_process: List[str] = []
-    zip_counter = 1
-    # Assuming the playlist title can be inferred from the first video's info or passed differently
-    playlist_title = playlist_title_override or "playlist" 
-    if videos_to_download and not playlist_title_override:
-        # A bit of a hack to get a playlist title if possible
-        with yt_dlp.YoutubeDL({'quiet': True, 'extract_flat': True}) as ydl:
+    if use_pot:
+        # One probe up front; workers then share its result instead of each failing against a dead provider
+        POT_PROVIDER.probe(progress_hook)
+
+    controller = None
+    if auto_tune and backend == "process":
+        if progress_hook: progress_hook({'status': 'warning', 'message': 'Auto-tuned workers need the thread or pipeline backend; using a fixed pool'})
+    elif auto_tune:
+        # Starts at max_workers; the pool is sized for the ceiling and the controller gates how many run
+        controller = ConcurrencyController(max_workers, auto_tune_max, progress_hook)
+        progress_hook = controller.observing(progress_hook)
+        max_workers = controller.max_workers
+    retries = RetryScheduler()
+    progress_hook = retries.observing(progress_hook)
+    stop_event = stop_event or threading.Event()
+    JOB_PROGRESS.reset()
+
+    ydl_pool = YoutubeDLPool()
+    requests_before = METADATA_REQUESTS.snapshot()
+    # Callers pass the title from their analysis (playlist_title_of); flat entries already carry every
+    # field scheduling needs, so the only extraction left per video is the download itself
+    if groups is None:
+        listed = concurrent.futures.Future()
+        listed.set_result((playlist_title_override or "playlist", videos_to_download))
+        groups = [listed]
+
+    # Archives are written by background workers so downloading never waits for zipping
+    archive_stage = ArchiveBatcher.create_stage(archive_workers, progress_hook)
+    forget: List[Dict[str, Any]] = []
+    batchers: List[ArchiveBatcher] = []
+    journal_of: Dict[str, JobJournal] = {}  # queue item url -> its playlist's journal
+    batcher_of: Dict[str, ArchiveBatcher] = {}
+    claimed: set = set()  # archive IDs (or URLs) of every queued item
+
+    progress_lock = threading.Lock()
+    pipeline_stages: List[PipelineStage] = []
+    completions = CompletionTracker(0)
+    # Long videos get parallel fragment fetching from connections short clips leave unused
+    planner = FragmentPlanner([], max_workers, connection_budget, (lambda: controller.limit) if controller else None)
+    worker_slot = controller.slot if controller else nullcontext
+
+    def add_batcher(playlist_title: str, journal: JobJournal, videos: List[Dict[str, Any]]) -> ArchiveBatcher:
+        batcher = ArchiveBatcher(playlist_title, output_path, zip_files, archive_format, archive_target_bytes, archive_stage, progress_hook, journal)
+        batchers.append(batcher)
+        for video in videos:
+            batcher_of[video['url']] = batcher
+        return batcher
+
+    def admit(listed: List[concurrent.futures.Future]) -> List[Dict[str, Any]]:
+        """Sets up the playlists that finished listing; returns their videos in download order."""
+        resumed_videos: List[Dict[str, Any]] = []
+        fresh: List[Tuple[str, JobJournal, List[Dict[str, Any]]]] = []
+        for future in listed:
             try:
-                info = ydl.extract_info(videos_to_download[0]['webpage_url'], download=False)
-                playlist_title = sanitize_filename(info.get('playlist_title', 'playlist'))
-            except:
-                pass
+                group = future.result()
+            except Exception as e:
+                if progress_hook: progress_hook({'status': 'error', 'message': f'Failed to list videos: {e}'})
+                continue
+            if not group: continue
+            playlist_title, videos = group
+            journal = JobJournal(os.path.join(output_path, playlist_title + JOB_JOURNAL_SUFFIX))
+            resumed = resume and journal.load() and not journal.finished
+            if resumed:
+                # The journal's queue is already scheduled; items that were downloading may be in downloaded.txt
+                # without having been postprocessed, so yt-dlp must see them again
+                videos = journal.remaining_videos()
+                archive = get_download_archive(output_path)
+                resumed_forget = [video for video in videos if journal.states.get(video['url']) in ('downloading', 'failed')]
+                for video in resumed_forget:
+                    archive.discard(video)
+                forget.extend(resumed_forget)
+                if progress_hook: progress_hook({'status': 'info', 'message': f'Resuming {playlist_title}: {len(videos)} videos left, {len(journal.unfinished_parts())} archive parts to finish'})
+            elif resume and progress_hook:
+                progress_hook({'status': 'warning', 'message': f'No interrupted job to resume for {playlist_title}, starting a new one'})
 
+            # Archived items never reach a worker, so re-running a finished playlist costs no extractions
+            videos, skipped = filter_archived(videos, output_path)
+            if skipped and progress_hook: progress_hook({'status': 'info', 'message': f'Skipping {skipped} videos of {playlist_title} already in {DOWNLOAD_ARCHIVE_FILE}'})
 
-    def process_batch() -> None:
-        nonlocal zip_counter
-        if not files_to_process: return
-        if zip_files:
-            if progress_hook: progress_hook({'status': 'postprocessing', 'message': f'Zipping part {zip_counter}...'})
-            zip_name = f"{playlist_title}_part_{zip_counter}.zip"
-            zip_and_cleanup_files(list(files_to_process), zip_name, output_path)
-        files_to_process.clear()
-        zip_counter += 1
-
-    total_videos = len(videos_to_download)
-    if max_workers > 1:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_video = {
-                executor.submit(download_video, video['url'], output_path, video['playlist_index'], use_cookies, download_format, use_pot, progress_hook, write_info_json): video
-                for video in videos_to_download
-            }
-            for i, future in enumerate(concurrent.futures.as_completed(future_to_video)):
-                video = future_to_video[future]
-                if progress_hook: progress_hook({'status': 'info', 'message': f'Processing video {i+1}/{total_videos}: {video["title"]}'})
+            # A video listed by several playlists of the job (e.g. a stream also shown under videos) is downloaded once
+            unique = []
+            for video in videos:
+                claim = _archive_id_for(video) or video['url']
+                if claim in claimed: continue
+                claimed.add(claim)
+                unique.append(video)
+                journal_of[video['url']] = journal
+            if len(unique) < len(videos) and progress_hook: progress_hook({'status': 'info', 'message': f'{playlist_title}: skipping {len(videos) - len(unique)} videos already queued from another playlist'})
+
+            if resumed:
+                batcher = add_batcher(playlist_title, journal, unique)
+                for part, files in journal.unfinished_parts():
+                    batcher.resume_part(part, files)
+                for video_path in journal.unbatched_files():
+                    if os.path.exists(video_path): batcher.add(video_path)
+                resumed_videos.extend(unique)
+            else:
+                fresh.append((playlist_title, journal, unique))
+
+        # Executors start work in submission order, so scheduling is just the order of the queue. Playlists listed
+        # together are scheduled as one queue, after what is left of resumed journals (already in their order).
+        scheduled = schedule_videos([video for _, _, videos in fresh for video in videos], schedule, pinned, priorities)
+        for playlist_title, journal, videos in fresh:
+            journal.start([video for video in scheduled if journal_of[video['url']] is journal])
+            add_batcher(playlist_title, journal, videos)
+
+        admitted = resumed_videos + scheduled
+        JOB_PROGRESS.queue(admitted)
+        planner.queue(admitted)
+        completions.total += len(admitted)
+        return admitted
+
+    finished_urls = set()
+
+    def video_done(video: Dict[str, Any], video_path: Optional[str]) -> None:
+        """video_path is None for an item yt-dlp found in the download archive (its archive ID was unknown before extraction)."""
+        finished_urls.add(video['url'])
+        retries.record_success(video)
+        completions.mark()
+        JOB_PROGRESS.set_state(video, 'done')
+        if video_path:
+            journal_of[video['url']].item(video, 'postprocessed', video_path)
+            batcher_of[video['url']].add(video_path)
+        else:
+            # Nothing to archive: the item is as done as one whose part was archived
+            journal_of[video['url']].item(video, 'archived')
+            retries.item_hook(video, progress_hook)({'status': 'info', 'message': f'Already in {DOWNLOAD_ARCHIVE_FILE}: {video["title"]}'})
+
+    def download_planned(video: Dict[str, Any]) -> Optional[str]:
+        journal_of[video['url']].item(video, 'downloading')
+        item_hook = retries.item_hook(video, progress_hook)
+        with worker_slot(), planner.lease(video) as fragments:
+            if fragments > 1: item_hook({'status': 'info', 'message': f'Fetching {fragments} fragments in parallel: {video["title"]}'})
+            return download_video(video['url'], output_path, video['playlist_index'], use_cookies, download_format, use_pot, item_hook, write_info_json, ydl_pool=ydl_pool, concurrent_fragments=fragments)
+
+    def stage_item_hook(video: Dict[str, Any]) -> Callable:
+        """For pipeline stages: the error of an exception escaping a stage handler also ends the item's attempt."""
+        item_hook = retries.item_hook(video, progress_hook)
+
+        def hook(d: Dict[str, Any]) -> None:
+            item_hook(d)
+            retries.attempt_failed(video, progress_hook)
+        return hook
+
+    def run_round(videos: List[Dict[str, Any]], forget: List[Dict[str, Any]]) -> None:
+        total_videos = len(videos)
+        if backend == "pipeline":
+            # network -> ffmpeg postprocessing -> archiving, each stage with its own pool and bounded queue,
+            # so downloads keep running while ffmpeg or zipping is busy
+            completed = 0
+
+            def postprocess_item(item: Tuple[Dict[str, Any], Dict[str, Any]]) -> None:
+                nonlocal completed
+                video, fetched = item
+                item_hook = retries.item_hook(video, progress_hook)
+                video_path = postprocess_video(fetched, item_hook, ydl_pool)
+                with progress_lock:
+                    completed += 1
+                    item_hook({'status': 'info', 'message': f'Processed video {completed}/{total_videos}: {video["title"]}'})
+                if video_path:
+                    video_done(video, video_path)
+                else:
+                    retries.attempt_failed(video, progress_hook)
+
+            postprocess_stage = PipelineStage("postprocess", postprocess_workers or max(1, (os.cpu_count() or 2) // 2), postprocess_item, progress_hook,
+                                             item_hook=lambda item: stage_item_hook(item[0]))
+
+            def fetch_item(video: Dict[str, Any]) -> None:
+                journal_of[video['url']].item(video, 'downloading')
+                item_hook = retries.item_hook(video, progress_hook)
                 try:
-                    video_path = future.result()
+                    with worker_slot(), planner.lease(video) as fragments:
+                        if fragments > 1: item_hook({'status': 'info', 'message': f'Fetching {fragments} fragments in parallel: {video["title"]}'})
+                        fetched = fetch_video(video['url'], output_path, video['playlist_index'], use_cookies, download_format, use_pot, item_hook, write_info_json, ydl_pool=ydl_pool, concurrent_fragments=fragments)
+                except AlreadyArchived:
+                    video_done(video, None)
+                    return
+                if fetched:
+                    postprocess_stage.put((video, fetched))
+                else:
+                    retries.attempt_failed(video, progress_hook)
+
+            network_stage = PipelineStage("network", max_workers, fetch_item, progress_hook,
+                                          item_hook=stage_item_hook)
+            for video in videos:
+                network_stage.put(video)
+            network_stage.close()
+            postprocess_stage.close()
+            pipeline_stages.extend([network_stage, postprocess_stage])
+        elif max_workers > 1:
+            event_queue = None
+            if backend == "process":
+                # yt-dlp's Python-side work holds the GIL, so a process pool scales past a handful of workers.
+                # Progress hooks cannot be pickled; workers send events back through a managed queue instead.
+                manager = multiprocessing.Manager()
+                event_queue = manager.Queue()
+                relay_thread = threading.Thread(target=_relay_process_events, args=(event_queue, progress_hook), daemon=True)
+                relay_thread.start()
+                executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=_init_process_worker,
+                                                                  initargs=(BANDWIDTH_LIMITER.rate / max_workers, HOST_LIMITER.limit, output_path, forget))
+
+                def submit(video: Dict[str, Any]) -> concurrent.futures.Future:
+                    # Submission is the closest the parent gets to seeing a worker start
+                    journal_of[video['url']].item(video, 'downloading')
+                    return executor.submit(_process_download_worker, event_queue, video['url'], output_path, video['playlist_index'], use_cookies, download_format, use_pot, write_info_json)
+            else:
+                executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+                submit = lambda video: executor.submit(download_planned, video)
+            failed_attempts: List[Dict[str, Any]] = []
+            with executor:
+                future_to_video = {submit(video): video for video in videos}
+                for i, future in enumerate(concurrent.futures.as_completed(future_to_video)):
+                    video = future_to_video[future]
+                    retries.item_hook(video, progress_hook)({'status': 'info', 'message': f'Processing video {i+1}/{total_videos}: {video["title"]}'})
+                    try:
+                        video_path = future.result()
+                        if video_path:
+                            video_done(video, video_path)
+                            continue
+                    except AlreadyArchived:
+                        video_done(video, None)
+                        continue
+                    except Exception as exc:
+                        retries.item_hook(video, progress_hook)({'status': 'error', 'message': f'Error downloading {video["title"]}: {exc}'})
+                    if event_queue is None:
+                        retries.attempt_failed(video, progress_hook)
+                    else:
+                        failed_attempts.append(video)
+            if event_queue is not None:
+                event_queue.put(None)
+                relay_thread.join()
+                manager.shutdown()
+                # Worker errors arrive through the relay, so their attempts are reported once it has drained
+                for video in failed_attempts:
+                    retries.attempt_failed(video, progress_hook)
+        else:
+            for i, video in enumerate(videos):
+                retries.item_hook(video, progress_hook)({'status': 'info', 'message': f'Processing video {i+1}/{total_videos}: {video["title"]}'})
+                try:
+                    video_path = download_planned(video)
                     if video_path:
-                        files_to_process.append(video_path)
-                        if zip_files and len(files_to_process) >= FILES_PER_ZIP:
-                            process_batch()
+                        video_done(video, video_path)
+                        continue
+                except AlreadyArchived:
+                    video_done(video, None)
+                    continue
                 except Exception as exc:
-                    if progress_hook: progress_hook({'status': 'error', 'message': f'Error downloading {video["title"]}: {exc}'})
-    else:
-        for i, video in enumerate(videos_to_download):
-            if progress_hook: progress_hook({'status': 'info', 'message': f'Processing video {i+1}/{total_videos}: {video["title"]}'})
-            video_path = download_video(video['url'], output_path, video['playlist_index'], use_cookies, download_format, use_pot, progress_hook, write_info_json)
-            if video_path:
-                files_to_process.append(video_path)
-                if zip_files and len(files_to_process) >= FILES_PER_ZIP:
-                    process_batch()
+                    retries.item_hook(video, progress_hook)({'status': 'error', 'message': f'Error downloading {video["title"]}: {exc}'})
+                retries.attempt_failed(video, progress_hook)
+
+    # Playlists join the job as they finish listing, so downloading starts with the first one listed.
+    # Failed items go to the end of the job: each waits out its own backoff, then runs in a later round.
+    # yt-dlp continues from the .part file the failed attempt left behind.
+    arrivals, pending, waiting = list(groups), [], []
+    while True:
+        if arrivals and not pending and not waiting:
+            concurrent.futures.wait(arrivals, return_when=concurrent.futures.FIRST_COMPLETED)
+        listed = [future for future in arrivals if future.done()]
+        if listed:
+            arrivals = [future for future in arrivals if future not in listed]
+            pending = admit(listed) + pending
+        if pending:
+            run_round(pending, forget + [video for video in pending if retries.attempts.get(video['url'])])
+            for video in pending:
+                if video['url'] in finished_urls: continue
+                journal_of[video['url']].item(video, 'failed')
+                retry_at = retries.record_failure(video)
+                JOB_PROGRESS.set_state(video, 'failed' if retry_at is None else 'queued')
+                # yt-dlp may have reserved the item in the archive before the attempt failed; it was never written
+                get_download_archive(output_path).discard(video)
+                if retry_at is not None:
+                    waiting.append((retry_at, video))
+            pending = []
+        if not waiting:
+            if arrivals: continue
+            break
+        waiting.sort(key=lambda item: item[0])
+        delay = max(0.0, waiting[0][0] - time.monotonic())
+        if progress_hook: progress_hook({'status': 'info', 'message': f'{len(waiting)} videos waiting to retry, next attempt in {delay:.0f}s'})
+        if arrivals:
+            # A playlist listed in the meantime starts downloading at once
+            concurrent.futures.wait(arrivals, timeout=delay, return_when=concurrent.futures.FIRST_COMPLETED)
+            stopped = stop_event.is_set()
+        else:
+            stopped = stop_event.wait(delay)
+        if stopped:
+            # Left as failed in the journal, which stays unfinished below, so --resume picks them up
+            for _, video in waiting:
+                JOB_PROGRESS.set_state(video, 'failed')
+            if progress_hook: progress_hook({'status': 'warning', 'message': f'Stopped; {len(waiting)} videos waiting to retry were not attempted again'})
+            waiting = []
+            continue
+        now = time.monotonic()
+        pending = [video for retry_at, video in waiting if retry_at <= now]
+        waiting = [(retry_at, video) for retry_at, video in waiting if retry_at > now]
     
-    if zip_files:
-        process_batch()
+    ydl_pool.close()
+    if controller: controller.close()
+    if progress_hook: progress_hook({'status': 'info', 'message': f'Completion times ({schedule}): {completions.report()}'})
+    if progress_hook: progress_hook({'status': 'info', 'message': bandwidth_report()})
+    if progress_hook: progress_hook({'status': 'info', 'message': f'{METADATA_REQUESTS.format(METADATA_REQUESTS.since(requests_before))} for {completions.total} videos'})
+    for line in retries.report():
+        if progress_hook: progress_hook({'status': 'error', 'message': line})
+    # Videos whose error class is never retried (private, removed...) are remembered so --sync stops offering them
+    given_up = [(video['id'], error_class, message) for video, error_class, message in retries.failures.values()
+                if video.get('id') and RETRY_LIMITS[error_class] == 0]
+    if given_up:
+        try:
+            PlaylistCache().mark_failed(given_up)
+        except sqlite3.Error as e:
+            if progress_hook: progress_hook({'status': 'warning', 'message': f'寫入播放清單快取失敗: {e}'})
+    if progress_hook: progress_hook({'status': 'postprocessing', 'message': 'Waiting for pending archives...'})
+    for batcher in batchers:
+        batcher.flush()
+    archive_stage.close()
+    # A journal with failed items (given up, or stopped while waiting to retry) stays open for --resume
+    unfinished = {id(journal_of[url]) for url in retries.failures}
+    for batcher in batchers:
+        if id(batcher.journal) in unfinished:
+            batcher.journal.close()
+        else:
+            batcher.journal.finish()
+    for stage in pipeline_stages + [archive_stage]:
+        if progress_hook: progress_hook({'status': 'info', 'message': f'Stage {stage.report()}'})
     
     if progress_hook: progress_hook({'status': 'postprocessing', 'message': 'Cleaning up temporary files...'})
-    cleanup_temp_files(output_path)
+    # Partial downloads of failed items stay so the next run continues them
+    cleanup_temp_files(output_path, keep_partial=bool(retries.failures))
     if progress_hook: progress_hook({'status': 'all_finished', 'message': 'All tasks completed.'})
 
 def download_channel(channel_url: str, output_path: str, dl_type: dict[str, bool], 
-                     use_cookies: bool, max_workers: int, zip_files: bool, download_format: str, use_pot: bool, progress_hook: Optional[Callable] = None, write_info_json: bool = True) -> None:
+                     use_cookies: bool, max_workers: int, zip_files: bool, download_format: str, use_pot: bool, progress_hook: Optional[Callable] = None, write_info_json: bool = True,
+                     refresh: bool = False, cache_ttl: int = PLAYLIST_CACHE_TTL, backend: str = "thread", archive_format: str = "zip", archive_target_bytes: int = ARCHIVE_TARGET_BYTES,
+                     schedule: str = "playlist", connection_budget: int = FRAGMENT_CONNECTION_BUDGET, resume: bool = False, auto_tune: bool = False,
+                     auto_tune_max: int = AUTO_TUNE_MAX_WORKERS, postprocess_workers: int = 0, archive_workers: int = 1, stop_event: Optional[threading.Event] = None) -> None:
     if not os.path.exists(output_path):
         os.makedirs(output_path)
-    
-    for key, value in dl_type.items():
-        if value:
-            target_url = f"{channel_url}/{key}"
-            if progress_hook: progress_hook({'status': 'info', 'message': f'Analyzing {key} list...'})
-            
-            info = get_playlist_info(target_url, use_cookies, use_pot)
-            if not info or 'entries' not in info:
-                if progress_hook: progress_hook({'status': 'error', 'message': f'Failed to get videos for {key}'})
-                continue
-            
-            entries = info['entries']
-            if not entries: continue
-            
-            videos_to_download = []
-            for i, entry in enumerate(entries):
-                if entry and entry.get('url'):
-                    videos_to_download.append({
-                        'url': entry.get('url'),
-                        'title': entry.get('title', 'Unknown'),
-                        'playlist_index': i + 1,
-                        'webpage_url': entry.get('url')
-                    })
-            
-            channel_title = sanitize_filename(info.get('title', 'channel'))
-            download_playlist(videos_to_download, output_path, use_cookies, max_workers, zip_files, download_format, use_pot, progress_hook, playlist_title_override=f"{channel_title}_{key}", write_info_json=write_info_json)
+
+    tabs = [key for key, value in dl_type.items() if value]
+    requests_before = METADATA_REQUESTS.snapshot()
+    listed: List[str] = []
+    listed_lock = threading.Lock()
+
+    def list_tab(key: str) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        try:
+            return _channel_tab_videos(channel_url, key, use_cookies, use_pot, progress_hook, refresh, cache_ttl)
+        finally:
+            with listed_lock:
+                listed.append(key)
+                last = len(listed) == len(tabs)
+            # Downloads of the tabs listed first are already running; their requests are counted as 'video'
+            if last and progress_hook: progress_hook({'status': 'info', 'message': f"Listing tabs: {METADATA_REQUESTS.format({kind: amount for kind, amount in METADATA_REQUESTS.since(requests_before).items() if kind != 'video'})}"})
+
+    # Tabs are listed at once and each joins one download job as soon as it is listed, so every tab shares the same
+    # workers, postprocessing and archive pools, while each keeps its own journal and {channel}_{tab} archive parts
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(tabs)), thread_name_prefix="channel-tab") as executor:
+        groups = [executor.submit(list_tab, key) for key in tabs]
+        download_playlist([], output_path, use_cookies, max_workers, zip_files, download_format, use_pot, progress_hook, write_info_json=write_info_json, backend=backend,
+                          postprocess_workers=postprocess_workers, archive_workers=archive_workers, archive_format=archive_format, archive_target_bytes=archive_target_bytes,
+                          schedule=schedule, connection_budget=connection_budget, resume=resume, auto_tune=auto_tune, auto_tune_max=auto_tune_max, stop_event=stop_event, groups=groups)
+
+def _channel_tab_videos(channel_url: str, key: str, use_cookies: bool, use_pot: bool, progress_hook: Optional[Callable], refresh: bool, cache_ttl: int) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+    """Enumerates one channel tab; returns its archive name ({channel}_{tab}) and queue items."""
+    target_url = f"{channel_url}/{key}"
+    if progress_hook: progress_hook({'status': 'info', 'message': f'Analyzing {key} list...'})
+
+    info = get_playlist_info(target_url, use_cookies, use_pot, refresh=refresh, cache_ttl=cache_ttl)
+    if not info or 'entries' not in info:
+        if progress_hook: progress_hook({'status': 'error', 'message': f'Failed to get videos for {key}'})
+        return None
+
+    videos_to_download = []
+    for i, entry in enumerate(info['entries'] or []):
+        if entry and entry.get('url'):
+            videos_to_download.append(dict(video_from_entry(entry, i + 1), webpage_url=entry.get('url')))
+    if not videos_to_download: return None
+
+    channel_title = playlist_title_of(info, 'channel')
+    return f"{channel_title}_{key}", videos_to_download
 
 def _normalize_channel_url(channel_url: str) -> str:
     normalized = channel_url.strip().rstrip("/")
@@ -322,6 +2318,352 @@ def _get_live_candidate_urls(channel_url: str) -> List[str]:
             deduped.append(candidate)
     return deduped
 
+# --- Live Detection ---
+
+_live_page_openers: Dict[bool, urllib.request.OpenerDirector] = {}
+_live_page_openers_lock = threading.Lock()
+
+def _live_page_opener(use_cookies: bool) -> urllib.request.OpenerDirector:
+    """The opener shared by every detector for /live page requests; cookies.txt is read once per process."""
+    with _live_page_openers_lock:
+        if use_cookies not in _live_page_openers:
+            jar = http.cookiejar.MozillaCookieJar()
+            if use_cookies and os.path.exists('cookies.txt'):
+                try:
+                    jar.load('cookies.txt', ignore_discard=True, ignore_expires=True)
+                except (OSError, http.cookiejar.LoadError) as e:
+                    print(f"讀取 cookies.txt 失敗: {e}")
+            _live_page_openers[use_cookies] = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+        return _live_page_openers[use_cookies]
+
+class LiveDetector:
+    """低成本的直播偵測：先檢查最可能的頁面、找到就停止，並依頻道的閒置情況與慣常開播時間調整檢查間隔。
+
+    /live 頁面以一般 HTTP 請求檢查 (不經 yt-dlp)，判斷不了時才交給 yt-dlp；/streams 與頻道首頁只讀取前幾個項目。
+    """
+    def __init__(self, channel_url: str, use_cookies: bool, use_pot: bool, base_interval: float = 60, max_interval: float = LIVE_MAX_INTERVAL,
+                 history_path: Optional[str] = None, progress_hook: Optional[Callable] = None):
+        self.base_url = _normalize_channel_url(channel_url)
+        self.use_cookies = use_cookies
+        self.use_pot = use_pot
+        self.base_interval = base_interval
+        self.max_interval = max(base_interval, max_interval)
+        self.history_path = history_path
+        self.progress_hook = progress_hook
+        self.candidates = _get_live_candidate_urls(self.base_url)
+        self.hits: Dict[str, int] = {candidate: 0 for candidate in self.candidates}
+        self.polls = 0
+        self.requests = 0
+        self.idle_polls = 0
+        self.live_ids: List[str] = []
+        self._seen_ids: set = set()
+        self.history: List[float] = self._load_history()
+        self._ydl: Optional[yt_dlp.YoutubeDL] = None
+        self._ydl_nop = False
+        self._opener = _live_page_opener(use_cookies)
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Returns the channel's live entries ({'id', 'url', 'title'}); usually costs one request."""
+        self.polls += 1
+        # Candidates that found lives before go first and the first hit ends the poll. A full sweep checks
+        # every candidate and merges what they list, which also finds a second live running at the same time.
+        order = sorted(self.candidates, key=lambda candidate: -self.hits[candidate])
+        sweep = self.polls % LIVE_FULL_SWEEP_EVERY == 1
+        if not sweep and not self.live_ids:
+            order = order[:1]
+        found: List[Dict[str, Any]] = []
+        for candidate in order:
+            entries = [entry for entry in self._probe(candidate) if entry['id'] not in [item['id'] for item in found]]
+            if entries:
+                self.hits[candidate] += 1
+                found.extend(entries)
+                if not sweep:
+                    break
+        new_ids = [entry['id'] for entry in found if entry['id'] not in self._seen_ids]
+        if new_ids:
+            self._seen_ids.update(new_ids)
+            self._remember_start(time.time())
+        self.live_ids = [entry['id'] for entry in found]
+        self.idle_polls = 0 if found else self.idle_polls + 1
+        return found
+
+    def next_interval(self, now: Optional[float] = None) -> float:
+        """Seconds until the next poll: the base interval while live or near a usual start, longer the longer the channel is idle."""
+        now = time.time() if now is None else now
+        if self.live_ids or self._seconds_to_usual(now) == 0:
+            return self.base_interval
+        interval = min(self.max_interval, self.base_interval * 2 ** min(self.idle_polls // LIVE_IDLE_POLLS_PER_STEP, 10))
+        # Never sleep through the start of a usual stream window
+        return max(self.base_interval, min(interval, self._seconds_to_usual(now)))
+
+    def close(self) -> None:
+        if self._ydl:
+            self._ydl.close()
+            self._ydl = None
+
+    def _probe(self, url: str) -> List[Dict[str, Any]]:
+        if url.endswith('/live'):
+            result = self._probe_live_page(url)
+            if result is not None:
+                return result
+        return self._probe_with_ydl(url)
+
+    def _probe_live_page(self, url: str) -> Optional[List[Dict[str, Any]]]:
+        """Checks /live with a plain page request; None when the page does not say either way or the request failed."""
+        # SOCS skips the EU consent interstitial, as yt-dlp does
+        headers = {'User-Agent': 'Mozilla/5.0', 'Accept-Language': 'en-US,en;q=0.9', 'Cookie': 'SOCS=CAI'}
+        self.requests += 1
+        METADATA_REQUESTS.count('live')
+        try:
+            with self._opener.open(urllib.request.Request(url, headers=headers), timeout=LIVE_PAGE_TIMEOUT) as response:
+                page = response.read().decode('utf-8', 'replace')
+        except (urllib.error.HTTPError, urllib.error.URLError, OSError) as e:
+            # yt-dlp gets to try the same page, so one failed request does not fail the whole poll
+            if self.progress_hook: self.progress_hook({'status': 'warning', 'message': f'Live page check failed ({url}): {e}'})
+            return None
+        canonical = re.search(r'<link rel="canonical" href="https://www\.youtube\.com/watch\?v=([\w-]{11})"', page)
+        live_now = bool(canonical) and ('"isLiveNow":true' in page or '"isLive":true' in page)
+        if live_now:
+            title = re.search(r'<meta name="title" content="([^"]*)"', page)
+            started = re.search(r'"startTimestamp":"([^"]+)"', page)
+            return [{'id': canonical.group(1), 'url': f'https://www.youtube.com/watch?v={canonical.group(1)}',
+                     'title': html.unescape(title.group(1)) if title else 'Unknown',
+                     'started_at': _parse_iso_timestamp(started.group(1)) if started else None}]
+        if canonical or re.search(r'<link rel="canonical" href="https://www\.youtube\.com/(?:channel/|@)', page):
+            # An upcoming stream's watch page, or the channel page when nothing is scheduled
+            return []
+        return None
+
+    def _probe_with_ydl(self, url: str) -> List[Dict[str, Any]]:
+        # One instance for the detector's lifetime; rebuilt only when PotProvider availability flips
+        nop = not _pot_enabled(self.use_pot, self.progress_hook)
+        if self._ydl is None or nop != self._ydl_nop:
+            self.close()
+            ydl_opts = {
+                'quiet': True,
+                'extract_flat': 'in_playlist',
+                'playlistend': LIVE_STREAMS_PROBE_ITEMS,
+                'cookiefile': 'cookies.txt' if self.use_cookies else None,
+            }
+            if nop:
+                ydl_opts['nop_plugins'] = True
+            self._ydl, self._ydl_nop = yt_dlp.YoutubeDL(ydl_opts), nop
+        self.requests += 1
+        METADATA_REQUESTS.count('live')
+        try:
+            info = self._ydl.extract_info(url, download=False)
+        except yt_dlp.utils.DownloadError as e:
+            if re.search(r'not currently live|This live event will begin|Premieres in', str(e)):
+                return []
+            raise
+        if not info:
+            return []
+        entries = [info] if info.get('live_status') == 'is_live' else []
+        entries.extend(_iter_live_entries(info.get('entries')))
+        found = []
+        for entry in entries:
+            live_url = entry.get('webpage_url') or entry.get('url')
+            if entry.get('id') and live_url and entry['id'] not in [item['id'] for item in found]:
+                found.append({'id': entry['id'], 'url': live_url, 'title': entry.get('title', 'Unknown'), 'started_at': entry.get('release_timestamp')})
+        return found
+
+    def _seconds_to_usual(self, now: float) -> float:
+        """0 inside a usual stream window, else seconds until the next one (inf without history)."""
+        week = 7 * 24 * 3600
+        best = float('inf')
+        for start in self.history:
+            offset = (start - now) % week  # same weekday and time of day, in the coming week
+            if offset <= LIVE_USUAL_WINDOW or offset >= week - LIVE_USUAL_WINDOW:
+                return 0
+            best = min(best, offset - LIVE_USUAL_WINDOW)
+        return best
+
+    def _load_history(self) -> List[float]:
+        if not self.history_path or not os.path.exists(self.history_path):
+            return []
+        try:
+            with open(self.history_path, encoding='utf-8') as f:
+                return list(json.load(f).get(self.base_url, []))
+        except (OSError, ValueError) as e:
+            print(f"讀取直播紀錄失敗: {e}")
+            return []
+
+    def _remember_start(self, started_at: float) -> None:
+        self.history = (self.history + [started_at])[-LIVE_HISTORY_LIMIT:]
+        if not self.history_path:
+            return
+        with _live_history_lock:
+            try:
+                with open(self.history_path, encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            data[self.base_url] = self.history
+            temp_path = self.history_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.history_path)
+
+_live_history_lock = threading.Lock()
+
+def _parse_iso_timestamp(text: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(text.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+# --- Live Recording ---
+
+class LiveState:
+    """持久化的直播錄製狀態：已錄完、錄製中與已放棄的直播 ID，重新啟動後據此略過或接續錄製。"""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.recorded: Dict[str, Dict[str, Any]] = {}
+        self.recording: Dict[str, Dict[str, Any]] = {}
+        self.failed: Dict[str, Dict[str, Any]] = {}  # live ID -> attempts, last error class and message, given_up
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                self.recorded = data.get('recorded', {})
+                self.recording = data.get('recording', {})
+                self.failed = data.get('failed', {})
+            except (OSError, ValueError) as e:
+                print(f"讀取直播狀態失敗: {e}")
+
+    def start(self, entry: Dict[str, Any]) -> bool:
+        """Marks a live as being recorded; False if it is already recorded, recording or given up."""
+        with self._lock:
+            if entry['id'] in self.recorded or entry['id'] in self.recording or self.failed.get(entry['id'], {}).get('given_up'):
+                return False
+            self.recording[entry['id']] = {'url': entry['url'], 'title': entry.get('title'), 'started_at': time.time()}
+            self._save()
+            return True
+
+    def finish(self, live_id: str, path: Optional[str], error: Optional[str] = None) -> bool:
+        """Moves a live to recorded (path is None when it was already in the download archive), or with the error of a
+        failed recording back to unseen so the next poll tries again. Returns False when a failed live is given up:
+        its error class is never retried, or it failed LIVE_MAX_ATTEMPTS times."""
+        with self._lock:
+            entry = self.recording.pop(live_id, None)
+            retry = True
+            if error is None:
+                if entry is not None: self.recorded[live_id] = dict(entry, path=path, finished_at=time.time())
+                self.failed.pop(live_id, None)
+            else:
+                error_class = classify_error(error)
+                attempts = self.failed.get(live_id, {}).get('attempts', 0) + 1
+                retry = RETRY_LIMITS[error_class] > 0 and attempts < LIVE_MAX_ATTEMPTS
+                self.failed[live_id] = {'attempts': attempts, 'error_class': error_class, 'message': error, 'given_up': not retry}
+            self._save()
+            return retry
+
+    def interrupted(self) -> List[Dict[str, Any]]:
+        """Recordings a previous run left unfinished, as detector entries."""
+        with self._lock:
+            return [{'id': live_id, 'url': entry['url'], 'title': entry.get('title') or 'Unknown'} for live_id, entry in self.recording.items()]
+
+    def release(self, live_id: str) -> None:
+        with self._lock:
+            self.recording.pop(live_id, None)
+
+    def _save(self) -> None:
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'recorded': self.recorded, 'recording': self.recording, 'failed': self.failed}, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+_live_states: Dict[str, LiveState] = {}
+_live_states_lock = threading.Lock()
+
+def get_live_state(output_path: str) -> LiveState:
+    """The shared live state of an output directory, loaded on first use."""
+    path = os.path.abspath(os.path.join(output_path, LIVE_STATE_FILE))
+    with _live_states_lock:
+        if path not in _live_states:
+            _live_states[path] = LiveState(path)
+        return _live_states[path]
+
+class LiveRecorderPool:
+    """在背景執行緒錄製直播，讓監控迴圈在錄製期間繼續檢查 (同一頻道同時開兩場直播也能錄到)。"""
+    def __init__(self, output_path: str, use_cookies: bool, zip_files: bool, download_format: str, use_pot: bool, progress_hook: Optional[Callable] = None,
+                 write_info_json: bool = True, archive_format: str = "zip", max_recordings: int = LIVE_MAX_RECORDINGS):
+        self.output_path = output_path
+        self.use_cookies = use_cookies
+        self.zip_files = zip_files
+        self.download_format = download_format
+        self.use_pot = use_pot
+        self.progress_hook = progress_hook
+        self.write_info_json = write_info_json
+        self.archive_format = archive_format
+        self.state = get_live_state(output_path)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_recordings), thread_name_prefix="live-recorder")
+        self._lock = threading.Lock()
+        self._active = 0
+
+    def resume_interrupted(self) -> int:
+        """Restarts recordings the previous run did not finish; yt-dlp continues from what is on disk."""
+        entries = self.state.interrupted()
+        for entry in entries:
+            self.state.release(entry['id'])
+            self.submit(entry)
+        return len(entries)
+
+    def submit(self, entry: Dict[str, Any]) -> bool:
+        """Starts recording entry in the background; False if it is already recorded or being recorded."""
+        if not self.state.start(entry):
+            return False
+        JOB_PROGRESS.set_state(entry, 'queued')
+        with self._lock:
+            self._active += 1
+        self._executor.submit(self._record, entry)
+        return True
+
+    @property
+    def active(self) -> int:
+        with self._lock:
+            return self._active
+
+    def _record(self, entry: Dict[str, Any]) -> None:
+        video_path = None
+        archived = False
+        errors: List[str] = []
+        tagged_hook = RetryScheduler.item_hook(entry, self.progress_hook)
+
+        def item_hook(d: Dict[str, Any]) -> None:
+            if d.get('status') == 'error': errors.append(str(d.get('message') or ''))
+            tagged_hook(d)
+        try:
+            if self.progress_hook: self.progress_hook({'status': 'info', 'message': f"開始錄製直播：{entry.get('title', 'Unknown')}"})
+            video_path = download_video(video_url=entry['url'], output_path=self.output_path, video_number=0, use_cookies=self.use_cookies,
+                                        download_format=self.download_format, use_pot=self.use_pot, progress_hook=item_hook,
+                                        write_info_json=self.write_info_json, live_from_start=True)
+            if self.progress_hook: self.progress_hook({'status': 'info', 'message': bandwidth_report()})
+            if self.zip_files and video_path:
+                if self.progress_hook: self.progress_hook({'status': 'postprocessing', 'message': "直播下載完成，開始壓縮..."})
+                base_name = os.path.splitext(os.path.basename(video_path))[0]
+                video_path = zip_and_cleanup_files([video_path] + find_sidecars(video_path), f"{base_name}.zip", self.output_path, self.archive_format)
+        except AlreadyArchived:
+            archived = True
+            if self.progress_hook: self.progress_hook({'status': 'info', 'message': f"直播已在 {DOWNLOAD_ARCHIVE_FILE} 中，略過：{entry.get('title', 'Unknown')}"})
+        except Exception as e:
+            item_hook({'status': 'error', 'message': f"錄製直播失敗 {entry.get('title', 'Unknown')}: {e}"})
+        finally:
+            done = bool(video_path) or archived
+            JOB_PROGRESS.set_state(entry, 'done' if done else 'failed')
+            if not self.state.finish(entry['id'], video_path, None if done else (errors[-1] if errors else 'no error reported')):
+                item_hook({'status': 'warning', 'message': f"放棄錄製直播 {entry.get('title', 'Unknown')}: {self.state.failed[entry['id']]['error_class']}"})
+            with self._lock:
+                self._active -= 1
+                last = self._active == 0
+            # Other recordings' .part files live in the same directory
+            if last:
+                cleanup_temp_files(self.output_path)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
 def download_streaming(
     channel_url: str,
     output_path: str,
@@ -332,28 +2674,25 @@ def download_streaming(
     progress_hook: Optional[Callable] = None,
     write_info_json: bool = True,
     check_interval: int = 60,
-    stop_flag: Optional[Callable[[], bool]] = None
+    stop_flag: Optional[Callable[[], bool]] = None,
+    archive_format: str = "zip",
+    max_recordings: int = LIVE_MAX_RECORDINGS
 ) -> None:
     if not os.path.exists(output_path):
         os.makedirs(output_path)
 
-    downloaded_live_ids = set()
-
     def log(msg, status="info"):
         if progress_hook:
             progress_hook({'status': status, 'message': msg})
 
     log("Streaming 模式啟動：開始監控直播...")
 
-    ydl_opts = {
-        "quiet": True,
-        "extract_flat": True,
-        "cookiefile": 'cookies.txt' if use_cookies else None,
-        'live_from_start': True,
-    }
-
-    if not use_pot:
-        ydl_opts['nop_plugins'] = True
+    detector = LiveDetector(channel_url, use_cookies, use_pot, check_interval, history_path=os.path.join(output_path, LIVE_HISTORY_FILE), progress_hook=progress_hook)
+    # Recordings run in the background so polling continues while a stream is being recorded
+    recorders = LiveRecorderPool(output_path, use_cookies, zip_files, download_format, use_pot, progress_hook, write_info_json, archive_format, max_recordings)
+    resumed = recorders.resume_interrupted()
+    if resumed:
+        log(f"接續上次未完成的 {resumed} 個直播錄製")
 
     try:
         while True:
@@ -362,76 +2701,197 @@ def download_streaming(
                 break
             try:
                 log("檢查是否有直播中...")
+                live_entries = detector.poll()
+                for entry in live_entries:
+                    if recorders.submit(entry):
+                        log(f"偵測到直播：{entry.get('title', 'Unknown')} (錄製中: {recorders.active})")
 
-                found_live = False
-                for candidate_url in _get_live_candidate_urls(channel_url):
-                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                        info = ydl.extract_info(candidate_url, download=False)
+                if not live_entries:
+                    log(f"目前沒有直播 (下次檢查: {detector.next_interval():.0f} 秒後，已發出 {detector.requests} 個請求 / {detector.polls} 次檢查)")
 
-                    if not info:
-                        continue
+            except Exception as e:
+                detector.idle_polls += 1
+                log(f"偵測錯誤: {str(e)}", "error")
 
-                    live_entries = []
-                    if info.get("live_status") == "is_live":
-                        live_entries.append(info)
-                    live_entries.extend(_iter_live_entries(info.get("entries")))
+            # Slept in short steps so stopping does not wait out a long idle interval
+            wake_at = time.monotonic() + detector.next_interval()
+            while time.monotonic() < wake_at and not (stop_flag and stop_flag()):
+                time.sleep(min(1.0, wake_at - time.monotonic()))
 
-                    for entry in live_entries:
-                        live_id = entry.get("id")
-                        live_url = entry.get("webpage_url") or entry.get("url")
+    except KeyboardInterrupt:
+        log("Streaming 監控已停止", "warning")
+    finally:
+        detector.close()
+        if recorders.active:
+            log(f"等待 {recorders.active} 個錄製中的直播完成...", "warning")
+        recorders.shutdown(wait=True)
 
-                        if not live_id or not live_url:
-                            continue
+# --- Multi-channel Monitor ---
 
-                        found_live = True
+def read_channel_list(path: str) -> List[str]:
+    """One channel URL per line; blank lines and lines starting with # are ignored. Duplicates are dropped."""
+    with open(path, encoding='utf-8') as f:
+        urls = [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+    return list(dict.fromkeys(_normalize_channel_url(url) for url in urls))
 
-                        if live_id in downloaded_live_ids:
-                            continue
+class ChannelProbeStats:
+    """單一頻道的探測統計：探測次數與速率、請求數、偵測到的直播與偵測延遲。"""
+    def __init__(self):
+        self.probes = 0
+        self.errors = 0
+        self.detections = 0
+        self.latencies: List[float] = []
+        self.first_probe_at: Optional[float] = None
+        self.last_probe_at: Optional[float] = None
 
-                        log(f"偵測到直播：{entry.get('title', 'Unknown')}")
-                        downloaded_live_ids.add(live_id)
+    def record_probe(self, probed_at: float, failed: bool = False) -> Optional[float]:
+        """Counts a probe and returns when the previous one ran."""
+        previous = self.last_probe_at
+        self.probes += 1
+        self.errors += failed
+        self.first_probe_at = self.first_probe_at or probed_at
+        self.last_probe_at = probed_at
+        return previous
 
-                        video_path = download_video(
-                            video_url=live_url,
-                            output_path=output_path,
-                            video_number=0,
-                            use_cookies=use_cookies,
-                            download_format=download_format,
-                            use_pot=use_pot,
-                            progress_hook=progress_hook,
-                            write_info_json=write_info_json,
-                            live_from_start=True
-                        )
+    def record_detection(self, latency: Optional[float]) -> None:
+        self.detections += 1
+        if latency is not None:
+            self.latencies.append(max(0.0, latency))
 
-                        if zip_files and video_path:
-                            log("直播下載完成，開始壓縮...", "postprocessing")
-                            base_name = os.path.splitext(os.path.basename(video_path))[0]
-                            zip_name = f"{base_name}.zip"
-                            zip_and_cleanup_files([video_path], zip_name, output_path)
+    def probes_per_hour(self, now: float) -> float:
+        if not self.first_probe_at or now <= self.first_probe_at:
+            return 0.0
+        return self.probes * 3600 / (now - self.first_probe_at)
 
-                        cleanup_temp_files(output_path)
+    def report(self, requests: int, now: float) -> str:
+        latency = (f'latency avg {sum(self.latencies) / len(self.latencies):.0f}s max {max(self.latencies):.0f}s'
+                   if self.latencies else 'no latency samples')
+        return f'{self.probes} probes ({self.probes_per_hour(now):.1f}/h), {requests} requests, {self.errors} errors, {self.detections} lives, {latency}'
 
-                if not found_live:
-                    log("目前沒有直播")
+class ChannelMonitor:
+    """以單一排程器監控多個頻道的直播：所有探測由一個共用且有上限的執行緒池執行，每個頻道的下次探測時間加入隨機抖動。
 
-            except Exception as e:
-                log(f"偵測錯誤: {str(e)}", "error")
+    每個頻道各自的 LiveDetector 決定檢查間隔，偵測到的直播交給共用的 LiveRecorderPool 錄製。
+    """
+    def __init__(self, channel_urls: List[str], output_path: str, use_cookies: bool, zip_files: bool, download_format: str, use_pot: bool,
+                 progress_hook: Optional[Callable] = None, write_info_json: bool = True, check_interval: int = 60, archive_format: str = "zip",
+                 probe_workers: int = LIVE_PROBE_WORKERS, max_recordings: int = LIVE_MAX_RECORDINGS):
+        if not os.path.exists(output_path):
+            os.makedirs(output_path)
+        self.progress_hook = progress_hook
+        history_path = os.path.join(output_path, LIVE_HISTORY_FILE)
+        self.detectors = [LiveDetector(url, use_cookies, use_pot, check_interval, history_path=history_path, progress_hook=progress_hook)
+                          for url in dict.fromkeys(channel_urls)]
+        self.stats = [ChannelProbeStats() for _ in self.detectors]
+        self.recorders = LiveRecorderPool(output_path, use_cookies, zip_files, download_format, use_pot, progress_hook, write_info_json, archive_format, max_recordings)
+        self.probe_workers = max(1, probe_workers)
+        self._probe_pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.probe_workers, thread_name_prefix="live-probe")
+        self._cond = threading.Condition()
+        # (due, channel index); each channel is either here or being probed, never both.
+        # First probes are spread over one interval so 200 channels do not fire at once.
+        now = time.monotonic()
+        self._due: List[Tuple[float, int]] = [(now + random.uniform(0, check_interval), index) for index in range(len(self.detectors))]
+        heapq.heapify(self._due)
 
-            time.sleep(check_interval)
+    def run(self, stop_flag: Optional[Callable[[], bool]] = None) -> None:
+        """Runs the scheduler until stop_flag returns True (or Ctrl+C), then waits for running recordings."""
+        self._log(f"監控 {len(self.detectors)} 個頻道的直播 (同時探測上限 {self.probe_workers})")
+        resumed = self.recorders.resume_interrupted()
+        if resumed:
+            self._log(f"接續上次未完成的 {resumed} 個直播錄製")
+        next_report = time.monotonic() + LIVE_MONITOR_REPORT_INTERVAL
+        try:
+            while not (stop_flag and stop_flag()):
+                with self._cond:
+                    now = time.monotonic()
+                    due = []
+                    while self._due and self._due[0][0] <= now:
+                        due.append(heapq.heappop(self._due)[1])
+                    if not due:
+                        # Woken early when a finished probe schedules a sooner one; capped so stop_flag is polled
+                        self._cond.wait(min(1.0, self._due[0][0] - now) if self._due else 1.0)
+                for index in due:
+                    self._probe_pool.submit(self._probe, index)
+                if time.monotonic() >= next_report:
+                    self.report()
+                    next_report = time.monotonic() + LIVE_MONITOR_REPORT_INTERVAL
+        except KeyboardInterrupt:
+            pass
+        self._log("直播監控已停止", "warning")
+        self._probe_pool.shutdown(wait=True)
+        self.report()
+        for detector in self.detectors:
+            detector.close()
+        if self.recorders.active:
+            self._log(f"等待 {self.recorders.active} 個錄製中的直播完成...", "warning")
+        self.recorders.shutdown(wait=True)
 
-    except KeyboardInterrupt:
-        log("Streaming 監控已停止", "warning")
+    def _probe(self, index: int) -> None:
+        detector, stats = self.detectors[index], self.stats[index]
+        probed_at = time.time()
+        try:
+            entries = detector.poll()
+            failed = False
+        except Exception as e:
+            detector.idle_polls += 1
+            entries, failed = [], True
+            self._log(f"偵測錯誤 {detector.base_url}: {e}", "error")
+        with self._cond:
+            previous = stats.record_probe(probed_at, failed)
+        for entry in entries:
+            if not self.recorders.submit(entry):
+                continue
+            # Without a start time from the page, the live began at some point after the previous probe
+            started_at = entry.get('started_at') or previous
+            with self._cond:
+                stats.record_detection(probed_at - started_at if started_at else None)
+            self._log(f"偵測到直播：{detector.base_url} {entry.get('title', 'Unknown')} (錄製中: {self.recorders.active})")
+        interval = detector.next_interval() * random.uniform(1 - LIVE_PROBE_JITTER, 1 + LIVE_PROBE_JITTER)
+        with self._cond:
+            heapq.heappush(self._due, (time.monotonic() + interval, index))
+            self._cond.notify()
+
+    def report(self) -> None:
+        """Logs probe rate and detection latency per channel, plus totals."""
+        now = time.time()
+        with self._cond:
+            lines = [f'{detector.base_url}: {stats.report(detector.requests, now)}' for detector, stats in zip(self.detectors, self.stats)]
+            total_rate = sum(stats.probes_per_hour(now) for stats in self.stats)
+            total_requests = sum(detector.requests for detector in self.detectors)
+        for line in lines:
+            self._log(line)
+        self._log(f'Monitor: {len(self.detectors)} channels, {total_rate / 60:.1f} probes/min, {total_requests} requests, {self.recorders.active} recording')
+
+    def _log(self, message: str, status: str = "info") -> None:
+        if self.progress_hook: self.progress_hook({'status': status, 'message': message})
+
+def monitor_channels(channel_file: str, output_path: str, use_cookies: bool, zip_files: bool, download_format: str, use_pot: bool, progress_hook: Optional[Callable] = None,
+                     write_info_json: bool = True, check_interval: int = 60, stop_flag: Optional[Callable[[], bool]] = None, archive_format: str = "zip",
+                     probe_workers: int = LIVE_PROBE_WORKERS, max_recordings: int = LIVE_MAX_RECORDINGS) -> None:
+    """Watches every channel listed in channel_file for lives and records them (see ChannelMonitor)."""
+    channel_urls = read_channel_list(channel_file)
+    if not channel_urls:
+        if progress_hook: progress_hook({'status': 'error', 'message': f'No channels in {channel_file}'})
+        return
+    monitor = ChannelMonitor(channel_urls, output_path, use_cookies, zip_files, download_format, use_pot, progress_hook, write_info_json, check_interval, archive_format, probe_workers, max_recordings)
+    monitor.run(stop_flag)
 
-def download_single_video(video_url: str, output_path: str, use_cookies: bool, zip_files: bool, download_format: str, use_pot: bool, progress_hook: Optional[Callable] = None, write_info_json: bool = True) -> None:
+def download_single_video(video_url: str, output_path: str, use_cookies: bool, zip_files: bool, download_format: str, use_pot: bool, progress_hook: Optional[Callable] = None, write_info_json: bool = True, archive_format: str = "zip") -> None:
     if not os.path.exists(output_path):
         os.makedirs(output_path)
-    video_path = download_video(video_url, output_path, 0, use_cookies, download_format, use_pot, progress_hook, write_info_json)
+    JOB_PROGRESS.reset()
+    try:
+        video_path = download_video(video_url, output_path, 0, use_cookies, download_format, use_pot, RetryScheduler.item_hook({'url': video_url}, progress_hook), write_info_json)
+        JOB_PROGRESS.finish_active('done' if video_path else 'failed')
+    except AlreadyArchived:
+        video_path = None
+        if progress_hook: progress_hook({'status': 'info', 'message': f'Already in {DOWNLOAD_ARCHIVE_FILE}, skipping: {video_url}'})
 
     if zip_files and video_path:
         if progress_hook: progress_hook({'status': 'postprocessing', 'message': 'Zipping file...'})
         base_name = os.path.splitext(os.path.basename(video_path))[0]
         zip_name = f"{base_name}.zip"
-        zip_and_cleanup_files([video_path], zip_name, output_path)
+        zip_and_cleanup_files([video_path] + find_sidecars(video_path), zip_name, output_path, archive_format)
 
     if progress_hook: progress_hook({'status': 'postprocessing', 'message': 'Cleaning up temporary files...'})
     cleanup_temp_files(output_path)
@@ -486,14 +2946,38 @@ def embed_thumbnail_to_video(video_path: str, thumbnail_path: str) -> bool:
 
 def set_thumbnail(video_path: str, thumbnail_path: str): pass
 def embed_chapters(video_path: str, chapters: List[Dict[str, Any]]): pass
-def zip_and_cleanup_files(file_list: List[str], zip_name: str, output_path: str):
-    """Zips the given files and then deletes them."""
+def _zip_compression_for(file: str, archive_format: str) -> int:
+    if archive_format == "zip-store":
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED if file.lower().endswith(tuple(DEFLATED_EXTENSIONS)) else zipfile.ZIP_STORED
+
+def zip_and_cleanup_files(file_list: List[str], zip_name: str, output_path: str, archive_format: str = "zip") -> str:
+    """Archives the given files (media stored, text sidecars deflated) and then deletes them.
+
+    The archive is streamed with large buffers to a temporary ``.archiving.tmp`` file and renamed when complete
+    (not ``.part``, which cleanup_temp_files would delete while the archive is still being written).
+    Returns the archive path; for ``tar`` the ``.zip`` extension of zip_name becomes ``.tar``.
+    """
+    if archive_format == "tar":
+        zip_name = os.path.splitext(zip_name)[0] + ".tar"
     zip_path = os.path.join(output_path, zip_name)
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for file in file_list:
-            if os.path.exists(file):
-                zipf.write(file, os.path.basename(file))
-                print(f"Added to zip: {file}")
+    temp_path = zip_path + ARCHIVE_TEMP_SUFFIX
+    if archive_format == "tar":
+        with tarfile.open(temp_path, 'w', copybufsize=ARCHIVE_BUFFER_SIZE) as tarf:
+            for file in file_list:
+                if os.path.exists(file):
+                    tarf.add(file, os.path.basename(file))
+                    print(f"Added to tar: {file}")
+    else:
+        with zipfile.ZipFile(temp_path, 'w', allowZip64=True) as zipf:
+            for file in file_list:
+                if os.path.exists(file):
+                    zinfo = zipfile.ZipInfo.from_file(file, os.path.basename(file))
+                    zinfo.compress_type = _zip_compression_for(file, archive_format)
+                    with open(file, 'rb') as src, zipf.open(zinfo, 'w', force_zip64=True) as dst:
+                        shutil.copyfileobj(src, dst, ARCHIVE_BUFFER_SIZE)
+                    print(f"Added to zip: {file}")
+    os.replace(temp_path, zip_path)
     
     # After zipping, remove the original files
     for file in file_list:
@@ -503,10 +2987,13 @@ def zip_and_cleanup_files(file_list: List[str], zip_name: str, output_path: str)
                 print(f"Removed original file: {file}")
             except OSError as e:
                 print(f"Error removing original file {file}: {e}")
-def cleanup_temp_files(output_path: str):
-    """Deletes temporary files from the output directory, but preserves thumbnails."""
+    return zip_path
+
+def cleanup_temp_files(output_path: str, keep_partial: bool = False):
+    """Deletes temporary files from the output directory, but preserves thumbnails (and .part files if keep_partial)."""
     # Only delete actual temporary files
     for pattern in TEMP_FILE_PATTERNS:
+        if keep_partial and pattern == "*.part": continue
         for file_path in glob.glob(os.path.join(output_path, pattern)):
             try:
                 os.remove(file_path)
@@ -6,8 +6,10 @@ import sys
 import shutil
 import webbrowser
 import json
-from typing import Dict, Any, List, Callable
-from queue import Queue
+import time
+from typing import Dict, Any, List, Callable, Optional
+from queue import Queue, Empty
+from collections import deque
 
 import tkinter as tk
 import customtkinter as ctk
@@ -15,11 +17,20 @@ from tkinter import filedialog, messagebox
 
 # --- Config Functions ---
 CONFIG_FILE = "config.json"
+# GUI progress delivery: the queue is drained once per tick, at most this many events per tick
+PROGRESS_TICK_MS = 100
+PROGRESS_EVENTS_PER_TICK = 5000
+LOG_MAX_LINES = 2000  # the log box keeps only the newest lines
+THREAD_SLIDER_MAX = 10  # also the ceiling of auto-tuned jobs started from the GUI
 
 def load_config() -> Dict[str, Any]:
     defaults = {
         "path": "", "use_cookies": False, "multithread": False, 
-        "threads": 5, "zip_files": True, "format": "Best Video", "use_pot": False, "write_info_json": True
+        "threads": 5, "zip_files": True, "format": "Best Video", "use_pot": False, "write_info_json": True,
+        "cache_ttl": PLAYLIST_CACHE_TTL, "backend": "thread", "postprocess_workers": 0, "archive_workers": 1,
+        "archive_format": "zip", "archive_target_mb": ARCHIVE_TARGET_BYTES // 2**20,
+        "schedule": "playlist", "rate_limit_mbps": 0, "per_host_limit": 0,
+        "connection_budget": FRAGMENT_CONNECTION_BUDGET, "auto_tune": False
     }
     if os.path.exists(CONFIG_FILE):
         with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
@@ -40,12 +51,137 @@ def handle_ffmpeg_not_found() -> None:
     # ... (implementation unchanged)
     sys.exit(1)
 
+# --- Widgets ---
+
+class VideoListView(ctk.CTkFrame):
+    """只繪製可見列的影片清單：選取狀態存在一個 bytearray，數千個項目也能即時捲動、全選與篩選。
+
+    點一下切換該列，Shift+點擊把上次點擊的列到這一列設成相同狀態。
+    """
+    ROW_HEIGHT = 24
+
+    def __init__(self, master: Any, on_change: Optional[Callable[[], None]] = None, **kwargs: Any):
+        super().__init__(master, **kwargs)
+        self.on_change = on_change
+        self.videos: List[Dict[str, Any]] = []
+        self.selected = bytearray()
+        self.visible: List[int] = []  # indices into videos that pass the filter, in list order
+        self.top = 0  # first visible row
+        self._anchor: Optional[int] = None
+        self.canvas = tk.Canvas(self, highlightthickness=0, borderwidth=0, bg=self._apply_appearance_mode(self.cget("fg_color")))
+        self.canvas.pack(side="left", fill="both", expand=True, padx=(5, 0), pady=5)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y", pady=5)
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Shift-Button-1>", lambda event: self._on_click(event, extend=True))
+        self.canvas.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1) if event.delta else None)
+        self.canvas.bind("<Button-4>", lambda event: self.scroll(-1))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll(1))
+
+    def set_videos(self, videos: List[Dict[str, Any]]) -> None:
+        self.videos = videos
+        self.selected = bytearray(b"\x01" * len(videos))
+        self.visible = list(range(len(videos)))
+        self.top = 0
+        self._anchor = None
+        self._changed()
+
+    def set_filter(self, text: str) -> None:
+        """Shows only titles containing text (case-insensitive) or the playlist index text."""
+        text = text.strip().lower()
+        self.visible = [i for i, video in enumerate(self.videos)
+                        if not text or text in str(video.get('title', '')).lower() or text == str(video.get('playlist_index'))]
+        self.top = 0
+        self._anchor = None
+        self._changed()
+
+    def select_all(self, value: bool) -> None:
+        """Selects or clears every row that passes the filter."""
+        if len(self.visible) == len(self.videos):
+            self.selected = bytearray((b"\x01" if value else b"\x00") * len(self.videos))
+        else:
+            for i in self.visible:
+                self.selected[i] = value
+        self._changed()
+
+    def select_indices(self, playlist_indices: List[int], value: bool = True) -> None:
+        wanted = set(playlist_indices)
+        for i, video in enumerate(self.videos):
+            if video.get('playlist_index') in wanted:
+                self.selected[i] = value
+        self._changed()
+
+    def selected_videos(self) -> List[Dict[str, Any]]:
+        return [video for video, selected in zip(self.videos, self.selected) if selected]
+
+    def selected_count(self) -> int:
+        return self.selected.count(1)
+
+    def scroll(self, rows: int) -> None:
+        self.top = max(0, min(self.top + rows, len(self.visible) - self._rows_fit()))
+        self.redraw()
+
+    def redraw(self) -> None:
+        canvas = self.canvas
+        canvas.delete("all")
+        text_color = self._apply_appearance_mode(ctk.ThemeManager.theme["CTkLabel"]["text_color"])
+        for row, i in enumerate(self.visible[self.top:self.top + self._rows_fit() + 1]):
+            video = self.videos[i]
+            y = row * self.ROW_HEIGHT + self.ROW_HEIGHT // 2
+            box = "☑" if self.selected[i] else "☐"
+            # Long titles run past the right edge and are clipped there rather than wrapping into the next row
+            canvas.create_text(4, y, anchor="w", fill=text_color,
+                               text=f"{box}  {video.get('playlist_index', i + 1):03d} - {video.get('title', '未知標題')}")
+        total = len(self.visible)
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self._rows_fit()) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _set_appearance_mode(self, mode_string: str) -> None:
+        super()._set_appearance_mode(mode_string)
+        if hasattr(self, "canvas"):
+            self.canvas.configure(bg=self._apply_appearance_mode(self.cget("fg_color")))
+            self.redraw()
+
+    def _rows_fit(self) -> int:
+        return max(1, self.canvas.winfo_height() // self.ROW_HEIGHT)
+
+    def _on_scrollbar(self, *args: Any) -> None:
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.visible))
+            self.scroll(0)
+        elif args[0] == "scroll":
+            self.scroll(int(args[1]) * (self._rows_fit() if args[2] == "pages" else 1))
+
+    def _on_click(self, event: Any, extend: bool = False) -> None:
+        row = self.top + event.y // self.ROW_HEIGHT
+        if row >= len(self.visible):
+            return
+        if extend and self._anchor is not None:
+            value = self.selected[self.visible[self._anchor]]
+            for position in range(min(self._anchor, row), max(self._anchor, row) + 1):
+                self.selected[self.visible[position]] = value
+        else:
+            self.selected[self.visible[row]] ^= 1
+            self._anchor = row
+        self._changed()
+
+    def _changed(self) -> None:
+        self.redraw()
+        if self.on_change: self.on_change()
+
 class App(ctk.CTk):
     def __init__(self) -> None:
         super().__init__()
         self.config = load_config()
         self.progress_queue = Queue()
-        self.video_checkboxes: List[ctk.CTkCheckBox] = []
+        # Lines logged since the last tick; bounded, so a burst can never outgrow the log box's own cap
+        self.pending_log: deque = deque(maxlen=LOG_MAX_LINES)
+        self.dropped_log_lines = 0
+        self.log_line_count = 0
+        self.playlist_title = "playlist"
 
         self.title("YouTube Downloader")
         self.geometry(f"{800}x700")
@@ -87,6 +223,8 @@ class App(ctk.CTk):
         self.options_frame.grid(row=4, column=0, columnspan=3, padx=20, pady=0, sticky="ew")
         self.options_frame.grid_columnconfigure(0, weight=1)
         self.options_frame.grid_columnconfigure(1, weight=1)
+        self.options_frame.grid_columnconfigure(2, weight=1)
+        self.options_frame.grid_columnconfigure(3, weight=1)
 
         self.format_label = ctk.CTkLabel(self.options_frame, text="下載格式:")
         self.format_label.grid(row=0, column=0, padx=(0,10), pady=5, sticky="w")
@@ -96,9 +234,37 @@ class App(ctk.CTk):
 
         self.thread_slider_label = ctk.CTkLabel(self.options_frame, text="執行緒數: 5")
         self.thread_slider_label.grid(row=0, column=1, padx=(10,0), pady=5, sticky="w")
-        self.thread_slider = ctk.CTkSlider(self.options_frame, from_=1, to=10, number_of_steps=9, command=self.update_thread_label)
+        self.thread_slider = ctk.CTkSlider(self.options_frame, from_=1, to=THREAD_SLIDER_MAX, number_of_steps=THREAD_SLIDER_MAX - 1, command=self.update_thread_label)
         self.thread_slider.grid(row=1, column=1, sticky="ew", padx=(10,0))
 
+        self.backend_label = ctk.CTkLabel(self.options_frame, text="執行方式:")
+        self.backend_label.grid(row=0, column=2, padx=(10,0), pady=5, sticky="w")
+        self.backend_var = tk.StringVar()
+        self.backend_menu = ctk.CTkOptionMenu(self.options_frame, values=EXECUTION_BACKENDS, variable=self.backend_var)
+        self.backend_menu.grid(row=1, column=2, sticky="ew", padx=(10,0))
+
+        self.archive_format_label = ctk.CTkLabel(self.options_frame, text="壓縮格式:")
+        self.archive_format_label.grid(row=0, column=3, padx=(10,0), pady=5, sticky="w")
+        self.archive_format_var = tk.StringVar()
+        self.archive_format_menu = ctk.CTkOptionMenu(self.options_frame, values=ARCHIVE_FORMATS, variable=self.archive_format_var)
+        self.archive_format_menu.grid(row=1, column=3, sticky="ew", padx=(10,0))
+
+        # Bandwidth limits apply to every running download and can be changed mid-job
+        self.bandwidth_frame = ctk.CTkFrame(self.options_frame, fg_color="transparent")
+        self.bandwidth_frame.grid(row=2, column=0, columnspan=4, pady=(10,0), sticky="ew")
+        self.rate_limit_label = ctk.CTkLabel(self.bandwidth_frame, text="頻寬上限 MB/s (0=不限):")
+        self.rate_limit_label.pack(side="left", padx=(0, 5))
+        self.entry_rate_limit = ctk.CTkEntry(self.bandwidth_frame, width=60)
+        self.entry_rate_limit.pack(side="left", padx=(0, 15))
+        self.per_host_label = ctk.CTkLabel(self.bandwidth_frame, text="每主機同時下載 (0=不限):")
+        self.per_host_label.pack(side="left", padx=(0, 5))
+        self.entry_per_host = ctk.CTkEntry(self.bandwidth_frame, width=40)
+        self.entry_per_host.pack(side="left", padx=(0, 10))
+        self.apply_limits_button = ctk.CTkButton(self.bandwidth_frame, text="套用", width=60, command=self.apply_bandwidth_limits)
+        self.apply_limits_button.pack(side="left", padx=(0, 15))
+        self.bandwidth_status_label = ctk.CTkLabel(self.bandwidth_frame, text="")
+        self.bandwidth_status_label.pack(side="left")
+
         self.checkbox_frame = ctk.CTkFrame(self, fg_color="transparent")
         self.checkbox_frame.grid(row=5, column=0, columnspan=3, padx=20, pady=10, sticky="ew")
         self.use_cookies_var = tk.BooleanVar()
@@ -110,6 +276,9 @@ class App(ctk.CTk):
         self.multithread_var = tk.BooleanVar()
         self.multithread_checkbox = ctk.CTkCheckBox(self.checkbox_frame, text="多執行緒下載", variable=self.multithread_var, command=self.toggle_multithread_options)
         self.multithread_checkbox.pack(side="left", padx=(0, 20))
+        self.auto_tune_var = tk.BooleanVar()
+        self.auto_tune_checkbox = ctk.CTkCheckBox(self.checkbox_frame, text="自動調整執行緒數", variable=self.auto_tune_var)
+        self.auto_tune_checkbox.pack(side="left", padx=(0, 20))
         self.use_pot_var = tk.BooleanVar()
         self.use_pot_checkbox = ctk.CTkCheckBox(self.checkbox_frame, text="使用 PotProvider", variable=self.use_pot_var)
         self.use_pot_checkbox.pack(side="left", padx=(0, 5))
@@ -130,8 +299,33 @@ class App(ctk.CTk):
         self.select_all_button.pack(side="left")
         self.deselect_all_button = ctk.CTkButton(self.playlist_controls_frame, text="取消全選", command=lambda: self.toggle_all_videos(False))
         self.deselect_all_button.pack(side="left", padx=10)
-        self.video_list_frame = ctk.CTkScrollableFrame(self.playlist_frame, label_text="播放清單影片")
-        self.video_list_frame.pack(fill="both", expand=True, pady=(10,0))
+        self.refresh_cache_var = tk.BooleanVar()
+        self.refresh_cache_checkbox = ctk.CTkCheckBox(self.playlist_controls_frame, text="重新分析 (忽略快取)", variable=self.refresh_cache_var)
+        self.refresh_cache_checkbox.pack(side="left", padx=10)
+        self.resume_var = tk.BooleanVar()
+        self.resume_checkbox = ctk.CTkCheckBox(self.playlist_controls_frame, text="接續中斷的工作", variable=self.resume_var)
+        self.resume_checkbox.pack(side="left", padx=10)
+        self.schedule_var = tk.StringVar()
+        self.schedule_menu = ctk.CTkOptionMenu(self.playlist_controls_frame, values=SCHEDULE_POLICIES, variable=self.schedule_var, width=110)
+        self.schedule_menu.pack(side="right")
+        self.schedule_label = ctk.CTkLabel(self.playlist_controls_frame, text="下載順序:")
+        self.schedule_label.pack(side="right", padx=(10, 5))
+        # Filtering and range selection act on the virtual list, which only draws the rows in view
+        self.video_filter_frame = ctk.CTkFrame(self.playlist_frame, fg_color="transparent")
+        self.video_filter_frame.pack(fill="x", pady=(10,0))
+        self.entry_video_filter = ctk.CTkEntry(self.video_filter_frame, placeholder_text="篩選標題或編號", width=200)
+        self.entry_video_filter.pack(side="left")
+        self.entry_video_filter.bind("<KeyRelease>", lambda event: self.video_list.set_filter(self.entry_video_filter.get()))
+        self.entry_video_range = ctk.CTkEntry(self.video_filter_frame, placeholder_text="範圍，例如 1-50,70", width=150)
+        self.entry_video_range.pack(side="left", padx=(10, 5))
+        self.select_range_button = ctk.CTkButton(self.video_filter_frame, text="選取範圍", width=80, command=lambda: self.select_video_range(True))
+        self.select_range_button.pack(side="left", padx=5)
+        self.deselect_range_button = ctk.CTkButton(self.video_filter_frame, text="取消範圍", width=80, command=lambda: self.select_video_range(False))
+        self.deselect_range_button.pack(side="left", padx=5)
+        self.video_count_label = ctk.CTkLabel(self.video_filter_frame, text="播放清單影片")
+        self.video_count_label.pack(side="right")
+        self.video_list = VideoListView(self.playlist_frame, on_change=self.update_video_count)
+        self.video_list.pack(fill="both", expand=True, pady=(5,0))
         self.grid_rowconfigure(6, weight=1)
 
         # Channel Frame
@@ -152,6 +346,7 @@ class App(ctk.CTk):
 
         # Streaming
         self.stop_streaming = False
+        self.stop_event = threading.Event()
 
         # --- Bottom Widgets ---
         self.download_button = ctk.CTkButton(self, text="下載", command=self.start_download)
@@ -159,13 +354,17 @@ class App(ctk.CTk):
         self.progressbar = ctk.CTkProgressBar(self)
         self.progressbar.grid(row=8, column=0, columnspan=3, padx=20, pady=(0, 10), sticky="ew")
         self.progressbar.set(0)
+        self.progress_status_label = ctk.CTkLabel(self, text="", anchor="w")
+        self.progress_status_label.grid(row=9, column=0, columnspan=3, padx=20, pady=(0, 5), sticky="ew")
+        self.progress_version = -1
         self.log_box = ctk.CTkTextbox(self, height=100, state="disabled")
-        self.log_box.grid(row=9, column=0, columnspan=3, padx=20, pady=(0, 10), sticky="nsew")
+        self.log_box.grid(row=10, column=0, columnspan=3, padx=20, pady=(0, 10), sticky="nsew")
 
         # --- Initial State ---
         self.load_settings_to_ui()
         self.toggle_mode(self.mode_button.get() or "Video")
         self.check_progress_queue()
+        self.update_bandwidth_status()
 
     def toggle_mode(self, mode: str):
         # Unfocus the URL entry to prevent placeholder issues before clearing it.
@@ -219,10 +418,7 @@ class App(ctk.CTk):
         self.log("正在分析...")
         self.analyze_button.configure(state=tk.DISABLED)
         if self.mode_button.get()=="Playlist":
-            # Clear old checkboxes
-            for checkbox in self.video_checkboxes:
-                checkbox.destroy()
-            self.video_checkboxes.clear()
+            self.video_list.set_videos([])
 
             analysis_thread = threading.Thread(target=self.run_playlist_analysis, args=(url,))
             analysis_thread.start()
@@ -241,7 +437,8 @@ class App(ctk.CTk):
             self.log("分析失敗：" + str(e))
 
     def run_playlist_analysis(self, url: str):
-        playlist_info = get_playlist_info(url, self.use_cookies_var.get(), self.use_pot_var.get())
+        playlist_info = get_playlist_info(url, self.use_cookies_var.get(), self.use_pot_var.get(),
+                                          refresh=self.refresh_cache_var.get(), cache_ttl=self.config.get("cache_ttl", PLAYLIST_CACHE_TTL))
         self.after(0, self.populate_playlist_frame, playlist_info)
 
     def populate_playlist_frame(self, playlist_info: Optional[Dict[str, Any]]):
@@ -252,28 +449,33 @@ class App(ctk.CTk):
             return
 
         entries = playlist_info['entries']
+        # Carried into the download so it does not have to ask YouTube for the title again
+        self.playlist_title = playlist_title_of(playlist_info)
         self.log(f"分析完成，找到 {len(entries)} 個影片。\n")
-        for i, entry in enumerate(entries):
-            if not entry: continue
-            var = tk.IntVar(value=1)
-            checkbox = ctk.CTkCheckBox(self.video_list_frame, text=f"{i+1:03d} - {entry.get('title', '未知標題')}", variable=var)
-            checkbox.video_info = {'url': entry['url'], 'title': entry.get('title', '未知標題'), 'playlist_index': i + 1}
-            checkbox.pack(anchor="w", padx=5, pady=2)
-            self.video_checkboxes.append(checkbox)
+        self.video_list.set_videos([video_from_entry(entry, i + 1, '未知標題') for i, entry in enumerate(entries) if entry])
+        self.video_list.set_filter(self.entry_video_filter.get())
 
     def toggle_all_videos(self, select: bool):
-        for checkbox in self.video_checkboxes:
-            if select:
-                checkbox.select()
-            else:
-                checkbox.deselect()
+        self.video_list.select_all(select)
+
+    def select_video_range(self, select: bool):
+        try:
+            indices = parse_index_list(self.entry_video_range.get())
+        except ValueError:
+            messagebox.showwarning("提示", "範圍格式錯誤，例如：1-50,70")
+            return
+        self.video_list.select_indices(indices, select)
+
+    def update_video_count(self):
+        shown = f"，顯示 {len(self.video_list.visible)}" if len(self.video_list.visible) != len(self.video_list.videos) else ""
+        self.video_count_label.configure(text=f"播放清單影片：已選 {self.video_list.selected_count()} / {len(self.video_list.videos)}{shown}")
 
     def start_download(self):
         self.save_settings_from_ui()
         self.stop_streaming = False
-        self.log_box.configure(state="normal")
-        self.log_box.delete("1.0", tk.END)
-        self.log_box.configure(state="disabled")
+        # A fresh event per job; closing the window sets it so retry backoffs end instead of keeping the process alive
+        self.stop_event = threading.Event()
+        self.clear_log()
         self.log("開始準備下載...")
         self.log("ℹ 說明: 下載會保留縮圖文件 (.webp/.jpg)，並嘗試將其嵌入到影片中")
         self.progressbar.set(0)
@@ -295,6 +497,7 @@ class App(ctk.CTk):
             "download_format": self.format_var.get(),
             "use_pot": self.use_pot_var.get(),
             "write_info_json": self.write_info_json_var.get(),
+            "archive_format": self.archive_format_var.get(),
             "progress_hook": self.progress_queue.put
         }
 
@@ -302,13 +505,24 @@ class App(ctk.CTk):
             args["video_url"] = url
             target = download_single_video
         elif mode == "Playlist": # Playlist
-            videos_to_download = [cb.video_info for cb in self.video_checkboxes if cb.get() == 1]
+            videos_to_download = self.video_list.selected_videos()
             if not videos_to_download:
                 messagebox.showwarning("提示", "請至少選擇一個播放清單中的影片。\n")
                 self.download_button.configure(state=tk.NORMAL)
                 return
             args["videos_to_download"] = videos_to_download
+            args["playlist_title_override"] = self.playlist_title
             args["max_workers"] = int(self.thread_slider.get()) if self.multithread_var.get() else 1
+            args["backend"] = self.backend_var.get()
+            args["postprocess_workers"] = self.config.get("postprocess_workers", 0)
+            args["archive_workers"] = self.config.get("archive_workers", 1)
+            args["archive_target_bytes"] = self.config.get("archive_target_mb", ARCHIVE_TARGET_BYTES // 2**20) * 2**20
+            args["schedule"] = self.schedule_var.get()
+            args["connection_budget"] = self.config.get("connection_budget", FRAGMENT_CONNECTION_BUDGET)
+            args["resume"] = self.resume_var.get()
+            args["auto_tune"] = self.multithread_var.get() and self.auto_tune_var.get()
+            args["auto_tune_max"] = THREAD_SLIDER_MAX
+            args["stop_event"] = self.stop_event
             target = download_playlist
         elif mode == "Channel": # Channel
             if not (self.dl_shorts_var.get() or self.dl_videos_var.get() or self.dl_streams_var.get()):
@@ -320,6 +534,18 @@ class App(ctk.CTk):
             args["dl_type"] = {"shorts": self.dl_shorts_var.get(),
                                "videos": self.dl_videos_var.get(),
                                "streams": self.dl_streams_var.get()}
+            args["refresh"] = self.refresh_cache_var.get()
+            args["cache_ttl"] = self.config.get("cache_ttl", PLAYLIST_CACHE_TTL)
+            args["backend"] = self.backend_var.get()
+            args["postprocess_workers"] = self.config.get("postprocess_workers", 0)
+            args["archive_workers"] = self.config.get("archive_workers", 1)
+            args["archive_target_bytes"] = self.config.get("archive_target_mb", ARCHIVE_TARGET_BYTES // 2**20) * 2**20
+            args["schedule"] = self.schedule_var.get()
+            args["connection_budget"] = self.config.get("connection_budget", FRAGMENT_CONNECTION_BUDGET)
+            args["resume"] = self.resume_var.get()
+            args["auto_tune"] = self.multithread_var.get() and self.auto_tune_var.get()
+            args["auto_tune_max"] = THREAD_SLIDER_MAX
+            args["stop_event"] = self.stop_event
             target = download_channel
         else: # Streaming
             args["channel_url"] = url
@@ -334,6 +560,7 @@ class App(ctk.CTk):
     def on_closing(self) -> None:
         self.save_settings_from_ui()
         self.stop_streaming = True
+        self.stop_event.set()
         self.destroy()
 
     def load_settings_to_ui(self) -> None:
@@ -348,6 +575,13 @@ class App(ctk.CTk):
         self.format_var.set(self.config.get("format", "Best Video"))
         self.use_pot_var.set(self.config.get("use_pot", False))
         self.write_info_json_var.set(self.config.get("write_info_json", True))
+        self.backend_var.set(self.config.get("backend", "thread"))
+        self.auto_tune_var.set(self.config.get("auto_tune", False))
+        self.archive_format_var.set(self.config.get("archive_format", "zip"))
+        self.schedule_var.set(self.config.get("schedule", "playlist"))
+        self.entry_rate_limit.insert(0, str(self.config.get("rate_limit_mbps", 0)))
+        self.entry_per_host.insert(0, str(self.config.get("per_host_limit", 0)))
+        self.apply_bandwidth_limits()
 
     def save_settings_from_ui(self) -> None:
         self.config["path"] = self.entry_path.get().strip()
@@ -358,6 +592,12 @@ class App(ctk.CTk):
         self.config["format"] = self.format_var.get()
         self.config["use_pot"] = self.use_pot_var.get()
         self.config["write_info_json"] = self.write_info_json_var.get()
+        self.config["backend"] = self.backend_var.get()
+        self.config["auto_tune"] = self.auto_tune_var.get()
+        self.config["archive_format"] = self.archive_format_var.get()
+        self.config["schedule"] = self.schedule_var.get()
+        self.config["rate_limit_mbps"] = BANDWIDTH_LIMITER.rate / 2**20
+        self.config["per_host_limit"] = HOST_LIMITER.limit
         save_config(self.config)
 
     def browse_directory(self) -> None:
@@ -370,10 +610,28 @@ class App(ctk.CTk):
         is_multithread_enabled = self.multithread_var.get() and self.mode_button.get() in ["Playlist", "Channel"]
         self.thread_slider_label.configure(state=tk.NORMAL if is_multithread_enabled else tk.DISABLED)
         self.thread_slider.configure(state=tk.NORMAL if is_multithread_enabled else tk.DISABLED)
+        self.backend_menu.configure(state=tk.NORMAL if is_multithread_enabled else tk.DISABLED)
+        self.auto_tune_checkbox.configure(state=tk.NORMAL if is_multithread_enabled else tk.DISABLED)
 
     def update_thread_label(self, value: float) -> None:
         self.thread_slider_label.configure(text=f"執行緒數: {int(value)}")
 
+    def apply_bandwidth_limits(self) -> None:
+        """Applies the limit entries to the shared limiters; running downloads pick them up immediately."""
+        try:
+            rate_mbps = max(0.0, float(self.entry_rate_limit.get().strip() or 0))
+            per_host = max(0, int(self.entry_per_host.get().strip() or 0))
+        except ValueError:
+            messagebox.showerror("錯誤", "頻寬上限與主機同時下載數必須是數字")
+            return
+        set_bandwidth_limits(rate_mbps * 2**20, per_host)
+        self.log(f"頻寬上限: {rate_mbps or '不限'} MB/s，每主機同時下載: {per_host or '不限'}")
+
+    def update_bandwidth_status(self) -> None:
+        allowed = f"{BANDWIDTH_LIMITER.rate / 2**20:.1f}" if BANDWIDTH_LIMITER.rate else "不限"
+        self.bandwidth_status_label.configure(text=f"實際 {BANDWIDTH_LIMITER.achieved_rate() / 2**20:.1f} / {allowed} MB/s")
+        self.after(1000, self.update_bandwidth_status)
+
     def show_link_messagebox(self, title, message, link_text, url):
         # 建立一個子視窗來模擬messagebox
         dialog = ctk.CTkToplevel()
@@ -416,43 +674,96 @@ class App(ctk.CTk):
                                   "https://github.com/Brainicism/bgutil-ytdlp-pot-provider#installation")
 
     def check_progress_queue(self):
+        """Drains the progress queue once per tick. yt-dlp's 'downloading' events are coalesced to the latest
+        one per file, and everything logged during the tick reaches the log box in a single write."""
+        latest_downloading: Dict[str, Dict[str, Any]] = {}
+        handled = 0
         try:
-            while True:
+            while handled < PROGRESS_EVENTS_PER_TICK:
                 progress_data = self.progress_queue.get_nowait()
-                self.handle_progress_update(progress_data)
-        except Exception:
+                handled += 1
+                if progress_data.get('status') == 'downloading':
+                    key = progress_data.get('tmpfilename') or progress_data.get('filename') or ''
+                    latest_downloading[key] = progress_data
+                else:
+                    self.handle_progress_update(progress_data)
+        except Empty:
             pass
-        self.after(100, self.check_progress_queue)
+        for progress_data in latest_downloading.values():
+            self.handle_progress_update(progress_data)
+        self.update_job_progress()
+        self.flush_log()
+        # A backlog is worked off on the next idle cycle instead of waiting a full tick
+        self.after(1 if handled >= PROGRESS_EVENTS_PER_TICK else PROGRESS_TICK_MS, self.check_progress_queue)
 
     def handle_progress_update(self, data: Dict[str, Any]):
         status = data.get('status')
         if status == 'downloading':
+            # The bar shows the whole job (JOB_PROGRESS), not whichever worker reported last
             self.progressbar.configure(mode="determinate")
-            total_bytes = data.get('total_bytes') or data.get('total_bytes_estimate')
-            downloaded_bytes = data.get('downloaded_bytes')
-            if total_bytes and downloaded_bytes:
-                self.progressbar.set(downloaded_bytes / total_bytes)
         elif status == 'finished':
-            self.progressbar.set(1)
             self.log("下載完成，正在進行後處理...")
         elif status == 'all_finished':
             self.on_download_complete()
         elif status in ['info', 'postprocessing', 'finished_video', 'warning', 'error']:
             self.log(f"[{status.upper()}] {data.get('message')}")
 
+    def update_job_progress(self):
+        """Renders the job-wide progress: bytes when sizes are known, else finished items."""
+        if JOB_PROGRESS.version == self.progress_version:
+            return
+        self.progress_version = JOB_PROGRESS.version
+        snap = JOB_PROGRESS.snapshot()
+        if str(self.progressbar.cget("mode")) == "determinate":
+            if snap['total_bytes']:
+                self.progressbar.set(min(1.0, snap['downloaded_bytes'] / snap['total_bytes']))
+            elif snap['items']:
+                self.progressbar.set((snap['done'] + snap['failed']) / snap['items'])
+        eta = time.strftime('%H:%M:%S', time.gmtime(snap['eta'])) if snap['eta'] is not None else "--:--:--"
+        self.progress_status_label.configure(
+            text=f"完成 {snap['done']}/{snap['items']}，下載中 {snap['active']}，排隊 {snap['queued']}，失敗 {snap['failed']} | "
+                 f"{snap['downloaded_bytes'] / 2**30:.2f}/{snap['total_bytes'] / 2**30:.2f} GiB | {snap['rate'] / 2**20:.2f} MB/s | 剩餘 {eta}")
+
     def log(self, message: str):
-        """Appends a message to the log box."""
-        if self.log_box.winfo_exists(): # Check if widget exists
-            self.log_box.configure(state="normal")
-            self.log_box.insert(tk.END, message + "\n")
-            self.log_box.configure(state="disabled")
-            self.log_box.see(tk.END)
+        """Queues a message for the log box; safe to call from any thread, written on the next tick."""
+        if len(self.pending_log) == self.pending_log.maxlen:
+            self.dropped_log_lines += 1
+        self.pending_log.append(message)
+
+    def flush_log(self):
+        """Writes the queued lines in one insert and trims the log box to LOG_MAX_LINES."""
+        if not self.pending_log or not self.log_box.winfo_exists():
+            return
+        lines = []
+        while self.pending_log:
+            lines.append(self.pending_log.popleft())
+        if self.dropped_log_lines:
+            lines.insert(0, f"... 略過 {self.dropped_log_lines} 行紀錄")
+            self.dropped_log_lines = 0
+        self.log_box.configure(state="normal")
+        self.log_box.insert(tk.END, "\n".join(lines) + "\n")
+        self.log_line_count += sum(line.count("\n") + 1 for line in lines)
+        if self.log_line_count > LOG_MAX_LINES:
+            excess = self.log_line_count - LOG_MAX_LINES
+            self.log_box.delete("1.0", f"{excess + 1}.0")
+            self.log_line_count = LOG_MAX_LINES
+        self.log_box.configure(state="disabled")
+        self.log_box.see(tk.END)
+
+    def clear_log(self):
+        self.pending_log.clear()
+        self.dropped_log_lines = 0
+        self.log_line_count = 0
+        self.log_box.configure(state="normal")
+        self.log_box.delete("1.0", tk.END)
+        self.log_box.configure(state="disabled")
 
     def on_download_complete(self) -> None:
         self.progressbar.set(1)
         self.progressbar.configure(mode="determinate")
         self.download_button.configure(state=tk.NORMAL)
         self.log("全部任務完成！")
+        self.flush_log()
         messagebox.showinfo("完成", "下載完成！")
 
     def on_download_error(self, error: Exception) -> None:
@@ -460,8 +771,48 @@ class App(ctk.CTk):
         self.progressbar.set(0)
         self.download_button.configure(state=tk.NORMAL)
         self.log(f"[CRITICAL ERROR] {error}")
+        self.flush_log()
         messagebox.showerror("錯誤", f"下載時發生嚴重錯誤：\n{error}")
         
+def cli_progress_hook(interval: float = 5.0) -> Callable[[Dict[str, Any]], None]:
+    """Prints messages as they arrive; yt-dlp's per-file download ticks become one job-wide progress line every interval seconds."""
+    last_printed = 0.0
+
+    def hook(d: Dict[str, Any]) -> None:
+        nonlocal last_printed
+        if d.get('status') in ('downloading', 'finished'):
+            now = time.monotonic()
+            if now - last_printed >= interval:
+                last_printed = now
+                print(f"[progress] {JOB_PROGRESS.format()}")
+            return
+        print(f"[{d.get('status', 'INFO')}] {d.get('message', '')}")
+    return hook
+
+def start_limit_console() -> None:
+    """Reads 'rate <MB/s>', 'hosts <n>' and 'status' from an interactive stdin while the CLI downloads."""
+    if not sys.stdin or not sys.stdin.isatty():
+        return
+
+    def run() -> None:
+        for line in sys.stdin:
+            parts = line.split()
+            try:
+                if len(parts) == 2 and parts[0] == "rate":
+                    set_bandwidth_limits(rate_bytes=float(parts[1]) * 2**20)
+                elif len(parts) == 2 and parts[0] == "hosts":
+                    set_bandwidth_limits(per_host=int(parts[1]))
+                elif parts != ["status"]:
+                    if parts: print("Commands: rate <MB/s>, hosts <n>, status")
+                    continue
+            except ValueError:
+                print("Commands: rate <MB/s>, hosts <n>, status")
+                continue
+            print(f"[info] {bandwidth_report()}")
+            print(f"[progress] {JOB_PROGRESS.format()}")
+
+    threading.Thread(target=run, name="limit-console", daemon=True).start()
+
 def main():
     if not check_ffmpeg():
         handle_ffmpeg_not_found()
@@ -470,63 +821,137 @@ def main():
 
     if len(sys.argv) > 1:
         parser = argparse.ArgumentParser(description="YouTube Downloader CLI")
-        parser.add_argument("url", help="Video or Playlist URL")
+        parser.add_argument("url", nargs="?", help="Video or Playlist URL")
         parser.add_argument("--path", required=True, help="Download output path")
         parser.add_argument("--format", default="Best Video", choices=["Best Video", "1080p", "720p", "Audio (MP3)"], help="Download format")
         parser.add_argument("--threads", type=int, default=5, help="Number of threads for playlist download")
+        parser.add_argument("--auto-threads", action="store_true", help="Adapt the number of parallel downloads from throughput, errors and HTTP 429s, starting at --threads")
+        parser.add_argument("--max-threads", type=int, default=AUTO_TUNE_MAX_WORKERS, help="Upper bound for --auto-threads")
+        parser.add_argument("--backend", default="thread", choices=EXECUTION_BACKENDS, help="Run parallel downloads in threads or in separate processes")
+        parser.add_argument("--postprocess-workers", type=int, default=0, help="ffmpeg postprocessing workers for the pipeline backend (0 = half the CPU cores)")
+        parser.add_argument("--archive-workers", type=int, default=1, help="Background archiving workers writing zip/tar parts (all backends)")
+        parser.add_argument("--schedule", default="playlist", choices=SCHEDULE_POLICIES, help="Download order: playlist order, shortest first, newest first or by --priority tags")
+        parser.add_argument("--pin", default="", help="Playlist indices to download before everything else, e.g. 1,4-6")
+        parser.add_argument("--priority", default="", help="Priority tags for --schedule priority, e.g. 3-5:10,7:1 (higher first)")
         parser.add_argument("--cookies", action="store_true", help="Use cookies.txt")
         parser.add_argument("--zip", action="store_true", default=True, help="Zip files after download")
         parser.add_argument("--no-zip", action="store_false", dest="zip", help="Do not zip files")
+        parser.add_argument("--archive-size-mb", type=int, default=ARCHIVE_TARGET_BYTES // 2**20, help=f"Target size of each playlist archive part in MB (0 = {FILES_PER_ZIP} videos per part)")
+        parser.add_argument("--archive-format", default="zip", choices=ARCHIVE_FORMATS, help="zip (media stored, text deflated), zip-store (no compression) or tar")
         parser.add_argument("--pot", action="store_true", help="Use PotProvider")
         parser.add_argument("--no-info", action="store_false", dest="write_info_json", default=True, help="Do not download video info JSON")
+        parser.add_argument("--refresh", action="store_true", help="Ignore the cached playlist info and analyze again")
+        parser.add_argument("--sync", action="store_true", help="Incremental playlist sync: only walk the playlist down to the newest video of the last sync; downloads new entries plus cached ones not yet in the download archive")
+        parser.add_argument("--cache-ttl", type=int, default=PLAYLIST_CACHE_TTL, help="Seconds a cached playlist analysis stays fresh (0 disables the cache)")
+        parser.add_argument("--resume", action="store_true", help="Continue an interrupted playlist job from its journal in the output path")
+        parser.add_argument("--connections", type=int, default=FRAGMENT_CONNECTION_BUDGET, help="Connection budget shared by videos and their parallel fragments (0 = one connection per video)")
+        parser.add_argument("--limit-rate", type=float, default=0, help="Total download bandwidth in MB/s shared by all workers (0 = unlimited); type 'rate N' while running to change it")
+        parser.add_argument("--per-host", type=int, default=0, help="Maximum simultaneous downloads per host (0 = unlimited); type 'hosts N' while running to change it")
+        parser.add_argument("--monitor", metavar="CHANNELS_FILE", help="Watch every channel in this file (one URL per line) for lives and record them")
+        parser.add_argument("--check-interval", type=int, default=60, help="Base seconds between live checks of a channel; idle channels are checked less often")
+        parser.add_argument("--probe-workers", type=int, default=LIVE_PROBE_WORKERS, help="Live checks running at once across all monitored channels")
+        parser.add_argument("--events", metavar="FILE", help="Append every progress event to FILE as JSON lines (time, video ID, stage, bytes, durations, error class)")
+        parser.add_argument("--metrics-port", type=int, default=0, help="Serve counters and histograms at http://127.0.0.1:PORT/metrics (0 = off)")
+        parser.add_argument("--max-recordings", type=int, default=LIVE_MAX_RECORDINGS, help="Lives recorded at the same time")
         
         args = parser.parse_args()
+        if not args.url and not args.monitor:
+            parser.error("a URL is required unless --monitor is given")
         
         update_yt_dlp()
+        set_bandwidth_limits(args.limit_rate * 2**20, args.per_host)
+        start_limit_console()
+        event_sink = EventSink(args.events) if args.events else None
+        if args.metrics_port:
+            start_metrics_server(args.metrics_port)
+            print(f"[info] Metrics at http://127.0.0.1:{args.metrics_port}/metrics")
+        job_hook = METRICS.observing(cli_progress_hook(), event_sink)
 
-        # Simple Logic to determine playlist vs video (rough check)
-        is_playlist = "playlist" in args.url or "list=" in args.url
+        try:
+            if args.monitor:
+                monitor_channels(
+                    channel_file=args.monitor,
+                    output_path=args.path,
+                    use_cookies=args.cookies,
+                    zip_files=args.zip,
+                    archive_format=args.archive_format,
+                    download_format=args.format,
+                    use_pot=args.pot,
+                    write_info_json=args.write_info_json,
+                    check_interval=args.check_interval,
+                    probe_workers=args.probe_workers,
+                    max_recordings=args.max_recordings,
+                    progress_hook=job_hook
+                )
+                return
+
+            # Simple Logic to determine playlist vs video (rough check)
+            is_playlist = "playlist" in args.url or "list=" in args.url
         
-        if is_playlist:
-            # For CLI playlist, we might need to fetch info first to get video list, 
-            # OR just pass the URL to a modified download_playlist that handles URLs directly?
-            # lib.py's download_playlist expects a list of dicts.
-            # We should probably add a helper or modify download_playlist to handle URL, 
-            # BUT for now, let's just fetch info here.
-            print("Analyzing playlist...")
-            info = get_playlist_info(args.url, args.cookies, args.pot)
-            if not info or 'entries' not in info:
-                print("Failed to get playlist info.")
-                sys.exit(1)
+            if is_playlist:
+                # For CLI playlist, we might need to fetch info first to get video list, 
+                # OR just pass the URL to a modified download_playlist that handles URLs directly?
+                # lib.py's download_playlist expects a list of dicts.
+                # We should probably add a helper or modify download_playlist to handle URL, 
+                # BUT for now, let's just fetch info here.
+                if args.sync:
+                    print("Syncing playlist...")
+                    info = sync_playlist_info(args.url, args.cookies, args.pot, args.path)
+                else:
+                    print("Analyzing playlist...")
+                    info = get_playlist_info(args.url, args.cookies, args.pot, refresh=args.refresh, cache_ttl=args.cache_ttl)
+                if not info or 'entries' not in info:
+                    print("Failed to get playlist info.")
+                    sys.exit(1)
             
-            videos = []
-            for i, entry in enumerate(info['entries']):
-                 if entry:
-                    videos.append({'url': entry['url'], 'title': entry.get('title', 'Unknown'), 'playlist_index': i + 1})
+                videos = []
+                for i, entry in enumerate(info['entries']):
+                     if entry:
+                        videos.append(video_from_entry(entry, i + 1))
             
-            print(f"Found {len(videos)} videos. Starting download...")
-            download_playlist(
-                videos_to_download=videos,
-                output_path=args.path,
-                use_cookies=args.cookies,
-                max_workers=args.threads,
-                zip_files=args.zip,
-                download_format=args.format,
-                use_pot=args.pot,
-                write_info_json=args.write_info_json,
-                progress_hook=lambda d: print(f"[{d.get('status', 'INFO')}] {d.get('message', '')}")
-            )
-        else:
-             download_single_video(
-                video_url=args.url,
-                output_path=args.path,
-                use_cookies=args.cookies,
-                zip_files=args.zip,
-                download_format=args.format,
-                use_pot=args.pot,
-                write_info_json=args.write_info_json,
-                progress_hook=lambda d: print(f"[{d.get('status', 'INFO')}] {d.get('message', '')}")
-             )
+                if not videos:
+                    print("No new videos to download.")
+                    return
+                print(f"Found {len(videos)} videos. Starting download...")
+                download_playlist(
+                    videos_to_download=videos,
+                    playlist_title_override=playlist_title_of(info),
+                    output_path=args.path,
+                    use_cookies=args.cookies,
+                    max_workers=args.threads,
+                    backend=args.backend,
+                    postprocess_workers=args.postprocess_workers,
+                    archive_workers=args.archive_workers,
+                    archive_target_bytes=args.archive_size_mb * 2**20,
+                    schedule="priority" if args.priority and args.schedule == "playlist" else args.schedule,
+                    connection_budget=args.connections,
+                    resume=args.resume,
+                    auto_tune=args.auto_threads,
+                    auto_tune_max=args.max_threads,
+                    pinned=parse_index_list(args.pin),
+                    priorities=parse_priority_tags(args.priority),
+                    zip_files=args.zip,
+                    archive_format=args.archive_format,
+                    download_format=args.format,
+                    use_pot=args.pot,
+                    write_info_json=args.write_info_json,
+                    progress_hook=job_hook
+                )
+            else:
+                 download_single_video(
+                    video_url=args.url,
+                    output_path=args.path,
+                    use_cookies=args.cookies,
+                    zip_files=args.zip,
+                    archive_format=args.archive_format,
+                    download_format=args.format,
+                    use_pot=args.pot,
+                    write_info_json=args.write_info_json,
+                    progress_hook=job_hook
+                 )
+        finally:
+            # Closes the JSON-lines log even when the job fails or is interrupted
+            if event_sink: event_sink.close()
 
     else:
         update_yt_dlp()
@@ -0,0 +1,21 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TempDirTestCase(unittest.TestCase):
+    """Runs each test in a fresh working directory; the cache, archive and journals all default to relative paths."""
+
+    def setUp(self):
+        self._old_cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+
+    def tearDown(self):
+        os.chdir(self._old_cwd)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def youtube_entry(video_id):
+    return {'id': video_id, 'url': f'https://www.youtube.com/watch?v={video_id}', 'ie_key': 'Youtube', 'title': video_id}
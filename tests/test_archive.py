@@ -0,0 +1,86 @@
+import os
+import zipfile
+from unittest import mock
+
+import lib
+from tests.helpers import TempDirTestCase, youtube_entry
+
+
+def read_archive():
+    if not os.path.exists(lib.DOWNLOAD_ARCHIVE_FILE):
+        return []
+    with open(lib.DOWNLOAD_ARCHIVE_FILE, encoding='utf-8') as f:
+        return f.read().split()
+
+
+class DownloadArchiveTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        lib._download_archives.clear()
+        self.archive = lib.get_download_archive('.')
+
+    def tearDown(self):
+        self.archive.close()
+        super().tearDown()
+
+    def test_add_only_reserves_until_commit(self):
+        self.archive.add('youtube a')
+        self.assertIn('youtube a', self.archive)
+        self.assertEqual(read_archive(), [])
+        self.archive.commit('youtube a')
+        self.archive.commit('youtube a')
+        self.archive.close()
+        self.assertEqual(read_archive(), ['youtube', 'a'])
+        self.assertIn('youtube a', lib.DownloadArchive(self.archive.path))
+
+    def test_release_drops_only_uncommitted_ids(self):
+        self.archive.add('youtube a')
+        self.archive.commit('youtube a')
+        self.archive.add('youtube b')
+        self.archive.release('youtube a')
+        self.archive.release('youtube b')
+        self.assertIn('youtube a', self.archive)
+        self.assertNotIn('youtube b', self.archive)
+
+    def test_discard_forgets_in_memory_only(self):
+        video = lib.video_from_entry(youtube_entry('a'), 1)
+        self.archive.commit('youtube a')
+        self.assertTrue(self.archive.contains_video(video))
+        self.archive.discard(video)
+        self.assertFalse(self.archive.contains_video(video))
+        self.archive.close()
+        self.assertTrue(lib.DownloadArchive(self.archive.path).contains_video(video))
+
+    def fetched(self, filename):
+        self.archive.add('youtube a')
+        return {'info': {'id': 'a', 'extractor_key': 'Youtube'}, 'filename': filename, 'postprocessors': [],
+                'ydl_opts': {'download_archive': self.archive}, 'download_format': 'Video'}
+
+    def test_postprocess_failure_is_not_archived(self):
+        self.assertIsNone(lib.postprocess_video(self.fetched('missing.mp4')))
+        self.assertNotIn('youtube a', self.archive)
+        self.assertEqual(read_archive(), [])
+
+    def test_finished_video_is_archived(self):
+        open('a.mp4', 'wb').close()
+        self.assertEqual(lib.postprocess_video(self.fetched('a.mp4')), 'a.mp4')
+        self.archive.close()
+        self.assertEqual(read_archive(), ['youtube', 'a'])
+
+
+class ArchiveBatcherTest(TempDirTestCase):
+    def test_sidecars_share_their_video_part(self):
+        for name in ['a.mp4', 'a.en.vtt', 'a.info.json', 'a.webp', 'ab.mp4']:
+            with open(name, 'w') as f:
+                f.write(name * 100)
+        stage = lib.ArchiveBatcher.create_stage(1)
+        batcher = lib.ArchiveBatcher('test', '.', True, 'zip', 0, stage)
+        with mock.patch('builtins.print'):
+            batcher.add('a.mp4')
+            batcher.flush()
+            stage.close()
+
+        with zipfile.ZipFile('test_part_1.zip') as zipf:
+            compression = {info.filename: info.compress_type for info in zipf.infolist()}
+        self.assertEqual(compression, {'a.mp4': zipfile.ZIP_STORED, 'a.en.vtt': zipfile.ZIP_DEFLATED, 'a.info.json': zipfile.ZIP_DEFLATED})
+        self.assertEqual(sorted(os.listdir('.')), ['a.webp', 'ab.mp4', 'test_part_1.zip'])
@@ -0,0 +1,31 @@
+import unittest
+from unittest import mock
+
+import lib
+
+
+class BandwidthLimiterTest(unittest.TestCase):
+    def test_unlimited_only_counts_bytes(self):
+        limiter = lib.BandwidthLimiter()
+        with mock.patch.object(lib.time, 'sleep') as sleep:
+            limiter.consume(10 * 2**20)
+        sleep.assert_not_called()
+        self.assertEqual(limiter.total_bytes, 10 * 2**20)
+
+    def test_debt_beyond_the_burst_sleeps_the_worker(self):
+        limiter = lib.BandwidthLimiter(2**20)
+        with mock.patch.object(lib.time, 'sleep') as sleep:
+            limiter.consume(2**20)
+            sleep.assert_not_called()
+            limiter.consume(2**20)
+        self.assertAlmostEqual(sleep.call_args[0][0], 1.0, places=1)
+
+    def test_throttle_charges_progress_deltas_per_file(self):
+        limiter = lib.BandwidthLimiter()
+        for downloaded in (100, 250):
+            limiter.throttle({'status': 'downloading', 'tmpfilename': 'a.part', 'downloaded_bytes': downloaded})
+        limiter.throttle({'status': 'downloading', 'tmpfilename': 'b.part', 'downloaded_bytes': 50})
+        limiter.throttle({'status': 'finished', 'tmpfilename': 'a.part'})
+        # A restarted download of the same file starts counting from zero again
+        limiter.throttle({'status': 'downloading', 'tmpfilename': 'a.part', 'downloaded_bytes': 10})
+        self.assertEqual(limiter.total_bytes, 310)
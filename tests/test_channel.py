@@ -0,0 +1,57 @@
+import concurrent.futures
+import threading
+from unittest import mock
+
+import lib
+from tests.helpers import TempDirTestCase, youtube_entry
+
+
+def tab(video_ids, durations=None):
+    return [dict(lib.video_from_entry(youtube_entry(video_id), index), duration=(durations or {}).get(video_id))
+            for index, video_id in enumerate(video_ids, 1)]
+
+
+def listed(title, videos):
+    future = concurrent.futures.Future()
+    future.set_result((title, videos))
+    return future
+
+
+class ChannelJobTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        lib._download_archives.clear()
+
+    def test_playlists_listed_together_are_scheduled_as_one_queue(self):
+        downloaded = []
+
+        def download_video(url, *args, **kwargs):
+            downloaded.append(url.rsplit('=', 1)[1])
+            return f'{downloaded[-1]}.mp4'
+
+        groups = [listed('c_videos', tab(['long', 'short'], {'long': 600, 'short': 60})),
+                  listed('c_shorts', tab(['clip'], {'clip': 30}))]
+        with mock.patch.object(lib, 'download_video', download_video), mock.patch('builtins.print'):
+            lib.download_playlist([], '.', False, 1, False, 'Video', False, schedule='shortest', groups=groups)
+        self.assertEqual(downloaded, ['clip', 'short', 'long'])
+
+    def test_first_tab_downloads_while_others_are_listed(self):
+        first_download = threading.Event()
+        downloaded = []
+
+        def channel_tab_videos(channel_url, key, *args):
+            if key == 'shorts':
+                self.assertTrue(first_download.wait(5), 'shorts were listed before any download started')
+                return 'c_shorts', tab(['a', 'b'])
+            return 'c_videos', tab(['a', 'c'])
+
+        def download_video(url, *args, **kwargs):
+            downloaded.append(url.rsplit('=', 1)[1])
+            first_download.set()
+            return f'{downloaded[-1]}.mp4'
+
+        with mock.patch.object(lib, '_channel_tab_videos', channel_tab_videos), mock.patch.object(lib, 'download_video', download_video), \
+                mock.patch('builtins.print'):
+            lib.download_channel('https://www.youtube.com/@c', '.', {'videos': True, 'shorts': True}, False, 1, False, 'Video', False)
+        # 'a' is listed by both tabs and downloaded once
+        self.assertEqual(downloaded, ['a', 'c', 'b'])
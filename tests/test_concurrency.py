@@ -0,0 +1,53 @@
+import threading
+import time
+import unittest
+
+import lib
+
+
+class ConcurrencyControllerTest(unittest.TestCase):
+    def setUp(self):
+        # Decisions are taken by the test, not the controller's own thread
+        self.controller = lib.ConcurrencyController(4, 8, interval=3600)
+        self.addCleanup(self.controller.close)
+
+    def test_throttling_halves_the_limit(self):
+        self.controller.observe({'status': 'warning', 'message': 'HTTP Error 429: Too Many Requests'})
+        self.assertEqual(self.controller.decide(), 2)
+
+    def test_error_rate_halves_the_limit(self):
+        self.controller.observe({'status': 'item_failed', 'message': 'Attempt 1 failed [network]'})
+        self.controller.observe({'status': 'finished_video', 'message': 'Finished'})
+        self.assertEqual(self.controller.decide(), 2)
+
+    def test_errors_count_once_per_failed_attempt(self):
+        self.controller.observe({'status': 'error', 'message': 'ERROR: Unable to download webpage'})
+        for _ in range(9):
+            self.controller.observe({'status': 'finished_video', 'message': 'Finished'})
+        self.assertEqual(self.controller.decide(), 4)
+
+    def test_queued_work_adds_a_worker(self):
+        controller = lib.ConcurrencyController(1, 2, interval=3600)
+        self.addCleanup(controller.close)
+        holding, release, entered = threading.Event(), threading.Event(), threading.Event()
+
+        def hold():
+            with controller.slot():
+                holding.set()
+                release.wait(5)
+
+        def wait_for_slot():
+            with controller.slot():
+                entered.set()
+
+        threads = [threading.Thread(target=hold), threading.Thread(target=wait_for_slot)]
+        threads[0].start()
+        holding.wait(5)
+        threads[1].start()
+        while not controller._waiting:
+            time.sleep(0.01)
+        self.assertEqual(controller.decide(), 2)
+        self.assertTrue(entered.wait(5))
+        release.set()
+        for thread in threads:
+            thread.join()
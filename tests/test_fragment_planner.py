@@ -0,0 +1,24 @@
+import unittest
+
+import lib
+
+
+def long_videos(count):
+    return [{'url': f'https://www.youtube.com/watch?v={index}', 'duration': 3600} for index in range(count)]
+
+
+class FragmentPlannerTest(unittest.TestCase):
+    def test_short_videos_use_one_connection(self):
+        video = {'url': 'https://www.youtube.com/watch?v=short', 'duration': 60}
+        self.assertEqual(lib.FragmentPlanner([video], 4, 16).acquire(video), 1)
+
+    def test_budget_follows_the_current_worker_limit(self):
+        limit = 4
+        videos = long_videos(6)
+        planner = lib.FragmentPlanner(videos, 8, 16, lambda: limit)
+        # Three more videos start next to the first one: 16 connections over four videos
+        self.assertEqual(planner.acquire(videos[0]), 4)
+        planner.release(videos[0])
+        limit = 1
+        # Nothing else runs beside it, so it may take the per-video maximum
+        self.assertEqual(planner.acquire(videos[1]), lib.MAX_CONCURRENT_FRAGMENTS)
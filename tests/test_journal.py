@@ -0,0 +1,97 @@
+import threading
+from unittest import mock
+
+import lib
+from tests.helpers import TempDirTestCase, youtube_entry
+
+
+class JobJournalTest(TempDirTestCase):
+    def test_replays_states_and_paths(self):
+        videos = [lib.video_from_entry(youtube_entry(video_id), index) for index, video_id in enumerate('abc', 1)]
+        journal = lib.JobJournal('test.job.jsonl')
+        journal.start(videos)
+        journal.item(videos[0], 'postprocessed', 'a.mp4')
+        journal.item(videos[1], 'archived')
+        journal.item(videos[2], 'failed')
+        journal.close()
+
+        loaded = lib.JobJournal('test.job.jsonl')
+        self.assertTrue(loaded.load())
+        self.assertFalse(loaded.finished)
+        self.assertEqual([video['id'] for video in loaded.remaining_videos()], ['c'])
+        self.assertEqual(loaded.unbatched_files(), ['a.mp4'])
+
+    def test_torn_last_line_is_dropped(self):
+        videos = [lib.video_from_entry(youtube_entry('a'), 1)]
+        journal = lib.JobJournal('test.job.jsonl')
+        journal.start(videos)
+        journal.close()
+        with open('test.job.jsonl', 'a', encoding='utf-8') as f:
+            f.write('{"event": "item", "url"')
+
+        loaded = lib.JobJournal('test.job.jsonl')
+        self.assertTrue(loaded.load())
+        self.assertEqual(loaded.remaining_videos(), videos)
+        with open('test.job.jsonl', encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+
+class ResumeTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        lib._download_archives.clear()
+
+    def run_job(self, videos, download_video, **kwargs):
+        with mock.patch.object(lib, 'download_video', download_video), mock.patch('builtins.print'):
+            lib.download_playlist(videos, '.', False, 1, False, 'Video', False, playlist_title_override='test', **kwargs)
+        journal = lib.JobJournal('test' + lib.JOB_JOURNAL_SUFFIX)
+        journal.load()
+        return journal
+
+    def test_stopped_during_backoff_resumes_the_waiting_videos(self):
+        videos = [lib.video_from_entry(youtube_entry(video_id), index) for index, video_id in enumerate('ab', 1)]
+
+        def failing(url, *args, **kwargs):
+            if url == videos[0]['url']:
+                args[5]({'status': 'error', 'message': 'ERROR: Unable to download webpage: HTTP Error 503'})
+                return None
+            return 'b.mp4'
+
+        stop_event = threading.Event()
+        stop_event.set()
+        journal = self.run_job(videos, failing, stop_event=stop_event)
+        self.assertFalse(journal.finished)
+        self.assertEqual(journal.states[videos[0]['url']], 'failed')
+
+        downloaded = []
+
+        def succeeding(url, *args, **kwargs):
+            downloaded.append(url)
+            return 'a.mp4'
+
+        journal = self.run_job(videos, succeeding, resume=True)
+        self.assertEqual(downloaded, [videos[0]['url']])
+        self.assertTrue(journal.finished)
+
+    def test_archive_hits_do_not_break_resume(self):
+        videos = [lib.video_from_entry(youtube_entry(video_id), index) for index, video_id in enumerate('ab', 1)]
+
+        def download_video(url, *args, **kwargs):
+            if url == videos[0]['url']:
+                raise lib.AlreadyArchived(url)
+            args[5]({'status': 'error', 'message': 'ERROR: Unable to download webpage: HTTP Error 503'})
+            return None
+
+        stop_event = threading.Event()
+        stop_event.set()
+        journal = self.run_job(videos, download_video, stop_event=stop_event)
+        self.assertEqual(journal.states[videos[0]['url']], 'archived')
+
+        downloaded = []
+
+        def succeeding(url, *args, **kwargs):
+            downloaded.append(url)
+            return 'b.mp4'
+
+        self.assertTrue(self.run_job(videos, succeeding, resume=True).finished)
+        self.assertEqual(downloaded, [videos[1]['url']])
@@ -0,0 +1,48 @@
+from unittest import mock
+
+import lib
+from tests.helpers import TempDirTestCase
+
+LIVE = {'id': 'live1', 'url': 'https://www.youtube.com/watch?v=live1', 'title': 'live'}
+
+
+class LiveStateTest(TempDirTestCase):
+    def test_network_failures_are_retried_up_to_the_limit(self):
+        state = lib.LiveState(lib.LIVE_STATE_FILE)
+        for _ in range(lib.LIVE_MAX_ATTEMPTS - 1):
+            self.assertTrue(state.start(LIVE))
+            self.assertTrue(state.finish(LIVE['id'], None, 'HTTP Error 503: Service Unavailable'))
+        self.assertTrue(state.start(LIVE))
+        self.assertFalse(state.finish(LIVE['id'], None, 'HTTP Error 503: Service Unavailable'))
+        self.assertFalse(state.start(LIVE))
+        # Given-up lives stay given up after a restart
+        self.assertFalse(lib.LiveState(lib.LIVE_STATE_FILE).start(LIVE))
+
+    def test_recorded_live_is_not_started_again(self):
+        state = lib.LiveState(lib.LIVE_STATE_FILE)
+        state.start(LIVE)
+        state.finish(LIVE['id'], None, 'HTTP Error 503: Service Unavailable')
+        state.start(LIVE)
+        self.assertTrue(state.finish(LIVE['id'], 'live1.mp4'))
+        self.assertNotIn(LIVE['id'], state.failed)
+        self.assertFalse(state.start(LIVE))
+
+
+class LiveRecorderPoolTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        lib._live_states.clear()
+
+    def test_members_only_live_is_given_up_at_once(self):
+        def download_video(**kwargs):
+            kwargs['progress_hook']({'status': 'error', 'message': 'ERROR: Join this channel to get access to members-only content'})
+            return None
+
+        events = []
+        with mock.patch.object(lib, 'download_video', download_video), mock.patch('builtins.print'):
+            recorders = lib.LiveRecorderPool('.', False, False, 'Video', False, events.append)
+            self.assertTrue(recorders.submit(LIVE))
+            recorders.shutdown()
+            self.assertFalse(recorders.submit(LIVE))
+        self.assertEqual(lib.get_live_state('.').failed[LIVE['id']]['error_class'], 'auth')
+        self.assertTrue(any(event['status'] == 'warning' and event.get('video_url') == LIVE['url'] for event in events))
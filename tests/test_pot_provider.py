@@ -0,0 +1,33 @@
+import threading
+import unittest
+from unittest import mock
+
+import lib
+
+
+class PotProviderHealthTest(unittest.TestCase):
+    def test_callers_during_the_first_probe_assume_it_is_up(self):
+        health = lib.PotProviderHealth()
+        probing, finish = threading.Event(), threading.Event()
+
+        def reachable():
+            probing.set()
+            finish.wait(5)
+            return False
+
+        with mock.patch.object(health, '_reachable', reachable), mock.patch('builtins.print'):
+            prober = threading.Thread(target=health.available)
+            prober.start()
+            probing.wait(5)
+            self.assertTrue(health.available())
+            finish.set()
+            prober.join()
+        self.assertFalse(health.available())
+
+    def test_report_failure_opens_the_circuit_until_the_next_probe(self):
+        health = lib.PotProviderHealth(interval=0)
+        with mock.patch.object(health, '_reachable', return_value=True), mock.patch('builtins.print'):
+            self.assertTrue(health.available())
+            health.report_failure()
+            self.assertFalse(health._up)
+            self.assertTrue(health.available())
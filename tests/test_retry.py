@@ -0,0 +1,77 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import lib
+from tests.helpers import TempDirTestCase, youtube_entry
+
+NETWORK_ERROR = 'ERROR: Unable to download webpage: HTTP Error 503: Service Unavailable'
+
+
+class RetrySchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.retries = lib.RetryScheduler()
+        self.video = lib.video_from_entry(youtube_entry('a'), 1)
+        self.hook = self.retries.observing(None)
+
+    def fail(self, message):
+        lib.RetryScheduler.item_hook(self.video, self.hook)({'status': 'error', 'message': message})
+        return self.retries.record_failure(self.video)
+
+    def test_classify_error(self):
+        self.assertEqual(lib.classify_error('HTTP Error 429: Too Many Requests'), 'throttled')
+        self.assertEqual(lib.classify_error('ERROR: Private video. Sign in if you have been granted access'), 'auth')
+        self.assertEqual(lib.classify_error('ERROR: Video unavailable'), 'permanent')
+        self.assertEqual(lib.classify_error(NETWORK_ERROR), 'network')
+
+    def test_network_errors_back_off_then_give_up(self):
+        for attempt in range(lib.RETRY_LIMITS['network']):
+            before = time.monotonic()
+            retry_at = self.fail(NETWORK_ERROR)
+            delay = lib.RETRY_BASE_DELAY['network'] * 2 ** attempt
+            self.assertGreaterEqual(retry_at - before, delay / 2)
+            self.assertLessEqual(retry_at - before, delay + 1)
+        self.assertIsNone(self.fail(NETWORK_ERROR))
+        self.assertEqual(len(self.retries.report()), 2)
+
+    def test_auth_errors_are_not_retried(self):
+        self.assertIsNone(self.fail('ERROR: Private video. Sign in if you have been granted access'))
+
+    def test_success_clears_the_failure(self):
+        self.fail(NETWORK_ERROR)
+        self.retries.record_success(self.video)
+        self.assertEqual(self.retries.report(), [])
+
+    def test_attempt_failed_reports_the_latest_error_once(self):
+        events = []
+        hook = self.retries.observing(events.append)
+        item_hook = lib.RetryScheduler.item_hook(self.video, hook)
+        item_hook({'status': 'error', 'message': 'ERROR: Video unavailable'})
+        self.retries.attempt_failed(self.video, hook)
+        failed = [event for event in events if event['status'] == 'item_failed']
+        self.assertEqual(len(failed), 1)
+        self.assertEqual((failed[0]['error_class'], failed[0]['video_id']), ('permanent', 'a'))
+        self.assertEqual(events[0]['video_url'], self.video['url'])
+
+
+class StopDuringBackoffTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        lib._download_archives.clear()
+
+    def test_stop_event_ends_the_backoff_wait(self):
+        def download_video(url, *args, **kwargs):
+            args[5]({'status': 'error', 'message': NETWORK_ERROR})
+            return None
+
+        events = []
+        stop_event = threading.Event()
+        timer = threading.Timer(0.2, stop_event.set)
+        video = lib.video_from_entry(youtube_entry('a'), 1)
+        started = time.monotonic()
+        timer.start()
+        with mock.patch.object(lib, 'download_video', download_video), mock.patch('builtins.print'):
+            lib.download_playlist([video], '.', False, 1, False, 'Video', False, events.append, playlist_title_override='test', stop_event=stop_event)
+        self.assertLess(time.monotonic() - started, lib.RETRY_BASE_DELAY['network'] / 2)
+        self.assertTrue(any(event['status'] == 'warning' and event['message'].startswith('Stopped;') for event in events))
@@ -0,0 +1,38 @@
+import unittest
+
+import lib
+
+
+def queue(*videos):
+    return [dict(video, url=f'https://www.youtube.com/watch?v={index}', playlist_index=index) for index, video in enumerate(videos, 1)]
+
+
+def indices(videos):
+    return [video['playlist_index'] for video in videos]
+
+
+class ScheduleVideosTest(unittest.TestCase):
+    def test_playlist_order_is_kept(self):
+        videos = queue({}, {}, {})
+        self.assertEqual(indices(lib.schedule_videos(list(reversed(videos)))), [1, 2, 3])
+
+    def test_shortest_first_puts_unknown_durations_last(self):
+        videos = queue({'duration': 300}, {}, {'duration': 60}, {'duration': 300})
+        self.assertEqual(indices(lib.schedule_videos(videos, 'shortest')), [3, 1, 4, 2])
+
+    def test_newest_first_falls_back_to_the_timestamp(self):
+        videos = queue({'upload_date': '20240101'}, {'timestamp': 1718000000}, {}, {'upload_date': '20230505'})
+        self.assertEqual(indices(lib.schedule_videos(videos, 'newest')), [2, 1, 4, 3])
+
+    def test_priorities_override_tags(self):
+        videos = queue({}, {'priority': 5}, {})
+        self.assertEqual(indices(lib.schedule_videos(videos, 'priority')), [2, 1, 3])
+        self.assertEqual(indices(lib.schedule_videos(videos, 'priority', priorities={3: 9})), [3, 2, 1])
+
+    def test_pinned_videos_go_first_in_the_given_order(self):
+        videos = queue({'duration': 10}, {'duration': 20}, {'duration': 30}, {'duration': 40})
+        self.assertEqual(indices(lib.schedule_videos(videos, 'shortest', pinned=[4, 2])), [4, 2, 1, 3])
+
+    def test_parse_index_list_and_priority_tags(self):
+        self.assertEqual(lib.parse_index_list('1, 3-5'), [1, 3, 4, 5])
+        self.assertEqual(lib.parse_priority_tags('3-5:10,7:1'), {3: 10, 4: 10, 5: 10, 7: 1})
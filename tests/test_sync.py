@@ -0,0 +1,81 @@
+from unittest import mock
+
+import lib
+from tests.helpers import TempDirTestCase, youtube_entry
+
+PLAYLIST_URL = 'https://www.youtube.com/playlist?list=PLtest'
+
+
+class FakePlaylist:
+    """Stands in for yt_dlp.YoutubeDL; counts how many entries each extraction yields."""
+
+    def __init__(self, ids, playlist_count=None):
+        self.ids = list(ids)
+        self.playlist_count = playlist_count
+        self.walked = 0
+
+    def __call__(self, ydl_opts):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def _entries(self):
+        for video_id in self.ids:
+            self.walked += 1
+            yield youtube_entry(video_id)
+
+    def extract_info(self, url, download=False, process=True):
+        entries = self._entries()
+        return {'title': 'test', 'webpage_url': url, 'playlist_count': self.playlist_count or len(self.ids),
+                'entries': entries if not process else list(entries)}
+
+
+class SyncPlaylistTest(TempDirTestCase):
+    def sync(self, playlist):
+        with mock.patch.object(lib.yt_dlp, 'YoutubeDL', playlist), mock.patch('builtins.print'):
+            info = lib.sync_playlist_info(PLAYLIST_URL, False, False, '.')
+        return [entry['id'] if entry else None for entry in info['entries']]
+
+    def setUp(self):
+        super().setUp()
+        lib._download_archives.clear()
+
+    def test_first_sync_offers_everything(self):
+        self.assertEqual(self.sync(FakePlaylist(['a', 'b', 'c'])), ['a', 'b', 'c'])
+
+    def test_stops_at_previous_head_and_skips_archived(self):
+        playlist = FakePlaylist(['a', 'b', 'c'])
+        self.sync(playlist)
+        lib.get_download_archive('.').add('youtube b')
+        playlist.ids.insert(0, 'new')
+        playlist.walked = 0
+        self.assertEqual(self.sync(playlist), ['new', 'a', None, 'c'])
+        # Only the new entry and the old head were read, not the whole list
+        self.assertEqual(playlist.walked, 2)
+
+    def test_hidden_entries_do_not_force_a_full_walk(self):
+        playlist = FakePlaylist(['a', 'b', 'c'], playlist_count=5)
+        self.sync(playlist)
+        playlist.walked = 0
+        self.sync(playlist)
+        self.assertEqual(playlist.walked, 1)
+
+    def test_permanent_failures_are_not_offered_again(self):
+        playlist = FakePlaylist(['a', 'b'])
+        self.sync(playlist)
+        lib.PlaylistCache().mark_failed([('b', 'auth', 'Private video')])
+        self.assertEqual(self.sync(playlist), ['a', None])
+
+    def test_download_playlist_remembers_videos_it_gave_up_on(self):
+        def download_video(url, *args, **kwargs):
+            args[5]({'status': 'error', 'message': 'ERROR: Private video. Sign in if you have been granted access'})
+            return None
+
+        video = lib.video_from_entry(youtube_entry('p'), 1)
+        with mock.patch.object(lib, 'download_video', download_video), mock.patch('builtins.print'):
+            lib.download_playlist([video], '.', False, 1, False, 'Video', False, playlist_title_override='test')
+        self.assertEqual(lib.PlaylistCache().failed_ids(), {'p'})